@@ -0,0 +1,152 @@
+"""Measure request throughput of the payment get and callback routes.
+
+Requests are sent straight to the ASGI app, without a server or test
+client, so the numbers are dominated by Litestar and this package.
+
+Run with ``python benchmarks/bench_routes.py``.
+"""
+
+import asyncio
+import time
+from datetime import UTC, datetime
+from decimal import Decimal
+
+from getpaid_core.processor import BaseProcessor
+from getpaid_core.types import TransactionResult
+from litestar import Litestar
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.contrib.sqlalchemy.models import PaymentModel
+from litestar_getpaid.plugin import create_payment_router
+from litestar_getpaid.registry import LitestarPluginRegistry
+
+DURATION = 3.0
+
+
+class BenchProcessor(BaseProcessor):
+    slug = "bench"
+    display_name = "Bench"
+    accepted_currencies = ["PLN"]
+
+    async def prepare_transaction(self, **kwargs) -> TransactionResult:
+        raise NotImplementedError
+
+    async def verify_callback(self, data: dict, headers: dict, **kwargs):
+        return None
+
+    async def handle_callback(self, data: dict, headers: dict, **kwargs):
+        return None
+
+
+class BenchRepository:
+    def __init__(self, payment: PaymentModel) -> None:
+        self.payment = payment
+
+    async def get_by_id(self, payment_id: str) -> PaymentModel:
+        return self.payment
+
+    async def save(self, payment: PaymentModel) -> PaymentModel:
+        return payment
+
+
+def _payment() -> PaymentModel:
+    return PaymentModel(
+        id="pay-1",
+        order_id="order-1",
+        amount_required=Decimal("149.99"),
+        currency="PLN",
+        status="prepared",
+        backend="bench",
+        external_id="ext-1",
+        description="Order payment",
+        amount_paid=Decimal("0"),
+        amount_locked=Decimal("0"),
+        amount_refunded=Decimal("0"),
+        fraud_status=None,
+        fraud_message=None,
+        provider_data={},
+        created_at=datetime(2026, 1, 1, tzinfo=UTC),
+        updated_at=datetime(2026, 1, 1, tzinfo=UTC),
+    )
+
+
+def _app() -> Litestar:
+    registry = LitestarPluginRegistry()
+    registry.register(BenchProcessor)
+    router = create_payment_router(
+        config=GetpaidConfig(
+            default_backend="bench",
+            success_url="/ok",
+            failure_url="/fail",
+            backends={"bench": {}},
+        ),
+        repository=BenchRepository(_payment()),
+        registry=registry,
+    )
+    return Litestar(route_handlers=[router], debug=False)
+
+
+async def _request(app: Litestar, method: str, path: str, body: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+        "state": {},
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = 0
+
+    async def receive() -> dict:
+        if messages:
+            return messages.pop()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _throughput(
+    app: Litestar, method: str, path: str, body: bytes = b""
+) -> float:
+    assert await _request(app, method, path, body) == 200
+    count = 0
+    started = time.perf_counter()
+    deadline = started + DURATION
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            await _request(app, method, path, body)
+        count += 100
+    return count / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    app = _app()
+    async with app.lifespan():
+        get_rps = await _throughput(app, "GET", "/payments/pay-1")
+        callback_rps = await _throughput(
+            app, "POST", "/callback/pay-1", b'{"status": "paid"}'
+        )
+    print(f"GET /payments/{{id}}     {get_rps:10.0f} req/s")
+    print(f"POST /callback/{{id}}    {callback_rps:10.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
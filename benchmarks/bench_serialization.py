@@ -0,0 +1,67 @@
+"""Compare pydantic and msgspec payment response encoding.
+
+Run with ``python benchmarks/bench_serialization.py``.
+"""
+
+import timeit
+from decimal import Decimal
+
+from litestar_getpaid.contrib.sqlalchemy.models import PaymentModel
+from litestar_getpaid.routes.payments import _payment_to_response
+from litestar_getpaid.schemas import PaymentListResponse
+from litestar_getpaid.serialization import encode_payment, encode_payment_list
+
+
+def _payment(index: int) -> PaymentModel:
+    return PaymentModel(
+        id=f"00000000-0000-0000-0000-{index:012d}",
+        order_id=f"order-{index}",
+        amount_required=Decimal("149.99"),
+        currency="PLN",
+        status="paid",
+        backend="payu",
+        external_id=f"ext-{index}",
+        description="Order payment",
+        amount_paid=Decimal("149.99"),
+        amount_locked=Decimal("0"),
+        amount_refunded=Decimal("0"),
+        fraud_status=None,
+        fraud_message=None,
+        provider_data={"customer_ip": "127.0.0.1"},
+    )
+
+
+def _pydantic_single(payment: PaymentModel) -> bytes:
+    return _payment_to_response(payment).model_dump_json().encode()
+
+
+def _pydantic_list(payments: list[PaymentModel]) -> bytes:
+    items = [_payment_to_response(p) for p in payments]
+    response = PaymentListResponse(items=items, total=len(items))
+    return response.model_dump_json().encode()
+
+
+def _report(name: str, func, number: int) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{name:<24} {best * 1e6:10.1f} us")
+    return best
+
+
+def main() -> None:
+    single = _payment(0)
+    many = [_payment(i) for i in range(1000)]
+    assert _pydantic_single(single) == encode_payment(single)
+    assert _pydantic_list(many) == encode_payment_list(many)
+
+    print("single payment")
+    slow = _report("  pydantic", lambda: _pydantic_single(single), 5000)
+    fast = _report("  msgspec", lambda: encode_payment(single), 5000)
+    print(f"  speedup {slow / fast:.1f}x")
+    print("1,000 payments")
+    slow = _report("  pydantic", lambda: _pydantic_list(many), 20)
+    fast = _report("  msgspec", lambda: encode_payment_list(many), 20)
+    print(f"  speedup {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
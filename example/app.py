@@ -29,7 +29,7 @@ from typing import Annotated
 import httpx
 from getpaid_core.backends.dummy import DummyProcessor
 from getpaid_core.registry import registry as global_registry
-from litestar import Litestar, Request, Router, get, post
+from litestar import Litestar, Request, get, post
 from litestar.contrib.jinja import JinjaTemplateEngine
 from litestar.enums import RequestEncodingType
 from litestar.params import Body
@@ -49,7 +49,7 @@ from litestar_getpaid.contrib.sqlalchemy.repository import (
 from litestar_getpaid.contrib.sqlalchemy.retry_store import (
     SQLAlchemyRetryStore,
 )
-from litestar_getpaid.plugin import create_payment_router
+from litestar_getpaid.plugin import GetpaidPlugin
 
 # --- Database setup ---
 
@@ -120,12 +120,14 @@ retry_store = SQLAlchemyRetryStore(session_factory)
 # as a separate package with entry_points.
 global_registry.register(DummyProcessor)
 
-payment_router = create_payment_router(
+getpaid_plugin = GetpaidPlugin(
     config=config,
     repository=repository,
     order_resolver=ExampleOrderResolver(),
     retry_store=retry_store,
     order_loader=ExampleOrderResolver().resolve,
+    retry_worker=True,
+    path="/api",
 )
 
 
@@ -343,11 +345,6 @@ async def order_failure(payment_id: str = "") -> Template:
 
 # --- App ---
 
-api_router = Router(
-    path="/api",
-    route_handlers=[payment_router],
-)
-
 app = Litestar(
     route_handlers=[
         home,
@@ -356,9 +353,9 @@ app = Litestar(
         initiate_payment,
         order_success,
         order_failure,
-        api_router,
         paywall_router,
     ],
+    plugins=[getpaid_plugin],
     lifespan=[lifespan],
     template_config=TemplateConfig(
         directory="templates",
@@ -12,6 +12,7 @@ __all__ = [
     "CreatePaymentResponse",
     "ErrorResponse",
     "GetpaidConfig",
+    "GetpaidPlugin",
     "LitestarPluginRegistry",
     "OrderResolver",
     "Payment",
@@ -28,7 +29,7 @@ if TYPE_CHECKING:
         ConfigurationError,
         PaymentNotFoundError,
     )
-    from litestar_getpaid.plugin import create_payment_router
+    from litestar_getpaid.plugin import GetpaidPlugin, create_payment_router
     from litestar_getpaid.protocols import (
         CallbackRetryStore,
         OrderResolver,
@@ -55,6 +56,10 @@ def __getattr__(name: str):
         from litestar_getpaid.plugin import create_payment_router
 
         return create_payment_router
+    if name == "GetpaidPlugin":
+        from litestar_getpaid.plugin import GetpaidPlugin
+
+        return GetpaidPlugin
     if name == "LitestarPluginRegistry":
         from litestar_getpaid.registry import LitestarPluginRegistry
 
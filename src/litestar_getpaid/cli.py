@@ -0,0 +1,200 @@
+"""Litestar CLI commands for litestar-getpaid."""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator
+
+import click
+from getpaid_core.protocols import PaymentRepository
+from litestar.plugins import CLIPluginProtocol
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.metrics import RetryQueueStatsSource
+from litestar_getpaid.protocols import CallbackRetryStore, PaymentLock
+from litestar_getpaid.registry import (
+    LitestarPluginRegistry,
+    prepare_registry,
+)
+from litestar_getpaid.retry import DrainReport, drain_retries
+
+
+class GetpaidCLIPlugin(CLIPluginProtocol):
+    """Adds ``litestar getpaid`` commands to the Litestar CLI.
+
+    Register it with the same objects passed to
+    ``create_payment_router()``::
+
+        app = Litestar(
+            route_handlers=[router],
+            plugins=[
+                GetpaidCLIPlugin(
+                    config=config,
+                    repository=repository,
+                    retry_store=retry_store,
+                )
+            ],
+        )
+
+    Then run ``litestar getpaid retries drain --help``.
+
+    Commands run between the retry store's ``start()`` and ``stop()``
+    (or ``close()``), as the plugin lifespan does. The store claims the
+    retries it hands out, so a drain can run next to the app's retry
+    worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        config: GetpaidConfig,
+        repository: PaymentRepository,
+        retry_store: CallbackRetryStore,
+        registry: LitestarPluginRegistry | None = None,
+        payment_lock: PaymentLock | None = None,
+    ) -> None:
+        self.config = config
+        self.repository = repository
+        self.retry_store = retry_store
+        self.registry = registry
+        self.payment_lock = payment_lock
+
+    def on_cli_init(self, cli: click.Group) -> None:
+        @cli.group(name="getpaid")
+        def getpaid_group() -> None:
+            """Payment processing commands."""
+
+        @getpaid_group.group(name="retries")
+        def retries_group() -> None:
+            """Manage the webhook callback retry queue."""
+
+        @retries_group.command(name="drain")
+        @click.option(
+            "--concurrency",
+            type=click.IntRange(min=1),
+            default=4,
+            show_default=True,
+            help="Callbacks replayed in parallel.",
+        )
+        @click.option(
+            "--batch-size",
+            type=click.IntRange(min=1),
+            default=50,
+            show_default=True,
+            help="Retries fetched from the store per batch.",
+        )
+        @click.option(
+            "--backend",
+            default=None,
+            help="Only drain retries for this backend slug.",
+        )
+        @click.option(
+            "--time-budget",
+            type=click.FloatRange(min=0, min_open=True),
+            default=None,
+            help="Stop fetching new batches after this many seconds.",
+        )
+        @click.option(
+            "--dry-run",
+            is_flag=True,
+            default=False,
+            help="Report the queue without replaying anything.",
+        )
+        def drain(
+            concurrency: int,
+            batch_size: int,
+            backend: str | None,
+            time_budget: float | None,
+            dry_run: bool,
+        ) -> None:
+            """Replay due callback retries until the queue is drained."""
+            if dry_run:
+                asyncio.run(self._report_queue(backend))
+                return
+            registry = self.registry or LitestarPluginRegistry()
+            prepare_registry(registry, self.config.backends)
+            report = asyncio.run(
+                self._drain(
+                    registry=registry,
+                    concurrency=concurrency,
+                    batch_size=batch_size,
+                    backend=backend,
+                    time_budget=time_budget,
+                )
+            )
+            _echo_summary(report)
+
+    async def _drain(
+        self,
+        *,
+        registry: LitestarPluginRegistry,
+        concurrency: int,
+        batch_size: int,
+        backend: str | None,
+        time_budget: float | None,
+    ) -> DrainReport:
+        async with _started(self.retry_store):
+            return await drain_retries(
+                retry_store=self.retry_store,
+                repository=self.repository,
+                config=self.config,
+                registry=registry,
+                concurrency=concurrency,
+                batch_size=batch_size,
+                backend=backend,
+                time_budget=time_budget,
+                payment_lock=self.payment_lock,
+                on_progress=_echo_progress,
+            )
+
+    async def _report_queue(self, backend: str | None) -> None:
+        if not isinstance(self.retry_store, RetryQueueStatsSource):
+            raise click.ClickException(
+                "The retry store cannot report queue statistics."
+            )
+        async with _started(self.retry_store):
+            stats = await self.retry_store.get_queue_stats()
+        pending = stats.pending_by_backend
+        if backend is not None:
+            pending = {backend: pending.get(backend, 0)}
+        for slug, count in sorted(pending.items()):
+            click.echo(f"{slug}: {count} pending")
+        click.echo(f"{stats.due} due now (all backends)")
+        click.echo("Dry run: nothing was replayed.")
+
+
+@contextlib.asynccontextmanager
+async def _started(store: object) -> AsyncGenerator[None]:
+    """Run between the store's optional ``start()`` and ``stop()`` (or
+    ``close()``)."""
+    start = getattr(store, "start", None)
+    if start is not None:
+        await start()
+    try:
+        yield
+    finally:
+        shutdown = getattr(store, "stop", None) or getattr(store, "close", None)
+        if shutdown is not None:
+            await shutdown()
+
+
+def _format_outcomes(report: DrainReport) -> str:
+    return ", ".join(
+        f"{outcome}={count}"
+        for outcome, count in sorted(report.outcomes.items())
+    )
+
+
+def _echo_progress(report: DrainReport) -> None:
+    click.echo(
+        f"batch {report.batches}: {report.processed} processed "
+        f"({_format_outcomes(report)}) in {report.elapsed:.1f}s"
+    )
+
+
+def _echo_summary(report: DrainReport) -> None:
+    if report.budget_exhausted:
+        click.echo("Time budget exhausted; retries may remain.")
+    click.echo(
+        f"Drained {report.processed} retries in {report.elapsed:.2f}s "
+        f"({report.throughput:.1f}/s)"
+    )
@@ -0,0 +1,146 @@
+"""Shared outbound HTTP connection pools for payment backends.
+
+The pools only reach processors that read the ``http_client`` backend
+setting; getpaid_core itself makes no HTTP calls and does not use them.
+
+Requires the ``httpx`` package (``litestar-getpaid[httpx]``).
+"""
+
+import asyncio
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+from litestar_getpaid.exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    import httpx
+
+    from litestar_getpaid.config import GetpaidConfig
+
+# Backend setting under which opted-in processors find their pooled client.
+HTTP_CLIENT_SETTING = "http_client"
+
+_DEFAULT_TIMEOUT = 10.0
+_DEFAULT_MAX_CONNECTIONS = 100
+_DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+_DEFAULT_KEEPALIVE_EXPIRY = 5.0
+
+
+def _import_httpx():
+    # httpx is only needed once the pools are opened; importing it with
+    # this module would slow down every app and worker that never does.
+    try:
+        import httpx
+    except ImportError:  # pragma: no cover - optional dependency
+        raise ConfigurationError(
+            "BackendHTTPClients requires the 'httpx' package"
+        ) from None
+    return httpx
+
+
+def _build_client(settings: Mapping[str, Any]) -> "httpx.AsyncClient":
+    httpx = _import_httpx()
+    timeout = settings.get("timeout", _DEFAULT_TIMEOUT)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.get(
+                "max_connections", _DEFAULT_MAX_CONNECTIONS
+            ),
+            max_keepalive_connections=settings.get(
+                "max_keepalive_connections",
+                _DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            keepalive_expiry=settings.get(
+                "keepalive_expiry", _DEFAULT_KEEPALIVE_EXPIRY
+            ),
+        ),
+        timeout=httpx.Timeout(
+            timeout, connect=settings.get("connect_timeout", timeout)
+        ),
+    )
+
+
+class BackendHTTPClients:
+    """One pooled ``httpx.AsyncClient`` per configured backend.
+
+    Pool limits, keep-alive and timeouts are read from the ``http``
+    mapping in each backend's settings::
+
+        backends={
+            "payu": {
+                "http": {
+                    "max_connections": 50,
+                    "max_keepalive_connections": 10,
+                    "keepalive_expiry": 30,
+                    "timeout": 5,
+                    "connect_timeout": 2,
+                },
+            },
+        }
+
+    Open the pools at app startup and close them on shutdown. While they
+    are open, the payment flows built by the routes, the retry worker
+    and the callback inbox pass each backend's client to its processor
+    as the ``http_client`` setting.
+
+    This is opt-in for backends: a processor uses the pool only if it
+    reads ``self.get_setting("http_client")`` and sends its gateway
+    requests through that client. getpaid_core processors do not do
+    this on their own, so backends that create their own HTTP clients
+    keep doing so and the pool limits here do not apply to them.
+    """
+
+    def __init__(self, config: "GetpaidConfig") -> None:
+        self._config = config
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._settings: dict[str, dict[str, Any]] | None = None
+
+    async def start(self) -> None:
+        """Open a client for every backend in ``config.backends``."""
+        if self._settings is not None:
+            return
+        _import_httpx()
+        for slug, backend_config in self._config.backends.items():
+            self._clients[slug] = _build_client(
+                backend_config.get("http") or {}
+            )
+        self._settings = {
+            slug: {
+                **backend_config,
+                HTTP_CLIENT_SETTING: self._clients[slug],
+            }
+            for slug, backend_config in self._config.backends.items()
+        }
+
+    async def stop(self) -> None:
+        """Close all clients and their pooled connections."""
+        clients, self._clients = self._clients, {}
+        self._settings = None
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+    async def __aenter__(self) -> "BackendHTTPClients":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    def get(self, slug: str) -> "httpx.AsyncClient | None":
+        """Return the open client for ``slug``, if any."""
+        return self._clients.get(slug)
+
+    def backend_settings(self) -> dict[str, dict[str, Any]]:
+        """Return the backend settings with each open client added."""
+        if self._settings is None:
+            return self._config.backends
+        return self._settings
+
+
+def backend_settings(
+    config: "GetpaidConfig",
+    http_clients: BackendHTTPClients | None,
+) -> dict[str, dict[str, Any]]:
+    """Return the backend settings to build a ``PaymentFlow`` with."""
+    if http_clients is None:
+        return config.backends
+    return http_clients.backend_settings()
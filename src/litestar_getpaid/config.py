@@ -2,6 +2,7 @@
 
 from typing import Any
 
+from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -19,6 +20,21 @@ class GetpaidConfig(BaseSettings):
 
     backends: dict[str, dict[str, Any]] = {}
 
+    # Seconds a prepared, unpaid payment is reused for repeated checkout
+    # requests for the same order and backend; 0 disables reuse.
+    payment_reuse_seconds: int = 0
+
+    # Cache-Control max-age for refunded payments; 0 disables caching.
+    payment_cache_max_age: int = 0
+
+    # Encode payment responses with msgspec instead of pydantic.
+    msgspec_responses: bool = False
+
+    # Signed redirect tokens let the redirect routes skip the payment
+    # lookup; see litestar_getpaid.signing.
+    redirect_secret: SecretStr | None = None
+    redirect_token_ttl: int = 86400
+
     # Retry settings
     retry_max_attempts: int = 5
     retry_backoff_seconds: int = 60
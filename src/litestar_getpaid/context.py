@@ -0,0 +1,50 @@
+"""App-scoped container for the payment components."""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from getpaid_core.protocols import PaymentRepository
+
+from litestar_getpaid.clients import BackendHTTPClients
+from litestar_getpaid.idempotency import IdempotencyGuard
+from litestar_getpaid.inbox import CallbackInbox
+from litestar_getpaid.lookups import PaymentLookupGuard
+from litestar_getpaid.protocols import (
+    CallbackDeduplicator,
+    CallbackRetryStore,
+    OrderLoader,
+    OrderResolver,
+    PaymentEventBroadcaster,
+    PaymentLock,
+    Tracer,
+)
+from litestar_getpaid.registry import LitestarPluginRegistry
+from litestar_getpaid.tracing import NOOP_TRACER
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
+
+# Key of the GetpaidContext in app.state when GetpaidPlugin is used.
+STATE_KEY = "getpaid"
+
+
+@dataclass(slots=True, frozen=True)
+class GetpaidContext:
+    """The components one payment router is built from."""
+
+    config: "GetpaidConfig"
+    repository: PaymentRepository
+    registry: LitestarPluginRegistry = field(
+        default_factory=LitestarPluginRegistry
+    )
+    order_resolver: OrderResolver | None = None
+    order_loader: OrderLoader | None = None
+    retry_store: CallbackRetryStore | None = None
+    callback_inbox: CallbackInbox | None = None
+    callback_deduplicator: CallbackDeduplicator | None = None
+    payment_lock: PaymentLock | None = None
+    idempotency_guard: IdempotencyGuard | None = None
+    payment_events: PaymentEventBroadcaster | None = None
+    payment_lookup_guard: PaymentLookupGuard | None = None
+    http_clients: BackendHTTPClients | None = None
+    tracer: Tracer = NOOP_TRACER
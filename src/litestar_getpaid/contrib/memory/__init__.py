@@ -0,0 +1 @@
+"""In-memory contrib module for litestar-getpaid."""
@@ -0,0 +1,50 @@
+"""In-memory de-duplication of repeated gateway callbacks."""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+class InMemoryCallbackDeduplicator:
+    """Bounded LRU of recently processed callbacks.
+
+    Implements the CallbackDeduplicator protocol.
+
+    Entries expire ``ttl`` seconds after they were remembered; at most
+    ``max_entries`` are kept, evicting the least recently used.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        max_entries: int = 100_000,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], float] = OrderedDict()
+
+    async def is_duplicate(self, payment_id: str, fingerprint: str) -> bool:
+        """Return True if this callback was processed within the TTL."""
+        key = (payment_id, fingerprint)
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    async def remember(self, payment_id: str, fingerprint: str) -> None:
+        """Record a successfully processed callback."""
+        key = (payment_id, fingerprint)
+        self._entries[key] = self._clock() + self._ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
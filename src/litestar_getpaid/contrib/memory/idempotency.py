@@ -0,0 +1,93 @@
+"""In-memory Idempotency-Key store."""
+
+import time
+from collections.abc import Callable
+
+from litestar_getpaid.protocols import IdempotencyRecord
+
+
+class InMemoryIdempotencyStore:
+    """Idempotency-Key store kept in process memory.
+
+    Implements the IdempotencyStore protocol.
+
+    Completed responses are kept for ``ttl`` seconds. Reservations
+    expire after ``in_flight_ttl`` seconds so a crashed request does not
+    block its key forever; ``refresh()`` extends the reservation of a
+    request still running. Expired records are purged every
+    ``purge_every`` reservations.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 86400.0,
+        *,
+        in_flight_ttl: float = 60.0,
+        purge_every: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = ttl
+        self._in_flight_ttl = in_flight_ttl
+        self._clock = clock
+        self._purge_every = purge_every
+        self._reservations = 0
+        self._records: dict[str, tuple[IdempotencyRecord, float]] = {}
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        """Claim ``key``; False if it is already reserved or completed."""
+        if await self.get(key) is not None:
+            return False
+        self._reservations += 1
+        if self._reservations % self._purge_every == 0:
+            self.purge_expired()
+        self._records[key] = (
+            IdempotencyRecord(fingerprint=fingerprint),
+            self._clock() + self._in_flight_ttl,
+        )
+        return True
+
+    async def get(self, key: str) -> IdempotencyRecord | None:
+        """Return the live record for ``key``, if any."""
+        item = self._records.get(key)
+        if item is None:
+            return None
+        record, expires_at = item
+        if expires_at <= self._clock():
+            del self._records[key]
+            return None
+        return record
+
+    async def complete(self, key: str, response: dict) -> None:
+        """Cache the response of the request holding ``key``."""
+        item = self._records.get(key)
+        if item is None:
+            return
+        record = item[0]
+        record.response = response
+        self._records[key] = (record, self._clock() + self._ttl)
+
+    async def refresh(self, key: str) -> None:
+        """Extend the reservation of a request still in flight."""
+        item = self._records.get(key)
+        if item is None or item[0].response is not None:
+            return
+        self._records[key] = (item[0], self._clock() + self._in_flight_ttl)
+
+    async def release(self, key: str) -> None:
+        """Drop a reservation whose request failed."""
+        self._records.pop(key, None)
+
+    def purge_expired(self) -> int:
+        """Drop expired records. Returns the number removed."""
+        now = self._clock()
+        expired = [
+            key
+            for key, (_record, expires_at) in self._records.items()
+            if expires_at <= now
+        ]
+        for key in expired:
+            del self._records[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,326 @@
+"""In-memory retry store for webhook callbacks.
+
+Pending retries live in a min-heap keyed by ``next_retry_at``, so
+enqueueing and claiming are O(log n). Workers can await
+``wait_for_due()`` instead of polling the store. An optional snapshot
+file lets a single-node deployment survive restarts.
+"""
+
+import asyncio
+import base64
+import contextlib
+import json
+import logging
+import os
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from litestar_getpaid.contrib.memory.scheduler import RetryScheduler
+from litestar_getpaid.metrics import RetryQueueStats
+from litestar_getpaid.retry import compute_next_retry_at
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class _RetryEntry:
+    id: str
+    payment_id: str
+    payload: dict | None
+    headers: dict
+    next_retry_at: datetime
+    backend: str | None = None
+    raw_body: bytes | None = None
+    attempts: int = 0
+    last_error: str | None = None
+    status: str = "pending"
+    created_at: datetime = field(default_factory=lambda: datetime.now(tz=UTC))
+
+
+class InMemoryRetryStore:
+    """Callback retry store kept in process memory.
+
+    Implements the CallbackRetryStore protocol.
+
+    ``get_due_retries()`` leases the returned entries for
+    ``visibility_timeout`` seconds: they are not handed out again
+    unless the worker fails to mark them within that window.
+    Succeeded entries are discarded; exhausted entries are kept as
+    dead letters.
+    """
+
+    def __init__(
+        self,
+        backoff_seconds: int = 60,
+        *,
+        visibility_timeout: float = 300.0,
+        snapshot_path: str | os.PathLike[str] | None = None,
+        snapshot_interval: float = 5.0,
+    ) -> None:
+        self._backoff_seconds = backoff_seconds
+        self._visibility_timeout = visibility_timeout
+        self._snapshot_path = (
+            Path(snapshot_path) if snapshot_path is not None else None
+        )
+        self._snapshot_interval = snapshot_interval
+        self._entries: dict[str, _RetryEntry] = {}
+        self._dead: dict[str, _RetryEntry] = {}
+        self._scheduler = RetryScheduler()
+        self._dirty = False
+        self._snapshot_task: asyncio.Task | None = None
+        if self._snapshot_path is not None:
+            self._load_snapshot()
+
+    async def store_failed_callback(
+        self,
+        payment_id: str,
+        payload: dict | None,
+        headers: dict,
+        backend: str | None = None,
+        raw_body: bytes | None = None,
+    ) -> str:
+        """Store a failed callback for later retry."""
+        entry = _RetryEntry(
+            id=str(uuid.uuid4()),
+            payment_id=payment_id,
+            backend=backend,
+            payload=payload,
+            raw_body=raw_body,
+            headers=headers,
+            next_retry_at=compute_next_retry_at(
+                attempt=1,
+                backoff_seconds=self._backoff_seconds,
+            ),
+        )
+        self._entries[entry.id] = entry
+        self._schedule(entry)
+        return entry.id
+
+    async def get_due_retries(
+        self,
+        limit: int = 10,
+        backend: str | None = None,
+    ) -> list[dict]:
+        """Claim retries that are due for processing.
+
+        ``backend`` restricts the claim to one backend's retries.
+        """
+        now = datetime.now(tz=UTC)
+        lease_until = now + timedelta(seconds=self._visibility_timeout)
+        predicate = self._backend_predicate(backend)
+        due = [
+            self._entries[retry_id]
+            for retry_id in self._scheduler.pop_due(now, limit, predicate)
+        ]
+        for entry in due:
+            entry.next_retry_at = lease_until
+            self._schedule(entry, notify=False)
+        return [
+            {
+                "id": entry.id,
+                "payment_id": entry.payment_id,
+                "backend": entry.backend,
+                "payload": entry.payload,
+                "raw_body": entry.raw_body,
+                "headers": entry.headers,
+                "attempts": entry.attempts,
+            }
+            for entry in due
+        ]
+
+    async def mark_succeeded(self, retry_id: str) -> None:
+        """Mark a retry as successfully processed and discard it."""
+        if self._entries.pop(retry_id, None) is not None:
+            self._scheduler.discard(retry_id)
+            self._dirty = True
+
+    async def mark_failed(self, retry_id: str, error: str) -> None:
+        """Mark a retry as failed and schedule next attempt."""
+        entry = self._entries.get(retry_id)
+        if entry is None:
+            return
+        entry.attempts += 1
+        entry.last_error = error
+        entry.next_retry_at = compute_next_retry_at(
+            attempt=entry.attempts + 1,
+            backoff_seconds=self._backoff_seconds,
+        )
+        self._schedule(entry)
+
+    async def mark_deferred(self, retry_id: str, until: datetime) -> None:
+        """Postpone a retry without counting an attempt."""
+        entry = self._entries.get(retry_id)
+        if entry is None:
+            return
+        entry.next_retry_at = until
+        self._schedule(entry)
+
+    async def mark_exhausted(self, retry_id: str) -> None:
+        """Mark a retry as exhausted (dead letter)."""
+        entry = self._entries.pop(retry_id, None)
+        if entry is None:
+            return
+        self._scheduler.discard(retry_id)
+        entry.status = "exhausted"
+        self._dead[retry_id] = entry
+        self._dirty = True
+
+    def get(self, retry_id: str) -> dict | None:
+        """Return a pending or exhausted retry entry, if known."""
+        entry = self._entries.get(retry_id) or self._dead.get(retry_id)
+        return asdict(entry) if entry is not None else None
+
+    def dead_letters(self) -> list[dict]:
+        """Return all exhausted retry entries."""
+        return [asdict(entry) for entry in self._dead.values()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_queue_stats(self) -> RetryQueueStats:
+        """Return pending counts by backend and the oldest due retry."""
+        now = datetime.now(tz=UTC)
+        by_backend: Counter[str] = Counter()
+        due = 0
+        oldest_due_at = None
+        for entry in self._entries.values():
+            by_backend[entry.backend or "unknown"] += 1
+            if entry.next_retry_at <= now:
+                due += 1
+                if oldest_due_at is None or entry.next_retry_at < oldest_due_at:
+                    oldest_due_at = entry.next_retry_at
+        return RetryQueueStats(
+            pending_by_backend=dict(by_backend),
+            due=due,
+            oldest_due_at=oldest_due_at,
+        )
+
+    def next_due_at(self) -> datetime | None:
+        """Return when the earliest pending retry becomes due."""
+        return self._scheduler.next_due_at()
+
+    async def wait_for_due(
+        self,
+        timeout: float | None = None,
+        backend: str | None = None,
+    ) -> bool:
+        """Sleep until a retry is due or ``timeout`` seconds elapse.
+
+        Enqueueing an earlier retry wakes the waiter up so it can
+        re-evaluate the deadline. Returns True when a retry (of
+        ``backend``, if given) is due.
+        """
+        return await self._scheduler.wait_for_due(
+            timeout, self._backend_predicate(backend)
+        )
+
+    async def start(self) -> None:
+        """Start writing periodic snapshots, if a path is configured."""
+        if self._snapshot_path is None or self._snapshot_task is not None:
+            return
+        self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self) -> None:
+        """Stop periodic snapshots and write a final one."""
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._snapshot_task
+            self._snapshot_task = None
+        if self._snapshot_path is not None:
+            await self.snapshot()
+
+    async def __aenter__(self) -> "InMemoryRetryStore":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def snapshot(self) -> None:
+        """Atomically write the current queue state to the snapshot."""
+        if self._snapshot_path is None:
+            return
+        state = {
+            "entries": [
+                _entry_to_json(entry) for entry in self._entries.values()
+            ],
+            "dead": [_entry_to_json(entry) for entry in self._dead.values()],
+        }
+        # Cleared before the write so changes made while it runs keep
+        # the store dirty; restored if the write fails.
+        self._dirty = False
+        try:
+            await asyncio.to_thread(_write_atomic, self._snapshot_path, state)
+        except BaseException:
+            self._dirty = True
+            raise
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._snapshot_interval)
+            if not self._dirty:
+                continue
+            try:
+                await self.snapshot()
+            except OSError:
+                logger.exception(
+                    "Failed to write retry snapshot to %s",
+                    self._snapshot_path,
+                )
+
+    def _load_snapshot(self) -> None:
+        assert self._snapshot_path is not None
+        if not self._snapshot_path.exists():
+            return
+        state = json.loads(self._snapshot_path.read_text())
+        for data in state.get("entries", []):
+            entry = _entry_from_json(data)
+            self._entries[entry.id] = entry
+            self._schedule(entry, notify=False)
+        for data in state.get("dead", []):
+            entry = _entry_from_json(data)
+            self._dead[entry.id] = entry
+        self._dirty = False
+
+    def _backend_predicate(
+        self, backend: str | None
+    ) -> Callable[[str], bool] | None:
+        if backend is None:
+            return None
+        return lambda retry_id: self._entries[retry_id].backend == backend
+
+    def _schedule(self, entry: _RetryEntry, *, notify: bool = True) -> None:
+        self._scheduler.schedule(entry.id, entry.next_retry_at, notify=notify)
+        self._dirty = True
+
+
+def _entry_to_json(entry: _RetryEntry) -> dict:
+    data = asdict(entry)
+    data["next_retry_at"] = entry.next_retry_at.isoformat()
+    data["created_at"] = entry.created_at.isoformat()
+    if entry.raw_body is not None:
+        data["raw_body"] = base64.b64encode(entry.raw_body).decode("ascii")
+    return data
+
+
+def _entry_from_json(data: dict) -> _RetryEntry:
+    data = dict(data)
+    data["next_retry_at"] = datetime.fromisoformat(data["next_retry_at"])
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    if data.get("raw_body") is not None:
+        data["raw_body"] = base64.b64decode(data["raw_body"])
+    return _RetryEntry(**data)
+
+
+def _write_atomic(path: Path, state: dict) -> None:
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("w") as fh:
+        json.dump(state, fh)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
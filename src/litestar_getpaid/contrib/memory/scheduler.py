@@ -0,0 +1,145 @@
+"""Min-heap scheduler shared by the local retry stores."""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+
+class RetryScheduler:
+    """Orders retry IDs by due time.
+
+    Scheduling and claiming are O(log n). Rescheduling or discarding an
+    ID leaves a stale heap item behind, which is dropped lazily when it
+    reaches the top or when stale items outnumber live ones.
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, str]] = []
+        self._due: dict[str, float] = {}
+        self._counter = itertools.count()
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, retry_id: object) -> bool:
+        return retry_id in self._due
+
+    def schedule(
+        self,
+        retry_id: str,
+        due_at: datetime,
+        *,
+        notify: bool = True,
+    ) -> None:
+        """Schedule (or reschedule) ``retry_id`` to become due at
+        ``due_at``.
+        """
+        due_ts = due_at.timestamp()
+        self._due[retry_id] = due_ts
+        heapq.heappush(self._heap, (due_ts, next(self._counter), retry_id))
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._compact()
+        if notify:
+            self._changed.set()
+
+    def discard(self, retry_id: str) -> None:
+        """Stop tracking ``retry_id``."""
+        self._due.pop(retry_id, None)
+
+    def next_due_at(self) -> datetime | None:
+        """Return when the earliest scheduled retry becomes due."""
+        top = self._peek()
+        if top is None:
+            return None
+        return datetime.fromtimestamp(top[0], tz=UTC)
+
+    def pop_due(
+        self,
+        now: datetime,
+        limit: int,
+        predicate: Callable[[str], bool] | None = None,
+    ) -> list[str]:
+        """Remove and return up to ``limit`` IDs due at ``now``.
+
+        With a ``predicate``, due IDs it rejects stay scheduled.
+        """
+        now_ts = now.timestamp()
+        due: list[str] = []
+        skipped: list[tuple[float, int, str]] = []
+        while len(due) < limit:
+            top = self._peek()
+            if top is None or top[0] > now_ts:
+                break
+            heapq.heappop(self._heap)
+            if predicate is not None and not predicate(top[2]):
+                skipped.append(top)
+                continue
+            del self._due[top[2]]
+            due.append(top[2])
+        for item in skipped:
+            heapq.heappush(self._heap, item)
+        return due
+
+    async def wait_for_due(
+        self,
+        timeout: float | None = None,
+        predicate: Callable[[str], bool] | None = None,
+    ) -> bool:
+        """Sleep until a retry is due or ``timeout`` seconds elapse.
+
+        Scheduling a retry wakes the waiter up so it can re-evaluate
+        the deadline. Returns True when a retry is due. With a
+        ``predicate``, only IDs it accepts count, so a waiter claiming
+        with the same predicate is not woken by retries it cannot claim.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            self._changed.clear()
+            due_ts = self._next_due_ts(predicate)
+            delay = None
+            if due_ts is not None:
+                delay = due_ts - datetime.now(tz=UTC).timestamp()
+                if delay <= 0:
+                    return True
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                delay = remaining if delay is None else min(delay, remaining)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._changed.wait(), delay)
+
+    def _next_due_ts(
+        self, predicate: Callable[[str], bool] | None
+    ) -> float | None:
+        if predicate is None:
+            top = self._peek()
+            return top[0] if top is not None else None
+        # Filtered waits scan every live ID; they are rare (CLI drains).
+        return min(
+            (
+                due_ts
+                for retry_id, due_ts in self._due.items()
+                if predicate(retry_id)
+            ),
+            default=None,
+        )
+
+    def _peek(self) -> tuple[float, int, str] | None:
+        while self._heap:
+            top = self._heap[0]
+            if self._due.get(top[2]) == top[0]:
+                return top
+            heapq.heappop(self._heap)
+        return None
+
+    def _compact(self) -> None:
+        self._heap = [
+            item for item in self._heap if self._due.get(item[2]) == item[0]
+        ]
+        heapq.heapify(self._heap)
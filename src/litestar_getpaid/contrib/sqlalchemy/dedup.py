@@ -0,0 +1,82 @@
+"""SQLAlchemy-backed de-duplication of repeated gateway callbacks."""
+
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from litestar_getpaid.contrib.sqlalchemy.models import CallbackDedupModel
+
+
+class SQLAlchemyCallbackDeduplicator:
+    """Callback de-duplication table shared by all app instances.
+
+    Implements the CallbackDeduplicator protocol.
+
+    A unique constraint on ``(payment_id, fingerprint)`` keeps one row
+    per callback. Rows older than ``ttl`` seconds are ignored and can be
+    deleted with ``purge_expired()``.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        ttl: float = 600.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = timedelta(seconds=ttl)
+
+    async def is_duplicate(self, payment_id: str, fingerprint: str) -> bool:
+        """Return True if this callback was processed within the TTL."""
+        cutoff = datetime.now(tz=UTC) - self._ttl
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(CallbackDedupModel.id)
+                .where(CallbackDedupModel.payment_id == payment_id)
+                .where(CallbackDedupModel.fingerprint == fingerprint)
+                .where(CallbackDedupModel.created_at >= cutoff)
+                .limit(1)
+            )
+            return result.first() is not None
+
+    async def remember(self, payment_id: str, fingerprint: str) -> None:
+        """Record a successfully processed callback."""
+        now = datetime.now(tz=UTC)
+        async with self._session_factory() as session:
+            session.add(
+                CallbackDedupModel(
+                    payment_id=payment_id,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                )
+            )
+            try:
+                await session.commit()
+                return
+            except IntegrityError:
+                await session.rollback()
+            # Already known: restart its TTL window.
+            await session.execute(
+                update(CallbackDedupModel)
+                .where(CallbackDedupModel.payment_id == payment_id)
+                .where(CallbackDedupModel.fingerprint == fingerprint)
+                .values(created_at=now)
+            )
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        """Delete rows older than the TTL. Returns the number deleted."""
+        cutoff = datetime.now(tz=UTC) - self._ttl
+        async with self._session_factory() as session:
+            result = cast(
+                "CursorResult[Any]",
+                await session.execute(
+                    delete(CallbackDedupModel).where(
+                        CallbackDedupModel.created_at < cutoff
+                    )
+                ),
+            )
+            await session.commit()
+            return result.rowcount
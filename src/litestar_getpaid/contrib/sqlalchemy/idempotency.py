@@ -0,0 +1,128 @@
+"""SQLAlchemy-backed Idempotency-Key store."""
+
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from litestar_getpaid.contrib.sqlalchemy.models import IdempotencyKeyModel
+from litestar_getpaid.protocols import IdempotencyRecord
+
+
+class SQLAlchemyIdempotencyStore:
+    """Idempotency-Key store shared by all app instances.
+
+    Implements the IdempotencyStore protocol.
+
+    The key is the primary key, so concurrent reservations of one key
+    race on the insert and exactly one wins. Completed responses are
+    kept for ``ttl`` seconds, reservations for ``in_flight_ttl``
+    seconds unless renewed with ``refresh()``; delete expired rows with
+    ``purge_expired()``.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        ttl: float = 86400.0,
+        *,
+        in_flight_ttl: float = 60.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = timedelta(seconds=ttl)
+        self._in_flight_ttl = timedelta(seconds=in_flight_ttl)
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        """Claim ``key``; False if it is already reserved or completed."""
+        now = datetime.now(tz=UTC)
+        async with self._session_factory() as session:
+            await session.execute(
+                delete(IdempotencyKeyModel)
+                .where(IdempotencyKeyModel.key == key)
+                .where(IdempotencyKeyModel.expires_at <= now)
+            )
+            session.add(
+                IdempotencyKeyModel(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + self._in_flight_ttl,
+                    created_at=now,
+                )
+            )
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                return False
+            return True
+
+    async def get(self, key: str) -> IdempotencyRecord | None:
+        """Return the live record for ``key``, if any."""
+        async with self._session_factory() as session:
+            row = (
+                await session.execute(
+                    select(
+                        IdempotencyKeyModel.fingerprint,
+                        IdempotencyKeyModel.response,
+                    )
+                    .where(IdempotencyKeyModel.key == key)
+                    .where(
+                        IdempotencyKeyModel.expires_at > datetime.now(tz=UTC)
+                    )
+                )
+            ).first()
+        if row is None:
+            return None
+        return IdempotencyRecord(fingerprint=row[0], response=row[1])
+
+    async def complete(self, key: str, response: dict) -> None:
+        """Cache the response of the request holding ``key``."""
+        async with self._session_factory() as session:
+            await session.execute(
+                update(IdempotencyKeyModel)
+                .where(IdempotencyKeyModel.key == key)
+                .values(
+                    response=response,
+                    expires_at=datetime.now(tz=UTC) + self._ttl,
+                )
+            )
+            await session.commit()
+
+    async def refresh(self, key: str) -> None:
+        """Extend the reservation of a request still in flight."""
+        now = datetime.now(tz=UTC)
+        async with self._session_factory() as session:
+            await session.execute(
+                update(IdempotencyKeyModel)
+                .where(IdempotencyKeyModel.key == key)
+                .where(IdempotencyKeyModel.response.is_(None))
+                .where(IdempotencyKeyModel.expires_at > now)
+                .values(expires_at=now + self._in_flight_ttl)
+            )
+            await session.commit()
+
+    async def release(self, key: str) -> None:
+        """Drop a reservation whose request failed."""
+        async with self._session_factory() as session:
+            await session.execute(
+                delete(IdempotencyKeyModel)
+                .where(IdempotencyKeyModel.key == key)
+                .where(IdempotencyKeyModel.response.is_(None))
+            )
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows. Returns the number deleted."""
+        async with self._session_factory() as session:
+            result = cast(
+                "CursorResult[Any]",
+                await session.execute(
+                    delete(IdempotencyKeyModel).where(
+                        IdempotencyKeyModel.expires_at <= datetime.now(tz=UTC)
+                    )
+                ),
+            )
+            await session.commit()
+            return result.rowcount
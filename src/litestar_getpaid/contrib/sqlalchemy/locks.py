@@ -0,0 +1,52 @@
+"""PostgreSQL advisory locks serializing callbacks across nodes."""
+
+import contextlib
+import hashlib
+from collections.abc import AsyncGenerator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from litestar_getpaid.locks import StripedPaymentLock
+
+
+def advisory_lock_key(payment_id: str) -> int:
+    """Map a payment ID onto a signed 64-bit advisory lock key."""
+    digest = hashlib.blake2b(payment_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class PostgresAdvisoryPaymentLock:
+    """Per-payment lock held as a PostgreSQL advisory lock.
+
+    Implements the PaymentLock protocol.
+
+    Waiters in the same process first queue on a local
+    ``StripedPaymentLock``, so a node holds at most one database
+    connection per contended payment. The advisory lock is
+    transaction-scoped and released when the connection's transaction
+    ends, even if the holder crashes.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        local_stripes: int = 1024,
+    ) -> None:
+        if engine.dialect.name != "postgresql":
+            raise ValueError(
+                "PostgresAdvisoryPaymentLock requires a PostgreSQL engine"
+            )
+        self._engine = engine
+        self._local = StripedPaymentLock(local_stripes)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, payment_id: str) -> AsyncGenerator[None]:
+        """Hold the lock for ``payment_id`` across all nodes."""
+        async with self._local.lock(payment_id), self._engine.begin() as conn:
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": advisory_lock_key(payment_id)},
+            )
+            yield
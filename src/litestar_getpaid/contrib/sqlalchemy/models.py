@@ -4,7 +4,16 @@ import uuid
 from datetime import UTC, datetime
 from decimal import Decimal
 
-from sqlalchemy import JSON, DateTime, Numeric, String, Text
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    Index,
+    LargeBinary,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -17,6 +26,15 @@ class PaymentModel(Base):
 
     __tablename__ = "getpaid_payment"
     __allow_unmapped__ = True
+    __table_args__ = (
+        Index(
+            "ix_getpaid_payment_reuse",
+            "order_id",
+            "backend",
+            "status",
+            "created_at",
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -50,6 +68,9 @@ class PaymentModel(Base):
         Text, nullable=True, default=None
     )
     provider_data: Mapped[dict] = mapped_column(JSON, default=dict)
+    transaction_result: Mapped[dict | None] = mapped_column(
+        JSON, nullable=True, default=None
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(tz=UTC),
@@ -77,6 +98,9 @@ class CallbackRetryModel(Base):
     """Webhook callback retry queue entry."""
 
     __tablename__ = "getpaid_callback_retry"
+    __table_args__ = (
+        Index("ix_getpaid_callback_retry_due", "status", "next_retry_at"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36),
@@ -84,7 +108,15 @@ class CallbackRetryModel(Base):
         default=lambda: str(uuid.uuid4()),
     )
     payment_id: Mapped[str] = mapped_column(String(36), index=True)
-    payload: Mapped[dict] = mapped_column(JSON)
+    backend: Mapped[str | None] = mapped_column(
+        String(100), nullable=True, default=None
+    )
+    payload: Mapped[dict | None] = mapped_column(
+        JSON, nullable=True, default=None
+    )
+    raw_body: Mapped[bytes | None] = mapped_column(
+        LargeBinary, nullable=True, default=None
+    )
     headers: Mapped[dict] = mapped_column(JSON)
     attempts: Mapped[int] = mapped_column(default=0)
     next_retry_at: Mapped[datetime | None] = mapped_column(
@@ -98,3 +130,44 @@ class CallbackRetryModel(Base):
         DateTime(timezone=True),
         default=lambda: datetime.now(tz=UTC),
     )
+
+
+class CallbackDedupModel(Base):
+    """Fingerprint of a processed webhook callback."""
+
+    __tablename__ = "getpaid_callback_dedup"
+    __table_args__ = (
+        UniqueConstraint(
+            "payment_id",
+            "fingerprint",
+            name="uq_getpaid_callback_dedup",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    payment_id: Mapped[str] = mapped_column(String(36))
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(tz=UTC),
+        index=True,
+    )
+
+
+class IdempotencyKeyModel(Base):
+    """Idempotency-Key reservation and cached response."""
+
+    __tablename__ = "getpaid_idempotency_key"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    response: Mapped[dict | None] = mapped_column(
+        JSON, nullable=True, default=None
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(tz=UTC),
+    )
@@ -1,17 +1,26 @@
 """SQLAlchemy 2.0 async PaymentRepository implementation."""
 
-from collections.abc import Awaitable
-from collections.abc import Callable
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection
+from datetime import datetime
 
-from sqlalchemy import select
+from getpaid_core.enums import PaymentStatus
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from litestar_getpaid.contrib.sqlalchemy.models import PaymentModel
-
+from litestar_getpaid.protocols import PaymentVersion
 
 OrderLoader = Callable[[str], Awaitable[object]]
 
 
+def _columns(fields: Collection[str]) -> list:
+    columns = PaymentModel.__table__.columns
+    unknown = [name for name in fields if name not in columns]
+    if unknown:
+        raise ValueError(f"Unknown payment columns: {', '.join(unknown)}")
+    return [columns[name] for name in fields]
+
+
 class SQLAlchemyPaymentRepository:
     """Payment repository backed by SQLAlchemy async sessions.
 
@@ -36,6 +45,72 @@ class SQLAlchemyPaymentRepository:
             session.expunge(result)
             return result
 
+    async def exists(self, payment_id: str) -> bool:
+        """Return True if the payment exists, reading only its ID."""
+        async with self._session_factory() as session:
+            found = await session.scalar(
+                select(PaymentModel.id).where(PaymentModel.id == payment_id)
+            )
+        return found is not None
+
+    async def iter_payment_ids(
+        self, batch_size: int = 10_000
+    ) -> AsyncIterator[str]:
+        """Yield the IDs of all payments, e.g. for
+        ``litestar_getpaid.lookups.build_id_filter()``."""
+        async with self._session_factory() as session:
+            result = await session.stream_scalars(
+                select(PaymentModel.id).execution_options(yield_per=batch_size)
+            )
+            async for payment_id in result:
+                yield payment_id
+
+    async def get_payment_version(self, payment_id: str) -> PaymentVersion:
+        """Load only the update time and status of a payment.
+
+        Raises KeyError if not found.
+        """
+        async with self._session_factory() as session:
+            row = (
+                await session.execute(
+                    select(PaymentModel.updated_at, PaymentModel.status).where(
+                        PaymentModel.id == payment_id
+                    )
+                )
+            ).first()
+        if row is None:
+            raise KeyError(payment_id)
+        return PaymentVersion(updated_at=row[0], status=row[1])
+
+    async def get_payment_fields(
+        self, payment_id: str, fields: Collection[str]
+    ) -> dict:
+        """Load only ``fields`` of a payment. Raises KeyError if not
+        found."""
+        async with self._session_factory() as session:
+            row = (
+                await session.execute(
+                    select(*_columns(fields)).where(
+                        PaymentModel.id == payment_id
+                    )
+                )
+            ).first()
+        if row is None:
+            raise KeyError(payment_id)
+        return dict(row._mapping)
+
+    async def list_payment_fields(
+        self, order_id: str, fields: Collection[str]
+    ) -> list[dict]:
+        """Load only ``fields`` of all payments for an order."""
+        async with self._session_factory() as session:
+            result = await session.execute(
+                select(*_columns(fields)).where(
+                    PaymentModel.order_id == order_id
+                )
+            )
+            return [dict(row._mapping) for row in result]
+
     async def create(self, **kwargs) -> PaymentModel:
         """Create a new payment record."""
         order = kwargs.pop("order", None)
@@ -92,6 +167,46 @@ class SQLAlchemyPaymentRepository:
                 session.expunge(p)
             return payments
 
+    async def find_reusable_payment(
+        self,
+        order_id: str,
+        backend: str,
+        *,
+        created_after: datetime,
+    ) -> PaymentModel | None:
+        """Return the newest prepared payment for the order and backend
+        with a stored transaction result, created after
+        ``created_after``."""
+        async with self._session_factory() as session:
+            stmt = (
+                select(PaymentModel)
+                .where(PaymentModel.order_id == order_id)
+                .where(PaymentModel.backend == backend)
+                .where(PaymentModel.status == PaymentStatus.PREPARED)
+                .where(PaymentModel.created_at > created_after)
+                .where(PaymentModel.transaction_result.is_not(None))
+                .order_by(PaymentModel.created_at.desc())
+                .limit(1)
+            )
+            payment = (await session.execute(stmt)).scalars().first()
+            if payment is None:
+                return None
+            await self._hydrate_order(payment)
+            session.expunge(payment)
+            return payment
+
+    async def save_transaction_result(
+        self, payment_id: str, result: dict
+    ) -> None:
+        """Store the prepared transaction data of a payment for reuse."""
+        async with self._session_factory() as session:
+            await session.execute(
+                update(PaymentModel)
+                .where(PaymentModel.id == payment_id)
+                .values(transaction_result=result)
+            )
+            await session.commit()
+
     async def _hydrate_order(self, payment: PaymentModel) -> None:
         if getattr(payment, "order", None) is not None:
             return
@@ -1,39 +1,59 @@
 """SQLAlchemy-backed retry store for webhook callbacks."""
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
 
-from sqlalchemy import select
+from sqlalchemy import CursorResult, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from litestar_getpaid.contrib.sqlalchemy.models import CallbackRetryModel
+from litestar_getpaid.metrics import RetryQueueStats
+from litestar_getpaid.payloads import compress_body, decompress_body
 from litestar_getpaid.retry import compute_next_retry_at
 
 
 class SQLAlchemyRetryStore:
     """Callback retry store backed by SQLAlchemy.
 
-    Implements the CallbackRetryStore protocol.
+    Implements the CallbackRetryStore protocol. ``get_due_retries()``
+    claims the rows it returns by moving their ``next_retry_at``
+    ``visibility_timeout`` seconds ahead, so concurrent workers and
+    drains do not replay the same retry; a claim not settled by a
+    ``mark_*`` call expires and the retry is handed out again.
     """
 
     def __init__(
         self,
         session_factory: async_sessionmaker[AsyncSession],
         backoff_seconds: int = 60,
+        *,
+        visibility_timeout: float = 300.0,
     ) -> None:
         self._session_factory = session_factory
         self._backoff_seconds = backoff_seconds
+        self._visibility_timeout = visibility_timeout
 
     async def store_failed_callback(
         self,
         payment_id: str,
-        payload: dict,
+        payload: dict | None,
         headers: dict,
+        backend: str | None = None,
+        raw_body: bytes | None = None,
     ) -> str:
-        """Store a failed callback for later retry."""
+        """Store a failed callback for later retry.
+
+        The raw body is stored compressed; pass ``payload=None`` to
+        have it re-parsed when the retry runs.
+        """
         async with self._session_factory() as session:
             retry = CallbackRetryModel(
                 payment_id=payment_id,
+                backend=backend,
                 payload=payload,
+                raw_body=(
+                    compress_body(raw_body) if raw_body is not None else None
+                ),
                 headers=headers,
                 attempts=0,
                 next_retry_at=compute_next_retry_at(
@@ -47,9 +67,20 @@ class SQLAlchemyRetryStore:
             await session.refresh(retry)
             return retry.id
 
-    async def get_due_retries(self, limit: int = 10) -> list[dict]:
-        """Get retries that are due for processing."""
+    async def get_due_retries(
+        self,
+        limit: int = 10,
+        backend: str | None = None,
+    ) -> list[dict]:
+        """Claim retries that are due for processing.
+
+        ``backend`` restricts the claim to one backend's retries. Rows
+        locked by another claim are skipped where the database supports
+        ``SKIP LOCKED``; elsewhere each row is claimed with a
+        conditional update and rows claimed concurrently are dropped.
+        """
         now = datetime.now(tz=UTC)
+        lease_until = now + timedelta(seconds=self._visibility_timeout)
         async with self._session_factory() as session:
             stmt = (
                 select(CallbackRetryModel)
@@ -57,19 +88,46 @@ class SQLAlchemyRetryStore:
                 .where(CallbackRetryModel.next_retry_at <= now)
                 .order_by(CallbackRetryModel.next_retry_at.asc())
                 .limit(limit)
+                .with_for_update(skip_locked=True)
             )
+            if backend is not None:
+                stmt = stmt.where(CallbackRetryModel.backend == backend)
             result = await session.execute(stmt)
-            retries = result.scalars().all()
-            return [
-                {
-                    "id": r.id,
-                    "payment_id": r.payment_id,
-                    "payload": r.payload,
-                    "headers": r.headers,
-                    "attempts": r.attempts,
-                }
-                for r in retries
-            ]
+            retries = []
+            for r in result.scalars().all():
+                claim = cast(
+                    "CursorResult[Any]",
+                    await session.execute(
+                        update(CallbackRetryModel)
+                        .where(CallbackRetryModel.id == r.id)
+                        .where(CallbackRetryModel.status == "pending")
+                        .where(
+                            CallbackRetryModel.next_retry_at == r.next_retry_at
+                        )
+                        .values(next_retry_at=lease_until)
+                        .execution_options(synchronize_session=False)
+                    ),
+                )
+                if claim.rowcount != 1:
+                    # Claimed by a concurrent worker since the select.
+                    continue
+                retries.append(
+                    {
+                        "id": r.id,
+                        "payment_id": r.payment_id,
+                        "backend": r.backend,
+                        "payload": r.payload,
+                        "raw_body": (
+                            decompress_body(r.raw_body)
+                            if r.raw_body is not None
+                            else None
+                        ),
+                        "headers": r.headers,
+                        "attempts": r.attempts,
+                    }
+                )
+            await session.commit()
+            return retries
 
     async def mark_succeeded(self, retry_id: str) -> None:
         """Mark a retry as successfully processed."""
@@ -93,6 +151,14 @@ class SQLAlchemyRetryStore:
                 retry.status = "pending"
                 await session.commit()
 
+    async def mark_deferred(self, retry_id: str, until: datetime) -> None:
+        """Postpone a retry without counting an attempt."""
+        async with self._session_factory() as session:
+            retry = await session.get(CallbackRetryModel, retry_id)
+            if retry is not None:
+                retry.next_retry_at = until
+                await session.commit()
+
     async def mark_exhausted(self, retry_id: str) -> None:
         """Mark a retry as exhausted (dead letter)."""
         async with self._session_factory() as session:
@@ -100,3 +166,33 @@ class SQLAlchemyRetryStore:
             if retry is not None:
                 retry.status = "exhausted"
                 await session.commit()
+
+    async def get_queue_stats(self) -> RetryQueueStats:
+        """Return pending counts by backend and the oldest due retry."""
+        now = datetime.now(tz=UTC)
+        pending = CallbackRetryModel.status == "pending"
+        async with self._session_factory() as session:
+            by_backend = await session.execute(
+                select(CallbackRetryModel.backend, func.count())
+                .where(pending)
+                .group_by(CallbackRetryModel.backend)
+            )
+            due_count, oldest_due_at = (
+                await session.execute(
+                    select(
+                        func.count(),
+                        func.min(CallbackRetryModel.next_retry_at),
+                    )
+                    .where(pending)
+                    .where(CallbackRetryModel.next_retry_at <= now)
+                )
+            ).one()
+        if oldest_due_at is not None and oldest_due_at.tzinfo is None:
+            oldest_due_at = oldest_due_at.replace(tzinfo=UTC)
+        return RetryQueueStats(
+            pending_by_backend={
+                backend or "unknown": count for backend, count in by_backend
+            },
+            due=due_count,
+            oldest_due_at=oldest_due_at,
+        )
@@ -0,0 +1 @@
+"""Append-only log contrib module for litestar-getpaid."""
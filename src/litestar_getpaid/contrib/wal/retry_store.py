@@ -0,0 +1,644 @@
+"""Append-only log backed retry store for webhook callbacks.
+
+Every change to the retry queue is appended as a checksummed record to
+a segmented log in a local directory. Writers wait for a group fsync,
+so concurrent callbacks share a single disk flush. On startup the log
+is replayed to rebuild the in-memory index; payloads stay on disk and
+are decoded straight from a memory map when a retry is claimed.
+"""
+
+import asyncio
+import contextlib
+import logging
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+import msgspec
+
+from litestar_getpaid.contrib.memory.scheduler import RetryScheduler
+from litestar_getpaid.exceptions import ConfigurationError
+from litestar_getpaid.metrics import RetryQueueStats
+from litestar_getpaid.retry import compute_next_retry_at
+
+logger = logging.getLogger(__name__)
+
+# crc32, record type, meta length, payload length
+_HEADER = struct.Struct("<IBII")
+_ENQUEUE = 1
+_UPDATE = 2
+_SEGMENT_SUFFIX = ".wal"
+
+
+@dataclass(slots=True)
+class _IndexEntry:
+    id: str
+    payment_id: str
+    backend: str | None
+    headers: dict
+    attempts: int
+    next_retry_at: datetime
+    last_error: str | None
+    created_at: datetime
+    segment: int
+    payload_offset: int
+    payload_length: int
+    # True when the payload section holds the raw callback body rather
+    # than the JSON-encoded ``payload`` dict.
+    raw: bool = False
+
+
+class WALRetryStore:
+    """Callback retry store backed by an append-only segmented log.
+
+    Implements the CallbackRetryStore protocol.
+
+    Args:
+        directory: Directory holding the log segments. Created if
+            missing.
+        backoff_seconds: Base retry backoff interval.
+        segment_size: Size in bytes after which a new segment is
+            started.
+        fsync_interval: How long, in seconds, a write waits for other
+            writes to join its fsync.
+        visibility_timeout: How long, in seconds, a claimed retry is
+            hidden from ``get_due_retries()``.
+        compact_threshold: Fraction of the retries written to sealed
+            segments that may still be pending when they are compacted.
+
+    Succeeded and exhausted retries are terminal: they are dropped from
+    the index, and segments holding only terminal records are deleted.
+    Once at most ``compact_threshold`` of the retries written to sealed
+    segments are pending, those segments are compacted (see
+    ``compact()``), so a long-lived retry does not keep every later
+    segment on disk.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        backoff_seconds: int = 60,
+        *,
+        segment_size: int = 16 * 1024 * 1024,
+        fsync_interval: float = 0.005,
+        visibility_timeout: float = 300.0,
+        compact_threshold: float = 0.25,
+    ) -> None:
+        self._directory = Path(directory)
+        self._backoff_seconds = backoff_seconds
+        self._segment_size = segment_size
+        self._fsync_interval = fsync_interval
+        self._visibility_timeout = visibility_timeout
+        self._compact_threshold = compact_threshold
+        self._compacting = False
+        self._index: dict[str, _IndexEntry] = {}
+        # Enqueued entries waiting for their fsync, indexed once durable.
+        self._committing: dict[str, _IndexEntry] = {}
+        self._live: dict[int, int] = {}
+        # Enqueue records written per segment, live or not.
+        self._records: Counter[int] = Counter()
+        self._scheduler = RetryScheduler()
+        self._maps: dict[int, mmap.mmap] = {}
+        self._retired: list[BinaryIO] = []
+        self._sync_waiter: asyncio.Future | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._flush_lock = asyncio.Lock()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = _lock_directory(self._directory)
+        self._replay()
+        self._segment = max(self._live, default=0) or 1
+        self._file = self._open_segment(self._segment)
+
+    async def store_failed_callback(
+        self,
+        payment_id: str,
+        payload: dict | None,
+        headers: dict,
+        backend: str | None = None,
+        raw_body: bytes | None = None,
+    ) -> str:
+        """Store a failed callback for later retry.
+
+        A raw body is written to the log verbatim and ``payload`` is not
+        kept; otherwise the JSON-encoded payload is written.
+        """
+        entry = _IndexEntry(
+            id=str(uuid.uuid4()),
+            payment_id=payment_id,
+            backend=backend,
+            headers=headers,
+            attempts=0,
+            next_retry_at=compute_next_retry_at(
+                attempt=1,
+                backoff_seconds=self._backoff_seconds,
+            ),
+            last_error=None,
+            created_at=datetime.now(tz=UTC),
+            segment=0,
+            payload_offset=0,
+            payload_length=0,
+            raw=raw_body is not None,
+        )
+        self._append_enqueue(
+            entry,
+            raw_body if raw_body is not None else msgspec.json.encode(payload),
+        )
+        self._committing[entry.id] = entry
+        try:
+            await self._commit()
+        except BaseException:
+            # The record may still reach the disk with a later flush;
+            # the tombstone keeps it from being replayed as a retry.
+            self._live[entry.segment] -= 1
+            self._append_update(entry, "aborted")
+            raise
+        finally:
+            del self._committing[entry.id]
+        self._index[entry.id] = entry
+        self._scheduler.schedule(entry.id, entry.next_retry_at)
+        return entry.id
+
+    async def get_due_retries(
+        self,
+        limit: int = 10,
+        backend: str | None = None,
+    ) -> list[dict]:
+        """Claim retries that are due for processing.
+
+        ``backend`` restricts the claim to one backend's retries.
+        """
+        now = datetime.now(tz=UTC)
+        lease_until = now + timedelta(seconds=self._visibility_timeout)
+        predicate = self._backend_predicate(backend)
+        retries = []
+        for retry_id in self._scheduler.pop_due(now, limit, predicate):
+            entry = self._index[retry_id]
+            self._scheduler.schedule(retry_id, lease_until, notify=False)
+            payload, raw_body = self._decode_payload(entry)
+            retries.append(
+                {
+                    "id": entry.id,
+                    "payment_id": entry.payment_id,
+                    "backend": entry.backend,
+                    "payload": payload,
+                    "raw_body": raw_body,
+                    "headers": entry.headers,
+                    "attempts": entry.attempts,
+                }
+            )
+        return retries
+
+    async def mark_succeeded(self, retry_id: str) -> None:
+        """Mark a retry as successfully processed."""
+        await self._finish(retry_id, "succeeded")
+
+    async def mark_failed(self, retry_id: str, error: str) -> None:
+        """Mark a retry as failed and schedule next attempt."""
+        entry = self._index.get(retry_id)
+        if entry is None:
+            return
+        entry.attempts += 1
+        entry.last_error = error
+        entry.next_retry_at = compute_next_retry_at(
+            attempt=entry.attempts + 1,
+            backoff_seconds=self._backoff_seconds,
+        )
+        self._append_update(entry, "pending")
+        await self._commit()
+        self._scheduler.schedule(retry_id, entry.next_retry_at)
+
+    async def mark_deferred(self, retry_id: str, until: datetime) -> None:
+        """Postpone a retry without counting an attempt."""
+        entry = self._index.get(retry_id)
+        if entry is None:
+            return
+        entry.next_retry_at = until
+        self._append_update(entry, "pending")
+        await self._commit()
+        self._scheduler.schedule(retry_id, until)
+
+    async def mark_exhausted(self, retry_id: str) -> None:
+        """Mark a retry as exhausted (dead letter)."""
+        await self._finish(retry_id, "exhausted")
+
+    def get(self, retry_id: str) -> dict | None:
+        """Return a pending retry entry, if known."""
+        entry = self._index.get(retry_id)
+        if entry is None:
+            return None
+        payload, raw_body = self._decode_payload(entry)
+        return {
+            "id": entry.id,
+            "payment_id": entry.payment_id,
+            "backend": entry.backend,
+            "payload": payload,
+            "raw_body": raw_body,
+            "headers": entry.headers,
+            "attempts": entry.attempts,
+            "next_retry_at": entry.next_retry_at,
+            "last_error": entry.last_error,
+            "status": "pending",
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    async def get_queue_stats(self) -> RetryQueueStats:
+        """Return pending counts by backend and the oldest due retry."""
+        now = datetime.now(tz=UTC)
+        by_backend: Counter[str] = Counter()
+        due = 0
+        oldest_due_at = None
+        for entry in self._index.values():
+            by_backend[entry.backend or "unknown"] += 1
+            if entry.next_retry_at <= now:
+                due += 1
+                if oldest_due_at is None or entry.next_retry_at < oldest_due_at:
+                    oldest_due_at = entry.next_retry_at
+        return RetryQueueStats(
+            pending_by_backend=dict(by_backend),
+            due=due,
+            oldest_due_at=oldest_due_at,
+        )
+
+    def segments(self) -> list[int]:
+        """Return the numbers of the segments currently on disk."""
+        return sorted(self._live)
+
+    def next_due_at(self) -> datetime | None:
+        """Return when the earliest pending retry becomes due."""
+        return self._scheduler.next_due_at()
+
+    async def wait_for_due(
+        self,
+        timeout: float | None = None,
+        backend: str | None = None,
+    ) -> bool:
+        """Sleep until a retry (of ``backend``, if given) is due or
+        ``timeout`` seconds elapse.
+        """
+        return await self._scheduler.wait_for_due(
+            timeout, self._backend_predicate(backend)
+        )
+
+    async def compact(self) -> None:
+        """Rewrite pending retries out of sealed segments and delete
+        them.
+        """
+        sealed = [seg for seg in sorted(self._live) if seg != self._segment]
+        if not sealed:
+            return
+        for entry in [*self._index.values(), *self._committing.values()]:
+            if entry.segment in sealed:
+                payload = bytes(self._read_payload(entry))
+                self._live[entry.segment] -= 1
+                self._append_enqueue(entry, payload)
+        await self._commit()
+        for seg in sealed:
+            self._delete_segment(seg)
+
+    async def close(self) -> None:
+        """Flush pending writes and release file handles."""
+        if self._sync_waiter is not None:
+            await asyncio.shield(self._sync_waiter)
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks)
+        async with self._flush_lock:
+            self._file.flush()
+            _fsync_all([*self._retired, self._file])
+            for fh in self._retired:
+                fh.close()
+            self._retired = []
+            self._file.close()
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _backend_predicate(
+        self, backend: str | None
+    ) -> Callable[[str], bool] | None:
+        if backend is None:
+            return None
+        return lambda retry_id: self._index[retry_id].backend == backend
+
+    async def _finish(self, retry_id: str, status: str) -> None:
+        entry = self._index.pop(retry_id, None)
+        if entry is None:
+            return
+        self._scheduler.discard(retry_id)
+        self._append_update(entry, status)
+        await self._commit()
+        self._live[entry.segment] -= 1
+        self._drop_dead_segments()
+        await self._maybe_compact()
+
+    async def _maybe_compact(self) -> None:
+        sealed = [seg for seg in self._live if seg != self._segment]
+        records = sum(self._records[seg] for seg in sealed)
+        if self._compacting or not records:
+            return
+        if sum(self._live[seg] for seg in sealed) > (
+            records * self._compact_threshold
+        ):
+            return
+        self._compacting = True
+        try:
+            await self.compact()
+        except Exception:
+            # The retry was finished; compaction is tried again later.
+            logger.exception(
+                "Failed to compact retry log in %s", self._directory
+            )
+        finally:
+            self._compacting = False
+
+    # --- Log writing ---
+
+    def _append_enqueue(self, entry: _IndexEntry, payload: bytes) -> None:
+        meta = msgspec.json.encode(
+            {
+                "id": entry.id,
+                "payment_id": entry.payment_id,
+                "backend": entry.backend,
+                "headers": entry.headers,
+                "attempts": entry.attempts,
+                "next_retry_at": entry.next_retry_at.timestamp(),
+                "last_error": entry.last_error,
+                "created_at": entry.created_at.timestamp(),
+                "raw": entry.raw,
+            }
+        )
+        offset = self._append(_ENQUEUE, meta, payload)
+        entry.segment = self._segment
+        entry.payload_offset = offset + _HEADER.size + len(meta)
+        entry.payload_length = len(payload)
+        self._live[self._segment] = self._live.get(self._segment, 0) + 1
+        self._records[self._segment] += 1
+
+    def _append_update(self, entry: _IndexEntry, status: str) -> None:
+        meta = msgspec.json.encode(
+            {
+                "id": entry.id,
+                "status": status,
+                "attempts": entry.attempts,
+                "next_retry_at": entry.next_retry_at.timestamp(),
+                "last_error": entry.last_error,
+            }
+        )
+        self._append(_UPDATE, meta, b"")
+
+    def _append(self, record_type: int, meta: bytes, payload: bytes) -> int:
+        if self._file.tell() >= self._segment_size:
+            self._rotate()
+        offset = self._file.tell()
+        crc = zlib.crc32(payload, zlib.crc32(meta))
+        self._file.write(
+            _HEADER.pack(crc, record_type, len(meta), len(payload))
+        )
+        self._file.write(meta)
+        self._file.write(payload)
+        return offset
+
+    def _rotate(self) -> None:
+        self._file.flush()
+        self._retired.append(self._file)
+        self._drop_map(self._segment)
+        self._segment += 1
+        self._live.setdefault(self._segment, 0)
+        self._file = self._open_segment(self._segment)
+
+    async def _commit(self) -> None:
+        # Group commit: every write issued before the flush shares it.
+        if self._sync_waiter is None:
+            loop = asyncio.get_running_loop()
+            self._sync_waiter = loop.create_future()
+            loop.call_later(self._fsync_interval, self._start_flush)
+        await asyncio.shield(self._sync_waiter)
+
+    def _start_flush(self) -> None:
+        # Keep a reference so the task is not collected mid-flush and
+        # ``close()`` can wait for it.
+        task = asyncio.ensure_future(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task) -> None:
+        self._flush_tasks.discard(task)
+        # The writers got the error through the waiter.
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Failed to flush retry log in %s",
+                self._directory,
+                exc_info=task.exception(),
+            )
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            waiter, self._sync_waiter = self._sync_waiter, None
+            retired, self._retired = self._retired, []
+            try:
+                self._file.flush()
+                await asyncio.to_thread(_fsync_all, [*retired, self._file])
+            except BaseException as exc:
+                # Every writer sharing this flush is waiting on it.
+                if waiter is not None:
+                    waiter.set_exception(exc)
+                raise
+            finally:
+                for fh in retired:
+                    fh.close()
+            if waiter is not None:
+                waiter.set_result(None)
+
+    def _open_segment(self, segment: int) -> BinaryIO:
+        self._live.setdefault(segment, 0)
+        return self._segment_path(segment).open("ab")
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._directory / f"{segment:08d}{_SEGMENT_SUFFIX}"
+
+    def _drop_dead_segments(self) -> None:
+        # Only the oldest segments may go: a newer segment can still hold
+        # the terminal update of a retry enqueued in an older one.
+        for seg in sorted(self._live):
+            if seg == self._segment or self._live[seg] > 0:
+                break
+            self._delete_segment(seg)
+
+    def _delete_segment(self, segment: int) -> None:
+        self._drop_map(segment)
+        self._live.pop(segment, None)
+        self._records.pop(segment, None)
+        self._segment_path(segment).unlink(missing_ok=True)
+
+    # --- Log reading ---
+
+    def _decode_payload(
+        self, entry: _IndexEntry
+    ) -> tuple[dict | None, bytes | None]:
+        view = self._read_payload(entry)
+        if entry.raw:
+            return None, bytes(view)
+        return msgspec.json.decode(view), None
+
+    def _read_payload(self, entry: _IndexEntry) -> memoryview:
+        if entry.segment == self._segment:
+            self._file.flush()
+        end = entry.payload_offset + entry.payload_length
+        mapped = self._maps.get(entry.segment)
+        if mapped is None or len(mapped) < end:
+            self._drop_map(entry.segment)
+            mapped = self._map(entry.segment)
+        return memoryview(mapped)[entry.payload_offset : end]
+
+    def _map(self, segment: int) -> mmap.mmap:
+        with self._segment_path(segment).open("rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = mapped
+        return mapped
+
+    def _drop_map(self, segment: int) -> None:
+        mapped = self._maps.pop(segment, None)
+        if mapped is None:
+            return
+        # A payload view may still reference the map; the GC releases
+        # it once that view is gone.
+        with contextlib.suppress(BufferError):
+            mapped.close()
+
+    def _replay(self) -> None:
+        segments = sorted(
+            int(path.stem)
+            for path in self._directory.glob(f"*{_SEGMENT_SUFFIX}")
+        )
+        for seg in segments:
+            self._live.setdefault(seg, 0)
+            self._replay_segment(seg)
+        for entry in self._index.values():
+            self._scheduler.schedule(
+                entry.id, entry.next_retry_at, notify=False
+            )
+        self._drop_dead_segments_on_startup()
+
+    def _replay_segment(self, segment: int) -> None:
+        path = self._segment_path(segment)
+        view = memoryview(path.read_bytes())
+        size = len(view)
+        offset = 0
+        while offset + _HEADER.size <= size:
+            crc, record_type, meta_len, payload_len = _HEADER.unpack_from(
+                view, offset
+            )
+            meta_start = offset + _HEADER.size
+            payload_start = meta_start + meta_len
+            end = payload_start + payload_len
+            if end > size:
+                break
+            meta = view[meta_start:payload_start]
+            if zlib.crc32(view[payload_start:end], zlib.crc32(meta)) != crc:
+                break
+            self._apply(
+                record_type,
+                msgspec.json.decode(meta),
+                segment,
+                payload_start,
+                payload_len,
+            )
+            offset = end
+        if offset < size:
+            logger.warning(
+                "Truncating torn write in %s at offset %d", path, offset
+            )
+            with path.open("r+b") as fh:
+                fh.truncate(offset)
+
+    def _apply(
+        self,
+        record_type: int,
+        meta: dict,
+        segment: int,
+        payload_offset: int,
+        payload_length: int,
+    ) -> None:
+        retry_id = meta["id"]
+        previous = self._index.get(retry_id)
+        if record_type == _ENQUEUE:
+            if previous is not None:
+                self._live[previous.segment] -= 1
+            self._index[retry_id] = _IndexEntry(
+                id=retry_id,
+                payment_id=meta["payment_id"],
+                backend=meta.get("backend"),
+                headers=meta["headers"],
+                attempts=meta["attempts"],
+                next_retry_at=_from_ts(meta["next_retry_at"]),
+                last_error=meta["last_error"],
+                created_at=_from_ts(meta["created_at"]),
+                segment=segment,
+                payload_offset=payload_offset,
+                payload_length=payload_length,
+                raw=meta.get("raw", False),
+            )
+            self._live[segment] += 1
+            self._records[segment] += 1
+            return
+        if previous is None:
+            return
+        if meta["status"] == "pending":
+            previous.attempts = meta["attempts"]
+            previous.last_error = meta["last_error"]
+            previous.next_retry_at = _from_ts(meta["next_retry_at"])
+            return
+        del self._index[retry_id]
+        self._live[previous.segment] -= 1
+
+    def _drop_dead_segments_on_startup(self) -> None:
+        segments = sorted(self._live)
+        for seg in segments[:-1]:
+            if self._live[seg] > 0:
+                break
+            self._delete_segment(seg)
+
+
+def _from_ts(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=UTC)
+
+
+def _lock_directory(directory: Path) -> BinaryIO | None:
+    """Take an exclusive lock on ``directory`` for this store's lifetime.
+
+    Two stores on one log would replay the same retries and interleave
+    writes, so a second one, e.g. a CLI drain next to the app, fails.
+    """
+    if fcntl is None:  # pragma: no cover - Windows
+        return None
+    fh = (directory / "LOCK").open("ab")
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        raise ConfigurationError(
+            f"{directory} is in use by another WALRetryStore"
+        ) from None
+    return fh
+
+
+def _fsync_all(files: list[BinaryIO]) -> None:
+    for fh in files:
+        os.fsync(fh.fileno())
@@ -0,0 +1,174 @@
+"""Payment status events for streaming clients.
+
+``PublishingPaymentRepository`` publishes an event whenever a payment is
+created or saved; ``PaymentEventBroadcaster`` implementations deliver
+them to the server-sent event streams of ``PaymentController``.
+"""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator, AsyncIterator
+
+from getpaid_core.enums import PaymentStatus
+from getpaid_core.protocols import Payment, PaymentRepository
+
+from litestar_getpaid.protocols import (
+    PaymentEventBroadcaster,
+    PaymentStatusEvent,
+)
+
+# Statuses after which a payment is not expected to change while a
+# frontend waits for it.
+FINAL_STATUSES = frozenset(
+    {
+        PaymentStatus.PAID,
+        PaymentStatus.FAILED,
+        PaymentStatus.CANCELLED,
+        PaymentStatus.REFUNDED,
+    }
+)
+
+
+def payment_status_event(payment: Payment) -> PaymentStatusEvent:
+    """Build the status event describing ``payment``."""
+    order_id = getattr(payment, "order_id", None)
+    if order_id is None:
+        order = getattr(payment, "order", None)
+        order_id = getattr(order, "id", "") if order is not None else ""
+    return PaymentStatusEvent(
+        payment_id=str(payment.id),
+        order_id=str(order_id),
+        status=str(payment.status),
+    )
+
+
+class _Subscription:
+    """Async iterator over one subscriber queue.
+
+    A plain iterator rather than an async generator, so a consumer may
+    cancel a pending ``__anext__()`` (e.g. on a keepalive timeout)
+    without ending the subscription.
+    """
+
+    def __init__(self, queue: asyncio.Queue[PaymentStatusEvent]) -> None:
+        self._queue = queue
+
+    def __aiter__(self) -> "_Subscription":
+        return self
+
+    async def __anext__(self) -> PaymentStatusEvent:
+        return await self._queue.get()
+
+
+class InProcessBroadcaster:
+    """Payment event broadcaster within one process.
+
+    Implements the PaymentEventBroadcaster protocol.
+
+    Each subscriber gets a queue of at most ``max_queue`` events; when a
+    slow subscriber's queue is full the oldest event is dropped, since
+    only the latest status matters. Multi-node deployments need a
+    broadcaster backed by a shared message bus instead.
+    """
+
+    def __init__(self, *, max_queue: int = 16) -> None:
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        self._max_queue = max_queue
+        self._subscribers: dict[
+            tuple[str, str], set[asyncio.Queue[PaymentStatusEvent]]
+        ] = {}
+
+    async def publish(self, event: PaymentStatusEvent) -> None:
+        """Deliver ``event`` to subscribers of its payment and order."""
+        for topic in (("payment", event.payment_id), ("order", event.order_id)):
+            for queue in self._subscribers.get(topic, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(
+        self,
+        *,
+        payment_id: str | None = None,
+        order_id: str | None = None,
+    ) -> AsyncGenerator[AsyncIterator[PaymentStatusEvent]]:
+        """Receive events for one payment or for all payments of an
+        order while the context is open."""
+        topic: tuple[str, str]
+        if payment_id is not None and order_id is None:
+            topic = ("payment", payment_id)
+        elif order_id is not None and payment_id is None:
+            topic = ("order", order_id)
+        else:
+            raise ValueError("Pass exactly one of payment_id or order_id")
+        queue: asyncio.Queue[PaymentStatusEvent] = asyncio.Queue(
+            self._max_queue
+        )
+        self._subscribers.setdefault(topic, set()).add(queue)
+        try:
+            yield _Subscription(queue)
+        finally:
+            queues = self._subscribers[topic]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[topic]
+
+    def subscriber_count(self) -> int:
+        """Return the number of open subscriptions."""
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+class PublishingPaymentRepository:
+    """Payment repository wrapper publishing status events.
+
+    Implements the PaymentRepository protocol by delegating to
+    ``repository`` and publishes a ``PaymentStatusEvent`` after every
+    ``create()``, ``save()`` and ``update_status()``. Other attributes,
+    such as optional repository capabilities, are passed through.
+
+    Pass the wrapper wherever payments change, including the retry
+    worker and ``CallbackInbox``, so every update reaches the streams.
+    """
+
+    def __init__(
+        self,
+        repository: PaymentRepository,
+        broadcaster: PaymentEventBroadcaster,
+    ) -> None:
+        self._repository = repository
+        self._broadcaster = broadcaster
+
+    async def get_by_id(self, payment_id: str) -> Payment:
+        return await self._repository.get_by_id(payment_id)
+
+    async def create(self, **kwargs) -> Payment:
+        payment = await self._repository.create(**kwargs)
+        await self._broadcaster.publish(payment_status_event(payment))
+        return payment
+
+    async def save(self, payment: Payment) -> Payment:
+        saved = await self._repository.save(payment)
+        await self._broadcaster.publish(payment_status_event(saved))
+        return saved
+
+    async def update_status(
+        self,
+        payment_id: str,
+        status: str,
+        **fields,
+    ) -> Payment:
+        payment = await self._repository.update_status(
+            payment_id, status, **fields
+        )
+        await self._broadcaster.publish(payment_status_event(payment))
+        return payment
+
+    async def list_by_order(self, order_id: str) -> list[Payment]:
+        return await self._repository.list_by_order(order_id)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._repository, name)
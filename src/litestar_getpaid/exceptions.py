@@ -1,5 +1,7 @@
 """Exception handling for litestar-getpaid."""
 
+from typing import TYPE_CHECKING
+
 from getpaid_core.exceptions import (
     CommunicationError,
     CredentialsError,
@@ -7,7 +9,12 @@ from getpaid_core.exceptions import (
     InvalidCallbackError,
     InvalidTransitionError,
 )
-from litestar import Request, Response
+
+# Worker-side modules raise these exceptions too; only the handlers need
+# Litestar, so it is imported when a response is built.
+if TYPE_CHECKING:
+    from litestar import Request, Response
+    from litestar.types import ExceptionHandlersMap
 
 
 class PaymentNotFoundError(Exception):
@@ -25,6 +32,34 @@ class ConfigurationError(Exception):
         super().__init__(message)
 
 
+class IdempotencyKeyMismatchError(Exception):
+    """An Idempotency-Key was reused with a different request body."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        super().__init__(
+            f"Idempotency-Key {key!r} was used with a different request"
+        )
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """A request with the same Idempotency-Key is still being processed."""
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        super().__init__(
+            f"A request with Idempotency-Key {key!r} is still in progress"
+        )
+
+
+class InvalidFieldsError(Exception):
+    """A sparse fieldset names fields the response does not have."""
+
+    def __init__(self, fields: list[str]) -> None:
+        self.fields = fields
+        super().__init__(f"Unknown fields: {', '.join(fields)}")
+
+
 def _public_detail(exc: Exception) -> str:
     if isinstance(exc, CommunicationError):
         return "Payment gateway communication failed"
@@ -38,8 +73,10 @@ def _public_detail(exc: Exception) -> str:
 
 
 def _error_response(
-    request: Request, detail: str, code: str, status_code: int
-) -> Response:
+    request: "Request", detail: str, code: str, status_code: int
+) -> "Response":
+    from litestar import Response
+
     return Response(
         content={"detail": detail, "code": code},
         status_code=status_code,
@@ -47,8 +84,8 @@ def _error_response(
 
 
 def handle_communication_error(
-    request: Request, exc: CommunicationError
-) -> Response:
+    request: "Request", exc: CommunicationError
+) -> "Response":
     """Map CommunicationError to 502."""
     return _error_response(
         request,
@@ -59,8 +96,8 @@ def handle_communication_error(
 
 
 def handle_invalid_callback(
-    request: Request, exc: InvalidCallbackError
-) -> Response:
+    request: "Request", exc: InvalidCallbackError
+) -> "Response":
     """Map InvalidCallbackError to 400."""
     return _error_response(
         request,
@@ -71,8 +108,8 @@ def handle_invalid_callback(
 
 
 def handle_invalid_transition(
-    request: Request, exc: InvalidTransitionError
-) -> Response:
+    request: "Request", exc: InvalidTransitionError
+) -> "Response":
     """Map InvalidTransitionError to 409."""
     return _error_response(
         request,
@@ -83,8 +120,8 @@ def handle_invalid_transition(
 
 
 def handle_credentials_error(
-    request: Request, exc: CredentialsError
-) -> Response:
+    request: "Request", exc: CredentialsError
+) -> "Response":
     """Map CredentialsError to 500."""
     return _error_response(
         request,
@@ -95,32 +132,58 @@ def handle_credentials_error(
 
 
 def handle_payment_not_found(
-    request: Request, exc: PaymentNotFoundError
-) -> Response:
+    request: "Request", exc: PaymentNotFoundError
+) -> "Response":
     """Map PaymentNotFoundError to 404."""
     return _error_response(request, str(exc), "not_found", 404)
 
 
 def handle_getpaid_exception(
-    request: Request, exc: GetPaidException
-) -> Response:
+    request: "Request", exc: GetPaidException
+) -> "Response":
     """Map generic GetPaidException to 400."""
     return _error_response(request, str(exc), "payment_error", 400)
 
 
 def handle_configuration_error(
-    request: Request, exc: ConfigurationError
-) -> Response:
+    request: "Request", exc: ConfigurationError
+) -> "Response":
     """Map ConfigurationError to 500."""
     return _error_response(request, str(exc), "configuration_error", 500)
 
 
-EXCEPTION_HANDLERS = {
+def handle_idempotency_key_mismatch(
+    request: "Request", exc: IdempotencyKeyMismatchError
+) -> "Response":
+    """Map IdempotencyKeyMismatchError to 422."""
+    return _error_response(request, str(exc), "idempotency_key_mismatch", 422)
+
+
+def handle_idempotency_key_in_progress(
+    request: "Request", exc: IdempotencyKeyInProgressError
+) -> "Response":
+    """Map IdempotencyKeyInProgressError to 409."""
+    return _error_response(
+        request, str(exc), "idempotency_key_in_progress", 409
+    )
+
+
+def handle_invalid_fields(
+    request: "Request", exc: InvalidFieldsError
+) -> "Response":
+    """Map InvalidFieldsError to 400."""
+    return _error_response(request, str(exc), "invalid_fields", 400)
+
+
+EXCEPTION_HANDLERS: "ExceptionHandlersMap" = {
     CommunicationError: handle_communication_error,
     InvalidCallbackError: handle_invalid_callback,
     InvalidTransitionError: handle_invalid_transition,
     CredentialsError: handle_credentials_error,
     PaymentNotFoundError: handle_payment_not_found,
     ConfigurationError: handle_configuration_error,
+    IdempotencyKeyMismatchError: handle_idempotency_key_mismatch,
+    IdempotencyKeyInProgressError: handle_idempotency_key_in_progress,
+    InvalidFieldsError: handle_invalid_fields,
     GetPaidException: handle_getpaid_exception,
 }
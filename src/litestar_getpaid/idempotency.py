@@ -0,0 +1,132 @@
+"""Idempotency-Key handling for non-idempotent endpoints."""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from litestar_getpaid.exceptions import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+)
+from litestar_getpaid.protocols import IdempotencyStore
+
+logger = logging.getLogger(__name__)
+
+# Poll interval bounds while waiting on a request running on another
+# node.
+_MIN_POLL_INTERVAL = 0.05
+_MAX_POLL_INTERVAL = 0.5
+
+
+def request_fingerprint(body: bytes) -> str:
+    """Return a fingerprint of a request body."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyGuard:
+    """Runs a request at most once per Idempotency-Key.
+
+    The first request for a key reserves it, runs and caches its
+    response in ``store``; repeats get the cached response. A repeat
+    arriving while the first request is in flight waits up to
+    ``wait_timeout`` seconds for it. Waiters in the same process are
+    woken as soon as it finishes; requests running on other nodes are
+    detected by polling the store.
+
+    While the first request runs, its reservation is renewed every
+    ``refresh_interval`` seconds on stores implementing
+    ``refresh(key)``, so a request outliving the store's in-flight TTL
+    keeps its key. Keep the interval well below that TTL.
+    """
+
+    def __init__(
+        self,
+        store: IdempotencyStore,
+        *,
+        wait_timeout: float = 30.0,
+        refresh_interval: float = 20.0,
+    ) -> None:
+        self.store = store
+        self._wait_timeout = wait_timeout
+        self._refresh_interval = refresh_interval
+        self._in_flight: dict[str, asyncio.Event] = {}
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        func: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """Return the response for ``key``, calling ``func`` only if no
+        request with this key ran before.
+
+        Raises ``IdempotencyKeyMismatchError`` if the key was used for a
+        different request and ``IdempotencyKeyInProgressError`` if the
+        first request does not finish within the wait timeout.
+        """
+        deadline = time.monotonic() + self._wait_timeout
+        delay = _MIN_POLL_INTERVAL
+        while True:
+            if await self.store.reserve(key, fingerprint):
+                return await self._run_reserved(key, func)
+            record = await self.store.get(key)
+            if record is not None:
+                if record.fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatchError(key)
+                if record.response is not None:
+                    return record.response
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise IdempotencyKeyInProgressError(key)
+            finished = self._in_flight.get(key)
+            if finished is None:
+                await asyncio.sleep(min(delay, remaining))
+            else:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(finished.wait(), remaining)
+            delay = min(delay * 2, _MAX_POLL_INTERVAL)
+
+    async def _run_reserved(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        finished = self._in_flight[key] = asyncio.Event()
+        refresh = getattr(self.store, "refresh", None)
+        keepalive = None
+        if refresh is not None:
+            keepalive = asyncio.create_task(self._keep_alive(refresh, key))
+        try:
+            try:
+                response = await func()
+            except BaseException:
+                await self.store.release(key)
+                raise
+            finally:
+                if keepalive is not None:
+                    keepalive.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await keepalive
+            await self.store.complete(key, response)
+            return response
+        finally:
+            finished.set()
+            if self._in_flight.get(key) is finished:
+                del self._in_flight[key]
+
+    async def _keep_alive(
+        self,
+        refresh: Callable[[str], Awaitable[None]],
+        key: str,
+    ) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            try:
+                await refresh(key)
+            except Exception:
+                logger.exception(
+                    "Could not refresh Idempotency-Key reservation %r", key
+                )
@@ -0,0 +1,322 @@
+"""Transactional inbox for gateway callbacks.
+
+In inbox mode the callback route verifies a callback, persists it and
+acknowledges it at once. ``CallbackInbox`` consumers then run
+``PaymentFlow.handle_callback()`` in the background.
+"""
+
+import asyncio
+import contextlib
+import logging
+import zlib
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from getpaid_core.exceptions import CommunicationError, InvalidCallbackError
+from getpaid_core.flow import PaymentFlow
+from getpaid_core.protocols import Payment, PaymentRepository
+
+from litestar_getpaid.clients import BackendHTTPClients, backend_settings
+from litestar_getpaid.locks import payment_lock_scope
+from litestar_getpaid.payloads import (
+    filter_headers,
+    get_header,
+    parse_body,
+)
+from litestar_getpaid.protocols import (
+    CallbackRetryStore,
+    PaymentLock,
+    Tracer,
+    TraceSpan,
+)
+from litestar_getpaid.retry import compute_next_retry_at
+from litestar_getpaid.tracing import NOOP_TRACER
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackInbox:
+    """Persisted queue of accepted callbacks with background consumers.
+
+    Entries are kept in ``store``, any ``CallbackRetryStore``. Build the
+    store with ``backoff_seconds=0`` so new entries are dispatched at
+    once; the inbox reschedules failed entries itself with its own
+    exponential ``backoff_seconds`` through the store's
+    ``mark_deferred()``.
+
+    A dispatcher claims batches of up to ``batch_size`` entries and
+    shards them by payment ID over ``consumers`` tasks, so callbacks for
+    one payment are handled in arrival order while different payments
+    are handled in parallel. Each batch finishes before the next one is
+    claimed, which keeps that ordering with stores that do not lease
+    claimed entries. Run a single dispatcher per store unless the store
+    leases entries (the in-memory and WAL stores do).
+
+    A callback failing with ``CommunicationError`` is moved to
+    ``retry_store`` when one is given; other failures are retried from
+    the inbox up to ``config.retry_max_attempts`` times. While a failed
+    entry waits for its next attempt, later entries for the same payment
+    are held back behind it until it succeeds or is exhausted. Holds are
+    kept in memory, so a restart releases them. Invalid callbacks are
+    marked exhausted. Pass the router's ``payment_lock``
+    to serialize consumers with retry replay on the same payment, its
+    ``http_clients`` to share the backends' connection pools, and its
+    ``tracer`` to trace the handling of each entry.
+    """
+
+    def __init__(
+        self,
+        store: CallbackRetryStore,
+        *,
+        repository: PaymentRepository,
+        config: "GetpaidConfig",
+        registry=None,
+        retry_store: CallbackRetryStore | None = None,
+        payment_lock: PaymentLock | None = None,
+        http_clients: BackendHTTPClients | None = None,
+        tracer: Tracer = NOOP_TRACER,
+        consumers: int = 8,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        backoff_seconds: int = 30,
+    ) -> None:
+        if consumers < 1:
+            raise ValueError("consumers must be at least 1")
+        self.store = store
+        self._repository = repository
+        self._config = config
+        self._registry = registry
+        self._retry_store = retry_store
+        self._payment_lock = payment_lock
+        self._http_clients = http_clients
+        self._tracer = tracer
+        self._consumers = consumers
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._backoff_seconds = backoff_seconds
+        # Payment ID -> (failed head entry ID, its next attempt).
+        self._held: dict[str, tuple[str, datetime]] = {}
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task | None = None
+
+    async def submit(
+        self,
+        payment: Payment,
+        headers: dict,
+        raw_body: bytes,
+    ) -> str:
+        """Persist an accepted callback and wake the dispatcher."""
+        backend_config = self._config.backends.get(payment.backend, {})
+        entry_id = await self.store.store_failed_callback(
+            payment_id=payment.id,
+            payload=None,
+            headers=filter_headers(
+                headers,
+                backend_config.get("callback_headers"),
+            ),
+            backend=payment.backend,
+            raw_body=raw_body,
+        )
+        self._wakeup.set()
+        return entry_id
+
+    async def process_pending(self) -> int:
+        """Claim and process one batch of inbox entries.
+
+        Returns the number of entries processed.
+        """
+        entries = await self.store.get_due_retries(limit=self._batch_size)
+        if not entries:
+            return 0
+        shards: list[list[dict]] = [[] for _ in range(self._consumers)]
+        for entry in entries:
+            shard = zlib.crc32(entry["payment_id"].encode()) % self._consumers
+            shards[shard].append(entry)
+        await asyncio.gather(
+            *(self._consume(shard) for shard in shards if shard)
+        )
+        return len(entries)
+
+    async def start(self) -> None:
+        """Start the background dispatcher."""
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self) -> None:
+        """Stop the dispatcher.
+
+        Entries of an interrupted batch stay in the store and are
+        processed again after the next start.
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._dispatcher
+            self._dispatcher = None
+
+    async def __aenter__(self) -> "CallbackInbox":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.process_pending()
+            except Exception:
+                logger.exception("Callback inbox batch failed")
+                processed = 0
+            if processed:
+                continue
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._wakeup.wait(),
+                    self._poll_interval,
+                )
+
+    async def _consume(self, entries: list[dict]) -> None:
+        for entry in entries:
+            held = self._held.get(entry["payment_id"])
+            if held is not None and held[0] != entry["id"]:
+                await self._hold(entry, held)
+                continue
+            try:
+                with self._tracer.span(
+                    "getpaid.inbox.handle",
+                    entry_id=entry["id"],
+                    payment_id=entry["payment_id"],
+                    attempt=entry["attempts"],
+                ) as span:
+                    async with payment_lock_scope(
+                        self._payment_lock, entry["payment_id"]
+                    ):
+                        await self._handle(entry, span)
+            except Exception:
+                logger.exception(
+                    "Inbox entry %s: could not record outcome", entry["id"]
+                )
+
+    async def _handle(self, entry: dict, span: TraceSpan) -> None:
+        entry_id = entry["id"]
+        payment_id = entry["payment_id"]
+        headers = entry["headers"]
+        raw_body = entry.get("raw_body") or b""
+
+        tracer = self._tracer
+        try:
+            with tracer.span("getpaid.repository.get", payment_id=payment_id):
+                payment = await self._repository.get_by_id(payment_id)
+        except KeyError:
+            logger.error(
+                "Inbox entry %s: payment %s not found", entry_id, payment_id
+            )
+            span.set_attribute("outcome", "not_found")
+            await self._settle(entry, exhausted=True)
+            return
+        span.set_attribute("backend", payment.backend)
+
+        flow = PaymentFlow(
+            repository=self._repository,
+            config=backend_settings(self._config, self._http_clients),
+            registry=self._registry,
+        )
+        try:
+            data = entry["payload"]
+            if data is None:
+                data = parse_body(raw_body, get_header(headers, "content-type"))
+            with tracer.span(
+                "getpaid.flow.handle_callback", backend=payment.backend
+            ):
+                await flow.handle_callback(
+                    payment=payment,
+                    data=data,
+                    headers=headers,
+                    raw_body=raw_body,
+                )
+        except InvalidCallbackError as exc:
+            logger.warning(
+                "Inbox entry %s: invalid callback: %s", entry_id, exc
+            )
+            span.set_attribute("outcome", "invalid")
+            await self._settle(entry, exhausted=True)
+        except CommunicationError as exc:
+            if self._retry_store is None:
+                span.set_attribute("outcome", "failed")
+                await self._fail(entry, exc)
+                return
+            span.set_attribute("outcome", "queued")
+            with tracer.span("getpaid.retry_store.store"):
+                await self._retry_store.store_failed_callback(
+                    payment_id=payment_id,
+                    payload=None,
+                    headers=headers,
+                    backend=payment.backend,
+                    raw_body=raw_body,
+                )
+            await self._settle(entry)
+            logger.warning(
+                "Inbox entry %s: callback for payment %s failed, queued "
+                "for retry: %s",
+                entry_id,
+                payment_id,
+                exc,
+            )
+        except Exception as exc:
+            span.set_attribute("outcome", "failed")
+            await self._fail(entry, exc)
+        else:
+            span.set_attribute("outcome", "succeeded")
+            span.set_attribute("status", getattr(payment, "status", None))
+            await self._settle(entry)
+
+    async def _settle(self, entry: dict, *, exhausted: bool = False) -> None:
+        """Remove an entry from the queue and release its payment."""
+        if exhausted:
+            await self.store.mark_exhausted(entry["id"])
+        else:
+            await self.store.mark_succeeded(entry["id"])
+        self._held.pop(entry["payment_id"], None)
+
+    async def _fail(self, entry: dict, exc: Exception) -> None:
+        if entry["attempts"] >= self._config.retry_max_attempts:
+            await self._settle(entry, exhausted=True)
+            logger.warning(
+                "Inbox entry %s: exhausted after %d attempts: %s",
+                entry["id"],
+                entry["attempts"],
+                exc,
+            )
+            return
+        next_attempt_at = compute_next_retry_at(
+            attempt=entry["attempts"] + 1,
+            backoff_seconds=self._backoff_seconds,
+        )
+        await self.store.mark_failed(entry["id"], error=str(exc))
+        await self._defer(entry["id"], next_attempt_at)
+        self._held[entry["payment_id"]] = (entry["id"], next_attempt_at)
+        logger.info("Inbox entry %s: failed: %s", entry["id"], exc)
+
+    async def _hold(self, entry: dict, held: tuple[str, datetime]) -> None:
+        """Postpone an entry queued behind a failed one for its payment."""
+        head_id, next_attempt_at = held
+        await self._defer(entry["id"], next_attempt_at)
+        logger.debug(
+            "Inbox entry %s: held behind failed entry %s",
+            entry["id"],
+            head_id,
+        )
+
+    async def _defer(self, entry_id: str, until: datetime) -> None:
+        """Reschedule an entry without counting an attempt.
+
+        Stores without ``mark_deferred()`` keep their own schedule.
+        """
+        mark_deferred = getattr(self.store, "mark_deferred", None)
+        if mark_deferred is not None:
+            await mark_deferred(entry_id, until=until)
@@ -0,0 +1,47 @@
+"""Per-payment locks serializing concurrent callback processing."""
+
+import asyncio
+import contextlib
+import zlib
+from collections.abc import AsyncGenerator
+from contextlib import AbstractAsyncContextManager
+
+from litestar_getpaid.protocols import PaymentLock
+
+
+class StripedPaymentLock:
+    """Process-local per-payment lock with bounded memory.
+
+    Implements the PaymentLock protocol.
+
+    Payment IDs are hashed onto a fixed table of ``stripes`` asyncio
+    locks. Work for one payment runs one at a time in arrival order;
+    different payments run in parallel unless they share a stripe, which
+    only costs some waiting, never correctness.
+    """
+
+    def __init__(self, stripes: int = 1024) -> None:
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def _stripe(self, payment_id: str) -> asyncio.Lock:
+        return self._locks[zlib.crc32(payment_id.encode()) % len(self._locks)]
+
+    @contextlib.asynccontextmanager
+    async def lock(self, payment_id: str) -> AsyncGenerator[None]:
+        """Hold the lock for ``payment_id``."""
+        async with self._stripe(payment_id):
+            yield
+
+
+def payment_lock_scope(
+    payment_lock: PaymentLock | None,
+    payment_id: str,
+) -> AbstractAsyncContextManager[None]:
+    """Return ``payment_lock.lock(payment_id)``, or a no-op without a
+    lock.
+    """
+    if payment_lock is None:
+        return contextlib.nullcontext()
+    return payment_lock.lock(payment_id)
@@ -0,0 +1,189 @@
+"""Cheap rejection of unknown payment IDs.
+
+``PaymentLookupGuard`` sits in front of the repository on routes that
+take a payment ID from the URL. IDs recently found missing are kept in
+a short-lived negative cache. An optional Bloom filter of all known IDs
+rejects random IDs without any query, in deployments where it can be
+trusted to know every payment.
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterable, Callable
+
+from getpaid_core.protocols import Payment, PaymentRepository
+
+from litestar_getpaid.exceptions import PaymentNotFoundError
+from litestar_getpaid.protocols import PaymentExistenceSource
+
+
+class BloomFilter:
+    """Bloom filter of strings.
+
+    Sized for ``capacity`` items at a false positive rate of
+    ``error_rate``. ``item in bloom`` is never False for an added item.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self._size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8])
+        second = int.from_bytes(digest[8:]) | 1
+        for i in range(self._hashes):
+            yield (first + i * second) % self._size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+async def build_id_filter(
+    payment_ids: AsyncIterable[str],
+    *,
+    capacity: int,
+    error_rate: float = 0.01,
+) -> BloomFilter:
+    """Build a Bloom filter from payment IDs, e.g.
+    ``SQLAlchemyPaymentRepository.iter_payment_ids()``."""
+    id_filter = BloomFilter(capacity, error_rate)
+    async for payment_id in payment_ids:
+        id_filter.add(payment_id)
+    return id_filter
+
+
+class PaymentLookupGuard:
+    """Negative cache and optional Bloom filter for payment lookups.
+
+    An ID not found by the repository is answered with 404 without a
+    query for ``negative_ttl`` seconds; at most ``max_entries`` missing
+    IDs are kept, evicting the least recently used.
+
+    An ``id_filter`` answers "maybe missing" for payments created by
+    other processes or after it was built, so by default a filter miss
+    is confirmed with the repository and payments found that way are
+    added to it. With ``trust_id_filter=True`` IDs absent from the
+    filter are rejected outright; set it only when every payment is
+    created through this process or added with ``record_created()``.
+    The callback route never rejects on the filter alone.
+    """
+
+    def __init__(
+        self,
+        *,
+        negative_ttl: float = 30.0,
+        max_entries: int = 10_000,
+        id_filter: BloomFilter | None = None,
+        trust_id_filter: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._negative_ttl = negative_ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._missing: OrderedDict[str, float] = OrderedDict()
+        self.id_filter = id_filter
+        self.trust_id_filter = trust_id_filter
+
+    def is_known_missing(
+        self, payment_id: str, *, use_filter: bool = True
+    ) -> bool:
+        """Return True if ``payment_id`` can be rejected without a
+        query; ``use_filter=False`` consults only the negative cache,
+        even with a trusted filter."""
+        if (
+            use_filter
+            and self.trust_id_filter
+            and self.id_filter is not None
+            and payment_id not in self.id_filter
+        ):
+            return True
+        expires_at = self._missing.get(payment_id)
+        if expires_at is None:
+            return False
+        if expires_at <= self._clock():
+            del self._missing[payment_id]
+            return False
+        self._missing.move_to_end(payment_id)
+        return True
+
+    def remember_missing(self, payment_id: str) -> None:
+        """Record that the repository does not know ``payment_id``."""
+        self._missing[payment_id] = self._clock() + self._negative_ttl
+        self._missing.move_to_end(payment_id)
+        while len(self._missing) > self._max_entries:
+            self._missing.popitem(last=False)
+
+    def record_created(self, payment_id: str) -> None:
+        """Make a payment, newly created or found by the repository,
+        visible to the guard."""
+        self._missing.pop(payment_id, None)
+        if self.id_filter is not None:
+            self.id_filter.add(payment_id)
+
+    async def exists(
+        self, repository: PaymentRepository, payment_id: str
+    ) -> bool:
+        """Check whether a payment exists, loading only its ID from
+        repositories implementing ``PaymentExistenceSource``."""
+        if self.is_known_missing(payment_id):
+            return False
+        if isinstance(repository, PaymentExistenceSource):
+            found = await repository.exists(payment_id)
+        else:
+            try:
+                await repository.get_by_id(payment_id)
+            except KeyError:
+                found = False
+            else:
+                found = True
+        if found:
+            self.record_created(payment_id)
+        else:
+            self.remember_missing(payment_id)
+        return found
+
+
+async def load_payment(
+    repository: PaymentRepository,
+    payment_id: str,
+    guard: PaymentLookupGuard | None = None,
+    *,
+    use_filter: bool = True,
+) -> Payment:
+    """Load a payment or raise ``PaymentNotFoundError``.
+
+    With a guard, known-missing IDs are rejected without a query and
+    missing IDs are remembered; payments found are added to its Bloom
+    filter. With ``use_filter=False`` a trusted filter does not reject
+    IDs either.
+    """
+    if guard is not None and guard.is_known_missing(
+        payment_id, use_filter=use_filter
+    ):
+        raise PaymentNotFoundError(payment_id)
+    try:
+        payment = await repository.get_by_id(payment_id)
+    except KeyError as exc:
+        if guard is not None:
+            guard.remember_missing(payment_id)
+        raise PaymentNotFoundError(payment_id) from exc
+    if guard is not None:
+        guard.record_created(payment_id)
+    return payment
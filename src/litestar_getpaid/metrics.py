@@ -0,0 +1,155 @@
+"""Pull-based metrics for the callback retry subsystem."""
+
+import asyncio
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Protocol, runtime_checkable
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+DEFAULT_BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+
+
+@dataclass(slots=True)
+class RetryQueueStats:
+    """Aggregate state of a retry queue at one point in time."""
+
+    pending_by_backend: dict[str, int] = field(default_factory=dict)
+    due: int = 0
+    oldest_due_at: datetime | None = None
+
+    @property
+    def pending(self) -> int:
+        return sum(self.pending_by_backend.values())
+
+
+@runtime_checkable
+class RetryQueueStatsSource(Protocol):
+    """A retry store able to report aggregate queue statistics."""
+
+    async def get_queue_stats(self) -> RetryQueueStats: ...
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus-style cumulative output."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets: dict[str, int] = {}
+        for bound, count in zip(self.buckets, self._counts, strict=False):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+
+class RetryMetrics:
+    """Counters and histograms for retry processing.
+
+    ``process_due_retries()`` records into an instance passed as
+    ``metrics``. Scrapers call ``collect()``, which also reads queue
+    depth and lag from the retry store. Store statistics are cached for
+    ``cache_ttl`` seconds so frequent scrapes do not load the database.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_ttl: float = 5.0,
+        latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        batch_buckets: Sequence[float] = DEFAULT_BATCH_BUCKETS,
+    ) -> None:
+        self._cache_ttl = cache_ttl
+        self._attempts: Counter[tuple[str, str]] = Counter()
+        self._latency = Histogram(latency_buckets)
+        self._batch_sizes = Histogram(batch_buckets)
+        self._stats: RetryQueueStats | None = None
+        self._stats_at = 0.0
+        self._stats_lock = asyncio.Lock()
+
+    def record_attempt(
+        self,
+        *,
+        backend: str | None,
+        outcome: str,
+        duration: float,
+    ) -> None:
+        """Record one processed retry and how long it took."""
+        self._attempts[(backend or "unknown", outcome)] += 1
+        self._latency.observe(duration)
+
+    def record_deferred(self, *, backend: str | None) -> None:
+        """Record a retry deferred by rate limiting."""
+        self._attempts[(backend or "unknown", "deferred")] += 1
+
+    def record_batch(self, size: int) -> None:
+        """Record the number of retries fetched in one batch."""
+        self._batch_sizes.observe(size)
+
+    async def queue_stats(self, retry_store: object) -> RetryQueueStats | None:
+        """Return cached queue statistics for ``retry_store``.
+
+        Returns None when the store cannot report statistics.
+        """
+        if not isinstance(retry_store, RetryQueueStatsSource):
+            return None
+        async with self._stats_lock:
+            now = time.monotonic()
+            if self._stats is None or now - self._stats_at >= self._cache_ttl:
+                self._stats = await retry_store.get_queue_stats()
+                self._stats_at = now
+            return self._stats
+
+    async def collect(self, retry_store: object | None = None) -> dict:
+        """Return a JSON-serializable snapshot of all retry metrics."""
+        attempts: dict[str, dict[str, int]] = {}
+        for (backend, outcome), count in sorted(self._attempts.items()):
+            attempts.setdefault(backend, {})[outcome] = count
+        snapshot: dict = {
+            "attempts": attempts,
+            "latency_seconds": self._latency.snapshot(),
+            "batch_size": self._batch_sizes.snapshot(),
+        }
+        stats = await self.queue_stats(retry_store)
+        if stats is not None:
+            oldest_age = None
+            if stats.oldest_due_at is not None:
+                oldest_age = max(
+                    0.0,
+                    (
+                        datetime.now(tz=UTC) - stats.oldest_due_at
+                    ).total_seconds(),
+                )
+            snapshot["queue"] = {
+                "pending": stats.pending,
+                "pending_by_backend": dict(stats.pending_by_backend),
+                "due": stats.due,
+                "oldest_due_age_seconds": oldest_age,
+            }
+        return snapshot
@@ -0,0 +1,115 @@
+"""Helpers for storing and re-reading raw gateway callbacks."""
+
+import functools
+import hashlib
+import zlib
+from collections.abc import Collection, Mapping
+from typing import Any
+from urllib.parse import parse_qsl
+
+import msgspec
+
+# One-byte tag prefixed to every stored body so the codec can change
+# without breaking rows written earlier.
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_ZSTD = b"\x02"
+
+# Bodies smaller than this are stored as-is: compression would not pay
+# for its framing overhead.
+MIN_COMPRESS_SIZE = 64
+
+# Headers always kept with a queued callback, whatever the allow-list.
+ALWAYS_KEPT_HEADERS = frozenset({"content-type"})
+
+
+@functools.cache
+def _import_zstandard() -> Any:
+    # Optional (the ``zstd`` extra); imported once, on first use.
+    try:
+        import zstandard  # ty: ignore[unresolved-import]
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return zstandard
+
+
+def compress_body(raw_body: bytes) -> bytes:
+    """Compress a raw callback body for storage.
+
+    Uses zstd when the ``zstandard`` package is installed, zlib
+    otherwise.
+    """
+    if len(raw_body) < MIN_COMPRESS_SIZE:
+        return _RAW + raw_body
+    zstandard = _import_zstandard()
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor().compress(raw_body)
+    return _ZLIB + zlib.compress(raw_body)
+
+
+def decompress_body(stored: bytes) -> bytes:
+    """Reverse ``compress_body()``."""
+    tag, data = stored[:1], stored[1:]
+    if tag == _RAW:
+        return bytes(data)
+    if tag == _ZLIB:
+        return zlib.decompress(data)
+    if tag == _ZSTD:
+        zstandard = _import_zstandard()
+        if zstandard is None:
+            raise RuntimeError(
+                "Callback body is zstd-compressed but the 'zstandard' "
+                "package is not installed"
+            )
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown callback body encoding tag {tag!r}")
+
+
+def callback_fingerprint(raw_body: bytes) -> str:
+    """Return a stable fingerprint of a raw callback body."""
+    return hashlib.sha256(raw_body).hexdigest()
+
+
+def parse_body(
+    raw_body: bytes,
+    content_type: str | None = None,
+) -> dict[str, Any]:
+    """Parse a raw callback body into the ``data`` dict gateways expect.
+
+    Form-encoded bodies are parsed when the content type says so; JSON
+    is assumed otherwise. Raises ``ValueError`` for malformed bodies.
+    """
+    if not raw_body:
+        return {}
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type == "application/x-www-form-urlencoded":
+        return dict(parse_qsl(raw_body.decode("utf-8"), keep_blank_values=True))
+    data = msgspec.json.decode(raw_body)
+    if not isinstance(data, dict):
+        raise ValueError("Callback body is not a JSON object")
+    return data
+
+
+def get_header(headers: Mapping[str, str], name: str) -> str | None:
+    """Look up a header by name, case-insensitively."""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def filter_headers(
+    headers: Mapping[str, str],
+    allowed: Collection[str] | None,
+) -> dict[str, str]:
+    """Keep only allow-listed headers (case-insensitive).
+
+    With no allow-list every header is kept.
+    """
+    if allowed is None:
+        return dict(headers)
+    keep = {name.lower() for name in allowed} | ALWAYS_KEPT_HEADERS
+    return {
+        name: value for name, value in headers.items() if name.lower() in keep
+    }
@@ -1,20 +1,41 @@
-"""Router factory for litestar-getpaid."""
+"""Router factory and Litestar plugin for litestar-getpaid."""
+
+import asyncio
+import contextlib
+from collections.abc import AsyncGenerator
 
 from getpaid_core.protocols import PaymentRepository
-from litestar import Router
-from litestar.di import Provide
+from litestar import Litestar, Router
+from litestar.config.app import AppConfig
+from litestar.plugins import InitPluginProtocol
 
+from litestar_getpaid.clients import BackendHTTPClients
 from litestar_getpaid.config import GetpaidConfig
-from litestar_getpaid.exceptions import EXCEPTION_HANDLERS
+from litestar_getpaid.context import STATE_KEY, GetpaidContext
+from litestar_getpaid.exceptions import EXCEPTION_HANDLERS, ConfigurationError
+from litestar_getpaid.idempotency import IdempotencyGuard
+from litestar_getpaid.inbox import CallbackInbox
+from litestar_getpaid.lookups import PaymentLookupGuard
+from litestar_getpaid.metrics import RetryMetrics
 from litestar_getpaid.protocols import (
+    CallbackDeduplicator,
     CallbackRetryStore,
     OrderLoader,
     OrderResolver,
+    PaymentEventBroadcaster,
+    PaymentLock,
+    Tracer,
+)
+from litestar_getpaid.registry import (
+    LitestarPluginRegistry,
+    prepare_registry,
 )
-from litestar_getpaid.registry import LitestarPluginRegistry
+from litestar_getpaid.retry import run_retry_worker
 from litestar_getpaid.routes.callbacks import CallbackController
 from litestar_getpaid.routes.payments import PaymentController
 from litestar_getpaid.routes.redirects import RedirectController
+from litestar_getpaid.tracing import NOOP_TRACER
+from litestar_getpaid.warmup import WarmupReport, warm_up_backends
 
 
 def create_payment_router(
@@ -25,6 +46,14 @@ def create_payment_router(
     order_resolver: OrderResolver | None = None,
     retry_store: CallbackRetryStore | None = None,
     order_loader: OrderLoader | None = None,
+    callback_inbox: CallbackInbox | None = None,
+    callback_deduplicator: CallbackDeduplicator | None = None,
+    payment_lock: PaymentLock | None = None,
+    idempotency_guard: IdempotencyGuard | None = None,
+    payment_events: PaymentEventBroadcaster | None = None,
+    payment_lookup_guard: PaymentLookupGuard | None = None,
+    http_clients: BackendHTTPClients | None = None,
+    tracer: Tracer = NOOP_TRACER,
 ) -> Router:
     """Create a configured payment router.
 
@@ -32,31 +61,230 @@ def create_payment_router(
         config: Payment processing configuration.
         repository: Payment persistence backend.
         registry: Plugin registry. Creates a new one if not provided.
+            Only the backends named in ``config.backends`` are imported
+            here; others are imported on first use.
         order_resolver: Resolves order IDs to Order objects.
         retry_store: Storage for webhook retry queue.
+        callback_inbox: Enables inbox mode: callbacks are persisted and
+            acknowledged at once, then processed by the inbox consumers.
+        callback_deduplicator: Answers repeated deliveries of an already
+            processed callback with 200 without processing them again.
+        payment_lock: Serializes callbacks for the same payment.
+        idempotency_guard: Honours the Idempotency-Key header on
+            ``POST /payments``.
+        payment_events: Feeds the payment status event streams. Wrap
+            the repository in ``PublishingPaymentRepository`` with the
+            same broadcaster.
+        payment_lookup_guard: Rejects unknown payment IDs without a
+            database query.
+        http_clients: Per-backend HTTP connection pools handed to the
+            processors. Open and close them in the app lifespan.
+        tracer: Records spans around every payment operation, e.g. an
+            ``OpenTelemetryTracer``. Tracing is off by default.
 
     Returns:
         A Litestar Router with all payment endpoints.
     """
     actual_registry = registry or LitestarPluginRegistry()
-    actual_registry.discover()
+    return _build_router(
+        GetpaidContext(
+            config=config,
+            repository=repository,
+            registry=actual_registry,
+            order_resolver=order_resolver,
+            order_loader=order_loader,
+            retry_store=retry_store,
+            callback_inbox=callback_inbox,
+            callback_deduplicator=callback_deduplicator,
+            payment_lock=payment_lock,
+            idempotency_guard=idempotency_guard,
+            payment_events=payment_events,
+            payment_lookup_guard=payment_lookup_guard,
+            http_clients=http_clients,
+            tracer=tracer,
+        )
+    )
 
+
+def _build_router(context: GetpaidContext) -> Router:
+    prepare_registry(context.registry, context.config.backends)
     return Router(
         path="/",
         route_handlers=[
-            PaymentController,
-            CallbackController,
-            RedirectController,
+            PaymentController.bind(context),
+            CallbackController.bind(context),
+            RedirectController.bind(context),
         ],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: repository, sync_to_thread=False),
-            "registry": Provide(lambda: actual_registry, sync_to_thread=False),
-            "order_resolver": Provide(
-                lambda: order_resolver, sync_to_thread=False
-            ),
-            "order_loader": Provide(lambda: order_loader, sync_to_thread=False),
-            "retry_store": Provide(lambda: retry_store, sync_to_thread=False),
-        },
         exception_handlers=EXCEPTION_HANDLERS,
     )
+
+
+class GetpaidPlugin(InitPluginProtocol):
+    """Registers the payment router and manages its components.
+
+    Takes the same components as ``create_payment_router()``::
+
+        app = Litestar(
+            plugins=[
+                GetpaidPlugin(
+                    config=config,
+                    repository=repository,
+                    retry_store=retry_store,
+                    http_clients=BackendHTTPClients(config),
+                    retry_worker=True,
+                    warm_up=True,
+                )
+            ],
+        )
+
+    The router is mounted at ``path``. The app lifespan starts the
+    stores (the retry store, the inbox's store, the deduplicator and the
+    idempotency store, where they have ``start()``), opens
+    ``http_clients``, warms up the configured backends (with
+    ``warm_up``), starts the ``callback_inbox`` and runs the retry worker
+    (with ``retry_worker``), then stops them in reverse order on
+    shutdown, calling each store's ``stop()`` or ``close()``. The
+    components are kept as a ``GetpaidContext`` in ``app.state.getpaid``.
+    """
+
+    def __init__(
+        self,
+        *,
+        config: GetpaidConfig,
+        repository: PaymentRepository,
+        registry: LitestarPluginRegistry | None = None,
+        order_resolver: OrderResolver | None = None,
+        order_loader: OrderLoader | None = None,
+        retry_store: CallbackRetryStore | None = None,
+        callback_inbox: CallbackInbox | None = None,
+        callback_deduplicator: CallbackDeduplicator | None = None,
+        payment_lock: PaymentLock | None = None,
+        idempotency_guard: IdempotencyGuard | None = None,
+        payment_events: PaymentEventBroadcaster | None = None,
+        payment_lookup_guard: PaymentLookupGuard | None = None,
+        http_clients: BackendHTTPClients | None = None,
+        tracer: Tracer = NOOP_TRACER,
+        retry_worker: bool = False,
+        retry_batch_size: int = 10,
+        retry_poll_interval: float = 5.0,
+        retry_metrics: RetryMetrics | None = None,
+        warm_up: bool = False,
+        warm_up_timeout: float = 10.0,
+        warm_up_strict: bool = False,
+        path: str = "/",
+    ) -> None:
+        if retry_worker and retry_store is None:
+            raise ConfigurationError("The retry worker needs a retry store")
+        self.context = GetpaidContext(
+            config=config,
+            repository=repository,
+            registry=registry or LitestarPluginRegistry(),
+            order_resolver=order_resolver,
+            order_loader=order_loader,
+            retry_store=retry_store,
+            callback_inbox=callback_inbox,
+            callback_deduplicator=callback_deduplicator,
+            payment_lock=payment_lock,
+            idempotency_guard=idempotency_guard,
+            payment_events=payment_events,
+            payment_lookup_guard=payment_lookup_guard,
+            http_clients=http_clients,
+            tracer=tracer,
+        )
+        self.retry_worker = retry_worker
+        self.retry_batch_size = retry_batch_size
+        self.retry_poll_interval = retry_poll_interval
+        self.retry_metrics = retry_metrics
+        self.warm_up = warm_up
+        self.warm_up_timeout = warm_up_timeout
+        self.warm_up_strict = warm_up_strict
+        self.warmup_report: WarmupReport | None = None
+        self.path = path
+
+    def on_app_init(self, app_config: AppConfig) -> AppConfig:
+        context = self.context
+        router = _build_router(context)
+        if self.path != "/":
+            router = Router(path=self.path, route_handlers=[router])
+        app_config.route_handlers.append(router)
+        app_config.lifespan.append(self.lifespan)
+        app_config.state[STATE_KEY] = context
+        return app_config
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self, app: Litestar) -> AsyncGenerator[None]:
+        """Start the payment components and stop them on shutdown."""
+        context = self.context
+        async with contextlib.AsyncExitStack() as stack:
+            for store in self._stores():
+                await _start_store(stack, store)
+            if context.http_clients is not None:
+                await context.http_clients.start()
+                stack.push_async_callback(context.http_clients.stop)
+            if self.warm_up:
+                self.warmup_report = await warm_up_backends(
+                    context.config,
+                    context.registry,
+                    timeout=self.warm_up_timeout,
+                    strict=self.warm_up_strict,
+                    http_clients=context.http_clients,
+                )
+            if context.callback_inbox is not None:
+                await context.callback_inbox.start()
+                stack.push_async_callback(context.callback_inbox.stop)
+            if self.retry_worker:
+                # Checked in __init__.
+                assert context.retry_store is not None
+                worker = asyncio.create_task(
+                    run_retry_worker(
+                        retry_store=context.retry_store,
+                        repository=context.repository,
+                        config=context.config,
+                        registry=context.registry,
+                        batch_size=self.retry_batch_size,
+                        poll_interval=self.retry_poll_interval,
+                        metrics=self.retry_metrics,
+                        payment_lock=context.payment_lock,
+                        http_clients=context.http_clients,
+                        tracer=context.tracer,
+                    )
+                )
+                stack.push_async_callback(_cancel, worker)
+            yield
+
+    def _stores(self) -> list[object]:
+        """Return the distinct stores behind the components."""
+        context = self.context
+        candidates = [
+            context.retry_store,
+            context.callback_inbox.store if context.callback_inbox else None,
+            context.callback_deduplicator,
+            context.idempotency_guard.store
+            if context.idempotency_guard
+            else None,
+        ]
+        stores: list[object] = []
+        for store in candidates:
+            if store is not None and all(store is not s for s in stores):
+                stores.append(store)
+        return stores
+
+
+async def _start_store(stack: contextlib.AsyncExitStack, store: object) -> None:
+    """Start ``store`` and register its shutdown on ``stack``.
+
+    Stores are duck-typed: ``start()`` is optional, and ``stop()`` is
+    preferred over ``close()`` on shutdown.
+    """
+    start = getattr(store, "start", None)
+    if start is not None:
+        await start()
+    shutdown = getattr(store, "stop", None) or getattr(store, "close", None)
+    if shutdown is not None:
+        stack.push_async_callback(shutdown)
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
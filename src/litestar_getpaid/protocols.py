@@ -3,19 +3,35 @@
 Re-exports core protocols and defines Litestar-specific ones.
 """
 
-from collections.abc import Awaitable
-from collections.abc import Callable
-from typing import Protocol, runtime_checkable
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Protocol, runtime_checkable
 
 from getpaid_core.protocols import Order, Payment, PaymentRepository
 
 __all__ = [
+    "CallbackDeduplicator",
     "CallbackRetryStore",
+    "IdempotencyRecord",
+    "IdempotencyStore",
     "Order",
     "OrderLoader",
     "OrderResolver",
     "Payment",
+    "PaymentEventBroadcaster",
+    "PaymentExistenceSource",
+    "PaymentLock",
+    "PaymentProjectionSource",
     "PaymentRepository",
+    "PaymentStatusEvent",
+    "PaymentVersion",
+    "PaymentVersionSource",
+    "ReusablePaymentRepository",
+    "TraceSpan",
+    "Tracer",
+    "WarmableBackend",
 ]
 
 
@@ -40,11 +56,19 @@ class CallbackRetryStore(Protocol):
     async def store_failed_callback(
         self,
         payment_id: str,
-        payload: dict,
+        payload: dict | None,
         headers: dict,
+        backend: str | None = None,
+        raw_body: bytes | None = None,
     ) -> str: ...
 
-    async def get_due_retries(self, limit: int = 10) -> list[dict]: ...
+    async def get_due_retries(
+        self,
+        limit: int = 10,
+        backend: str | None = None,
+    ) -> list[dict]:
+        """Claim up to ``limit`` due retries, of one backend if given."""
+        ...
 
     async def mark_succeeded(self, retry_id: str) -> None: ...
 
@@ -55,3 +79,186 @@ class CallbackRetryStore(Protocol):
     ) -> None: ...
 
     async def mark_exhausted(self, retry_id: str) -> None: ...
+
+
+@runtime_checkable
+class CallbackDeduplicator(Protocol):
+    """Remembers processed callbacks to short-circuit repeat deliveries.
+
+    Callbacks are identified by payment ID and a fingerprint of the raw
+    body (see ``litestar_getpaid.payloads.callback_fingerprint``).
+    """
+
+    async def is_duplicate(self, payment_id: str, fingerprint: str) -> bool: ...
+
+    async def remember(self, payment_id: str, fingerprint: str) -> None: ...
+
+
+@runtime_checkable
+class PaymentLock(Protocol):
+    """Serializes work on one payment across concurrent callbacks."""
+
+    def lock(self, payment_id: str) -> AbstractAsyncContextManager[None]: ...
+
+
+@dataclass(slots=True)
+class IdempotencyRecord:
+    """State of a request made with an Idempotency-Key.
+
+    ``response`` is None while the first request is still in flight.
+    """
+
+    fingerprint: str
+    response: dict | None = None
+
+
+@runtime_checkable
+class IdempotencyStore(Protocol):
+    """Storage for Idempotency-Key reservations and cached responses."""
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        """Claim ``key``; False if it is already reserved or completed."""
+        ...
+
+    async def get(self, key: str) -> IdempotencyRecord | None: ...
+
+    async def complete(self, key: str, response: dict) -> None: ...
+
+    async def release(self, key: str) -> None:
+        """Drop a reservation whose request failed."""
+        ...
+
+
+@runtime_checkable
+class ReusablePaymentRepository(Protocol):
+    """A payment repository able to find payments open for reuse.
+
+    Used by ``POST /payments`` when ``payment_reuse_seconds`` is set.
+    """
+
+    async def find_reusable_payment(
+        self,
+        order_id: str,
+        backend: str,
+        *,
+        created_after: datetime,
+    ) -> Payment | None:
+        """Return the newest prepared payment with a stored transaction
+        result created after ``created_after``, if any."""
+        ...
+
+    async def save_transaction_result(
+        self, payment_id: str, result: dict
+    ) -> None: ...
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentVersion:
+    """Last modification time and status of a payment."""
+
+    updated_at: datetime
+    status: str
+
+
+@runtime_checkable
+class PaymentVersionSource(Protocol):
+    """A payment repository able to load a payment's version cheaply.
+
+    Lets ``GET /payments/{payment_id}`` answer a matching
+    ``If-None-Match`` with 304 without loading the whole payment.
+    """
+
+    async def get_payment_version(self, payment_id: str) -> PaymentVersion:
+        """Return the payment's version. Raises KeyError if not found."""
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentStatusEvent:
+    """A payment was created or its state was saved."""
+
+    payment_id: str
+    order_id: str
+    status: str
+
+
+@runtime_checkable
+class PaymentEventBroadcaster(Protocol):
+    """Delivers payment status events to stream subscribers.
+
+    ``subscribe()`` takes exactly one of ``payment_id`` or ``order_id``
+    and yields an async iterator of matching events.
+    """
+
+    async def publish(self, event: PaymentStatusEvent) -> None: ...
+
+    def subscribe(
+        self,
+        *,
+        payment_id: str | None = None,
+        order_id: str | None = None,
+    ) -> AbstractAsyncContextManager[AsyncIterator[PaymentStatusEvent]]: ...
+
+
+@runtime_checkable
+class PaymentProjectionSource(Protocol):
+    """A payment repository able to load selected payment fields.
+
+    Lets the payment read routes serve sparse fieldsets without loading
+    whole payments. ``fields`` are column names; rows are returned as
+    dicts keyed by them.
+    """
+
+    async def get_payment_fields(
+        self, payment_id: str, fields: Collection[str]
+    ) -> dict:
+        """Return the fields of one payment. Raises KeyError if not
+        found."""
+        ...
+
+    async def list_payment_fields(
+        self, order_id: str, fields: Collection[str]
+    ) -> list[dict]: ...
+
+
+@runtime_checkable
+class PaymentExistenceSource(Protocol):
+    """A payment repository able to check for a payment cheaply."""
+
+    async def exists(self, payment_id: str) -> bool:
+        """Return True if the payment exists, reading only its ID."""
+        ...
+
+
+@runtime_checkable
+class WarmableBackend(Protocol):
+    """A processor class able to prepare shared resources up front.
+
+    ``warm_up_backends()`` awaits ``warm_up`` once per backend at startup
+    with the backend settings, e.g. to open an HTTP pool or fetch an
+    OAuth token. Implement it as a classmethod: processors are created
+    per payment.
+    """
+
+    async def warm_up(self, config: dict[str, Any]) -> None: ...
+
+
+@runtime_checkable
+class TraceSpan(Protocol):
+    """An open span of a ``Tracer``."""
+
+    def set_attribute(self, key: str, value: Any) -> None: ...
+
+
+@runtime_checkable
+class Tracer(Protocol):
+    """Records timed spans around payment operations.
+
+    ``span()`` returns a context manager timing the block it wraps.
+    Attribute keys are plain names (``backend``, ``status``,
+    ``outcome``); see ``litestar_getpaid.tracing`` for implementations.
+    """
+
+    def span(
+        self, name: str, **attributes: Any
+    ) -> AbstractContextManager[TraceSpan]: ...
@@ -0,0 +1,97 @@
+"""Per-backend token-bucket rate limiting for retry replay."""
+
+import time
+from collections.abc import Callable, Mapping
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second.
+
+    Holds at most ``burst`` tokens and starts full.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1.0))
+        if self.burst < 1:
+            raise ValueError("burst must be at least 1")
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> float:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+        return self._tokens
+
+    def try_acquire(self) -> float:
+        """Take one token if available.
+
+        Returns 0.0 when a token was taken, otherwise the number of
+        seconds until one becomes available.
+        """
+        tokens = self._refill()
+        if tokens >= 1:
+            self._tokens = tokens - 1
+            return 0.0
+        return (1 - tokens) / self.rate
+
+
+class RetryRateLimiter:
+    """Token buckets keyed by backend slug.
+
+    Backends without a configured limit are never throttled. Buckets
+    live in process memory, so each worker process gets its own
+    allowance.
+    """
+
+    def __init__(self, buckets: Mapping[str, TokenBucket] | None = None):
+        self._buckets = dict(buckets or {})
+
+    @classmethod
+    def from_config(cls, config: "GetpaidConfig") -> "RetryRateLimiter":
+        """Build buckets from ``retry_rate_limit`` in backend settings.
+
+        Each value is a mapping with ``rate`` (tokens per second) and
+        an optional ``burst``.
+        """
+        buckets = {}
+        for slug, backend_config in config.backends.items():
+            limit: Mapping[str, Any] | None = backend_config.get(
+                "retry_rate_limit"
+            )
+            if limit:
+                buckets[slug] = TokenBucket(
+                    rate=limit["rate"],
+                    burst=limit.get("burst"),
+                )
+        return cls(buckets)
+
+    def __bool__(self) -> bool:
+        return bool(self._buckets)
+
+    def acquire(self, backend: str | None) -> float:
+        """Take a token for ``backend``.
+
+        Returns 0.0 when the call may proceed, otherwise the number of
+        seconds to wait before trying again.
+        """
+        bucket = self._buckets.get(backend) if backend is not None else None
+        if bucket is None:
+            return 0.0
+        return bucket.try_acquire()
@@ -1,7 +1,194 @@
-"""Litestar-aware plugin registry wrapper."""
+"""Litestar-aware plugin registry wrapper.
 
-from getpaid_core.registry import PluginRegistry
+Entry points are scanned once per process and backend modules are
+imported on first use. Building several routers, or one per test, does
+not repeat discovery and does not import backends the app never uses.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from importlib.metadata import EntryPoint, entry_points
+
+from getpaid_core.exceptions import BackendNotFoundError
+from getpaid_core.processor import BaseProcessor
+from getpaid_core.registry import ENTRY_POINT_GROUP, PluginRegistry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class DiscoveryTimings:
+    """Time spent discovering payment backends in this process.
+
+    ``scan_seconds`` covers reading entry point metadata and
+    ``import_seconds`` maps entry point names to the time spent
+    importing them.
+    """
+
+    scan_seconds: float = 0.0
+    import_seconds: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_seconds(self) -> float:
+        return self.scan_seconds + sum(self.import_seconds.values())
+
+
+_cache_lock = threading.RLock()
+_entry_points: tuple[EntryPoint, ...] | None = None
+_processors: dict[str, type[BaseProcessor] | None] = {}
+_timings = DiscoveryTimings()
+
+
+def discovery_timings() -> DiscoveryTimings:
+    """Return a snapshot of the discovery timings of this process."""
+    with _cache_lock:
+        return DiscoveryTimings(
+            scan_seconds=_timings.scan_seconds,
+            import_seconds=dict(_timings.import_seconds),
+        )
+
+
+def clear_discovery_cache() -> None:
+    """Forget scanned entry points, loaded backends and timings.
+
+    Only needed after installing backends at runtime, or in tests.
+    """
+    global _entry_points
+    with _cache_lock:
+        _entry_points = None
+        _processors.clear()
+        _timings.scan_seconds = 0.0
+        _timings.import_seconds.clear()
+
+
+def _backend_entry_points() -> tuple[EntryPoint, ...]:
+    global _entry_points
+    with _cache_lock:
+        if _entry_points is None:
+            started = time.perf_counter()
+            _entry_points = tuple(entry_points(group=ENTRY_POINT_GROUP))
+            _timings.scan_seconds = time.perf_counter() - started
+            logger.debug(
+                "Found %d payment backend entry points in %.3fs",
+                len(_entry_points),
+                _timings.scan_seconds,
+            )
+        return _entry_points
+
+
+def _load_entry_point(entry_point: EntryPoint) -> type[BaseProcessor] | None:
+    with _cache_lock:
+        if entry_point.value in _processors:
+            return _processors[entry_point.value]
+        started = time.perf_counter()
+        processor_class: type[BaseProcessor] | None
+        try:
+            processor_class = entry_point.load()
+        except Exception:
+            logger.warning(
+                "Failed to load payment backend entry point %r "
+                "from group %r; skipping it.",
+                entry_point.name,
+                ENTRY_POINT_GROUP,
+                exc_info=True,
+            )
+            processor_class = None
+        else:
+            if not (
+                isinstance(processor_class, type)
+                and issubclass(processor_class, BaseProcessor)
+            ):
+                logger.warning(
+                    "Entry point %r in group %r did not provide a "
+                    "BaseProcessor subclass (got %r); skipping it.",
+                    entry_point.name,
+                    ENTRY_POINT_GROUP,
+                    processor_class,
+                )
+                processor_class = None
+        elapsed = time.perf_counter() - started
+        _timings.import_seconds[entry_point.name] = elapsed
+        _processors[entry_point.value] = processor_class
+        logger.debug(
+            "Imported payment backend %r in %.3fs", entry_point.name, elapsed
+        )
+        return processor_class
 
 
 class LitestarPluginRegistry(PluginRegistry):
-    """Plugin registry wrapper for Litestar adapter code."""
+    """Plugin registry wrapper for Litestar adapter code.
+
+    ``get_by_slug()`` imports only the entry point named after the slug
+    and falls back to full discovery when there is none.
+    ``get_for_currency()`` and ``get_all_currencies()`` need every
+    backend and discover them all.
+    """
+
+    def discover(self) -> None:
+        """Load all backends registered via entry points.
+
+        Entry points are read and imported once per process; later
+        calls, on any registry, reuse the loaded classes.
+        """
+        with self._lock:
+            for entry_point in _backend_entry_points():
+                self._register_entry_point(entry_point)
+            self._discovered = True
+
+    def load_backends(self, slugs: Iterable[str]) -> None:
+        """Import the backends registered under ``slugs``.
+
+        Each slug is looked up by entry point name. Full discovery runs
+        when a slug has no entry point of that name.
+        """
+        with self._lock:
+            missing = [
+                slug
+                for slug in slugs
+                if slug not in self._backends and not self._load_named(slug)
+            ]
+            if missing and not self._discovered:
+                self.discover()
+
+    def get_by_slug(self, slug: str) -> type[BaseProcessor]:
+        """Return a backend class by slug, importing it on first use.
+
+        Raises ``BackendNotFoundError`` when no backend is registered
+        under ``slug``.
+        """
+        with self._lock:
+            if slug not in self._backends and not self._discovered:
+                self.load_backends([slug])
+            try:
+                return self._backends[slug]
+            except KeyError:
+                raise BackendNotFoundError(
+                    f"No payment backend registered for slug {slug!r}.",
+                    context={"slug": slug},
+                ) from None
+
+    def _load_named(self, slug: str) -> bool:
+        for entry_point in _backend_entry_points():
+            if entry_point.name == slug:
+                self._register_entry_point(entry_point)
+        return slug in self._backends
+
+    def _register_entry_point(self, entry_point: EntryPoint) -> None:
+        processor_class = _load_entry_point(entry_point)
+        if processor_class is not None:
+            self._register_backend(processor_class)
+
+
+def prepare_registry(registry: PluginRegistry, slugs: Iterable[str]) -> None:
+    """Load the backends an app is configured with.
+
+    ``LitestarPluginRegistry`` imports only ``slugs``; other registries
+    run their full discovery.
+    """
+    if isinstance(registry, LitestarPluginRegistry):
+        registry.load_backends(slugs)
+    else:
+        registry.discover()
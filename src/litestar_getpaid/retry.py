@@ -1,16 +1,38 @@
 """Webhook retry mechanism with exponential backoff."""
 
+import asyncio
 import logging
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Any
 
 from getpaid_core.flow import PaymentFlow
 from getpaid_core.protocols import PaymentRepository
 
-from litestar_getpaid.config import GetpaidConfig
-from litestar_getpaid.protocols import CallbackRetryStore
+from litestar_getpaid.clients import BackendHTTPClients, backend_settings
+from litestar_getpaid.locks import payment_lock_scope
+from litestar_getpaid.metrics import RetryMetrics
+from litestar_getpaid.payloads import get_header, parse_body
+from litestar_getpaid.protocols import (
+    CallbackRetryStore,
+    PaymentLock,
+    Tracer,
+    TraceSpan,
+)
+from litestar_getpaid.ratelimit import RetryRateLimiter
+from litestar_getpaid.tracing import NOOP_SPAN, NOOP_TRACER
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
 
 logger = logging.getLogger(__name__)
 
+# How long drain_retries() waits for rate-limited retries to come due.
+_DEFERRED_POLL_INTERVAL = 0.5
+
 
 def compute_next_retry_at(
     attempt: int,
@@ -24,82 +46,401 @@ def compute_next_retry_at(
     return datetime.now(tz=UTC) + timedelta(seconds=delay)
 
 
-async def process_due_retries(
+async def _defer_if_limited(
+    retry_store: CallbackRetryStore,
+    retry_id: str,
+    backend: str | None,
+    rate_limiter: RetryRateLimiter | None,
+    metrics: RetryMetrics | None,
+) -> bool:
+    """Push a retry back if its backend is over its rate limit.
+
+    Deferring does not count as an attempt. Stores without
+    ``mark_deferred()`` leave the row where it is, to be picked up by a
+    later batch.
+    """
+    if rate_limiter is None:
+        return False
+    wait = rate_limiter.acquire(backend)
+    if not wait:
+        return False
+    mark_deferred = getattr(retry_store, "mark_deferred", None)
+    if mark_deferred is not None:
+        await mark_deferred(
+            retry_id,
+            until=datetime.now(tz=UTC) + timedelta(seconds=wait),
+        )
+    logger.debug(
+        "Retry %s: backend %s rate limited, deferred %.3fs",
+        retry_id,
+        backend,
+        wait,
+    )
+    if metrics is not None:
+        metrics.record_deferred(backend=backend)
+    return True
+
+
+async def _process_retry(
+    retry: dict,
+    *,
+    payment_lock: PaymentLock | None = None,
+    tracer: Tracer = NOOP_TRACER,
+    **kwargs,
+) -> str:
+    """Replay one claimed retry under the payment's lock, if any."""
+    with tracer.span(
+        "getpaid.retry.replay",
+        retry_id=retry["id"],
+        payment_id=retry["payment_id"],
+        attempt=retry["attempts"],
+    ) as span:
+        async with payment_lock_scope(payment_lock, retry["payment_id"]):
+            outcome = await _replay_retry(
+                retry, span=span, tracer=tracer, **kwargs
+            )
+        span.set_attribute("outcome", outcome)
+        return outcome
+
+
+async def _replay_retry(
+    retry: dict,
     *,
     retry_store: CallbackRetryStore,
     repository: PaymentRepository,
-    config: GetpaidConfig,
+    config: "GetpaidConfig",
     registry=None,
-    limit: int = 10,
-) -> int:
-    """Process all due callback retries.
+    metrics: RetryMetrics | None = None,
+    rate_limiter: RetryRateLimiter | None = None,
+    http_clients: BackendHTTPClients | None = None,
+    span: TraceSpan = NOOP_SPAN,
+    tracer: Tracer = NOOP_TRACER,
+) -> str:
+    """Replay one claimed retry and return its outcome.
 
-    Returns the number of retries processed.
+    The outcome is one of ``succeeded``, ``failed``, ``exhausted``,
+    ``not_found`` or ``deferred``.
     """
-    retries = await retry_store.get_due_retries(limit=limit)
-    processed = 0
+    retry_id = retry["id"]
+    payment_id = retry["payment_id"]
+    payload = retry["payload"]
+    headers = retry["headers"]
+    attempts = retry["attempts"]
+    backend = retry.get("backend")
+    started = time.perf_counter()
+    span.set_attribute("backend", backend)
 
-    for retry in retries:
-        retry_id = retry["id"]
-        payment_id = retry["payment_id"]
-        payload = retry["payload"]
-        headers = retry["headers"]
-        attempts = retry["attempts"]
+    if backend is not None and await _defer_if_limited(
+        retry_store, retry_id, backend, rate_limiter, metrics
+    ):
+        return "deferred"
 
-        try:
+    try:
+        with tracer.span("getpaid.repository.get", payment_id=payment_id):
             payment = await repository.get_by_id(payment_id)
-        except KeyError:
-            logger.error(
-                "Retry %s: payment %s not found, marking exhausted",
-                retry_id,
-                payment_id,
-            )
+    except KeyError:
+        logger.error(
+            "Retry %s: payment %s not found, marking exhausted",
+            retry_id,
+            payment_id,
+        )
+        with tracer.span("getpaid.retry_store.mark", outcome="not_found"):
             await retry_store.mark_exhausted(retry_id)
-            processed += 1
-            continue
+        if metrics is not None:
+            metrics.record_attempt(
+                backend=backend,
+                outcome="not_found",
+                duration=time.perf_counter() - started,
+            )
+        return "not_found"
+    span.set_attribute("backend", payment.backend)
 
-        flow = PaymentFlow(
-            repository=repository,
-            config=config.backends,
-            registry=registry,
-        )
+    if backend is None and await _defer_if_limited(
+        retry_store, retry_id, payment.backend, rate_limiter, metrics
+    ):
+        # Rows queued before the backend was stored with them.
+        return "deferred"
+
+    flow = PaymentFlow(
+        repository=repository,
+        config=backend_settings(config, http_clients),
+        registry=registry,
+    )
+    raw_body = retry.get("raw_body")
+    if raw_body is None and payload:
+        # Rows queued before raw bodies were stored separately.
         raw_body = payload.get("_raw_body")
-        callback_kwargs = {"raw_body": raw_body} if raw_body is not None else {}
+    callback_kwargs = {"raw_body": raw_body} if raw_body is not None else {}
 
-        try:
+    try:
+        if payload is None:
+            payload = parse_body(
+                raw_body or b"",
+                get_header(headers, "content-type"),
+            )
+        with tracer.span(
+            "getpaid.flow.handle_callback", backend=payment.backend
+        ):
             await flow.handle_callback(
                 payment=payment,
                 data=payload,
                 headers=headers,
                 **callback_kwargs,
             )
+        with tracer.span("getpaid.retry_store.mark", outcome="succeeded"):
             await retry_store.mark_succeeded(retry_id)
-            logger.info(
-                "Retry %s: callback for payment %s succeeded",
+        outcome = "succeeded"
+        logger.info(
+            "Retry %s: callback for payment %s succeeded",
+            retry_id,
+            payment_id,
+        )
+    except Exception as exc:
+        if attempts >= config.retry_max_attempts:
+            with tracer.span("getpaid.retry_store.mark", outcome="exhausted"):
+                await retry_store.mark_exhausted(retry_id)
+            outcome = "exhausted"
+            logger.warning(
+                "Retry %s: exhausted after %d attempts: %s",
                 retry_id,
-                payment_id,
+                attempts,
+                exc,
             )
-        except Exception as exc:
-            if attempts >= config.retry_max_attempts:
-                await retry_store.mark_exhausted(retry_id)
-                logger.warning(
-                    "Retry %s: exhausted after %d attempts: %s",
-                    retry_id,
-                    attempts,
-                    exc,
-                )
-            else:
+        else:
+            with tracer.span("getpaid.retry_store.mark", outcome="failed"):
                 await retry_store.mark_failed(
                     retry_id,
                     error=str(exc),
                 )
-                logger.info(
-                    "Retry %s: attempt %d failed: %s",
-                    retry_id,
-                    attempts,
-                    exc,
-                )
+            outcome = "failed"
+            logger.info(
+                "Retry %s: attempt %d failed: %s",
+                retry_id,
+                attempts,
+                exc,
+            )
+    span.set_attribute("status", payment.status)
+
+    if metrics is not None:
+        metrics.record_attempt(
+            backend=payment.backend,
+            outcome=outcome,
+            duration=time.perf_counter() - started,
+        )
+    return outcome
+
+
+async def process_due_retries(
+    *,
+    retry_store: CallbackRetryStore,
+    repository: PaymentRepository,
+    config: "GetpaidConfig",
+    registry=None,
+    limit: int = 10,
+    metrics: RetryMetrics | None = None,
+    rate_limiter: RetryRateLimiter | None = None,
+    payment_lock: PaymentLock | None = None,
+    http_clients: BackendHTTPClients | None = None,
+    tracer: Tracer = NOOP_TRACER,
+) -> int:
+    """Process all due callback retries.
 
-        processed += 1
+    With a ``rate_limiter``, retries for a backend over its limit are
+    deferred instead of attempted. With a ``payment_lock``, each retry
+    holds its payment's lock, like the callback route does.
+
+    Returns the number of retries processed; deferred retries are not
+    counted.
+    """
+    with tracer.span("getpaid.retry_store.fetch") as span:
+        retries = await retry_store.get_due_retries(limit=limit)
+        span.set_attribute("count", len(retries))
+    processed = 0
+    if metrics is not None:
+        metrics.record_batch(len(retries))
+
+    for retry in retries:
+        outcome = await _process_retry(
+            retry,
+            retry_store=retry_store,
+            repository=repository,
+            config=config,
+            registry=registry,
+            metrics=metrics,
+            rate_limiter=rate_limiter,
+            payment_lock=payment_lock,
+            http_clients=http_clients,
+            tracer=tracer,
+        )
+        if outcome != "deferred":
+            processed += 1
 
     return processed
+
+
+@dataclass(slots=True)
+class DrainReport:
+    """Progress of a ``drain_retries()`` run."""
+
+    outcomes: Counter[str] = field(default_factory=Counter)
+    batches: int = 0
+    elapsed: float = 0.0
+    budget_exhausted: bool = False
+
+    @property
+    def processed(self) -> int:
+        """Number of retries attempted (deferrals excluded)."""
+        return self.outcomes.total() - self.outcomes["deferred"]
+
+    @property
+    def throughput(self) -> float:
+        """Processed retries per second."""
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+async def drain_retries(
+    *,
+    retry_store: CallbackRetryStore,
+    repository: PaymentRepository,
+    config: "GetpaidConfig",
+    registry=None,
+    concurrency: int = 4,
+    batch_size: int = 50,
+    backend: str | None = None,
+    time_budget: float | None = None,
+    metrics: RetryMetrics | None = None,
+    rate_limiter: RetryRateLimiter | None = None,
+    payment_lock: PaymentLock | None = None,
+    http_clients: BackendHTTPClients | None = None,
+    tracer: Tracer = NOOP_TRACER,
+    on_progress: Callable[[DrainReport], None] | None = None,
+) -> DrainReport:
+    """Replay due retries until none are left or the budget runs out.
+
+    Each batch of ``batch_size`` retries is processed with up to
+    ``concurrency`` callbacks in flight. ``backend`` restricts the drain
+    to one backend; the built-in stores accept it as a filter to
+    ``get_due_retries()``. ``time_budget`` (seconds) stops fetching new
+    batches once exceeded. ``on_progress`` is called after every batch.
+
+    Unless a ``rate_limiter`` is given, one is built from the
+    ``retry_rate_limit`` backend settings.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if rate_limiter is None:
+        rate_limiter = RetryRateLimiter.from_config(config)
+    semaphore = asyncio.Semaphore(concurrency)
+    report = DrainReport()
+    started = time.perf_counter()
+    # Stores written before the backend filter need not accept it.
+    fetch_kwargs: dict[str, Any] = (
+        {"backend": backend} if backend is not None else {}
+    )
+    wait_for_due = getattr(retry_store, "wait_for_due", None)
+    deferred_last_batch = False
+
+    async def run(retry: dict) -> str:
+        async with semaphore:
+            return await _process_retry(
+                retry,
+                retry_store=retry_store,
+                repository=repository,
+                config=config,
+                registry=registry,
+                metrics=metrics,
+                rate_limiter=rate_limiter,
+                payment_lock=payment_lock,
+                http_clients=http_clients,
+                tracer=tracer,
+            )
+
+    while True:
+        report.elapsed = time.perf_counter() - started
+        if time_budget is not None and report.elapsed >= time_budget:
+            report.budget_exhausted = True
+            break
+        with tracer.span("getpaid.retry_store.fetch") as span:
+            retries = await retry_store.get_due_retries(
+                limit=batch_size,
+                **fetch_kwargs,
+            )
+            span.set_attribute("count", len(retries))
+        if not retries:
+            if not deferred_last_batch:
+                break
+            # Throttled retries become due again shortly.
+            deferred_last_batch = False
+            if wait_for_due is not None:
+                await wait_for_due(
+                    timeout=_DEFERRED_POLL_INTERVAL, **fetch_kwargs
+                )
+            else:
+                await asyncio.sleep(_DEFERRED_POLL_INTERVAL)
+            continue
+        if metrics is not None:
+            metrics.record_batch(len(retries))
+        outcomes = await asyncio.gather(*(run(retry) for retry in retries))
+        report.outcomes.update(outcomes)
+        report.batches += 1
+        report.elapsed = time.perf_counter() - started
+        deferred_last_batch = "deferred" in outcomes
+        if on_progress is not None:
+            on_progress(report)
+        if all(outcome == "deferred" for outcome in outcomes):
+            await asyncio.sleep(_DEFERRED_POLL_INTERVAL)
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+async def run_retry_worker(
+    *,
+    retry_store: CallbackRetryStore,
+    repository: PaymentRepository,
+    config: "GetpaidConfig",
+    registry=None,
+    batch_size: int = 10,
+    poll_interval: float = 5.0,
+    metrics: RetryMetrics | None = None,
+    rate_limiter: RetryRateLimiter | None = None,
+    payment_lock: PaymentLock | None = None,
+    http_clients: BackendHTTPClients | None = None,
+    tracer: Tracer = NOOP_TRACER,
+) -> None:
+    """Process due retries until cancelled.
+
+    Stores exposing ``wait_for_due(timeout)`` let the worker sleep
+    until the next retry is due; other stores are polled every
+    ``poll_interval`` seconds. Run it as a background task and cancel
+    it on shutdown.
+
+    Unless a ``rate_limiter`` is given, one is built from the
+    ``retry_rate_limit`` backend settings.
+    """
+    if rate_limiter is None:
+        rate_limiter = RetryRateLimiter.from_config(config)
+    wait_for_due = getattr(retry_store, "wait_for_due", None)
+    while True:
+        try:
+            processed = await process_due_retries(
+                retry_store=retry_store,
+                repository=repository,
+                config=config,
+                registry=registry,
+                limit=batch_size,
+                metrics=metrics,
+                rate_limiter=rate_limiter,
+                payment_lock=payment_lock,
+                http_clients=http_clients,
+                tracer=tracer,
+            )
+        except Exception:
+            logger.exception("Retry worker iteration failed")
+            processed = 0
+        if processed:
+            continue
+        if wait_for_due is not None:
+            await wait_for_due(timeout=poll_interval)
+        else:
+            await asyncio.sleep(poll_interval)
@@ -0,0 +1,40 @@
+"""Base class of the payment controllers."""
+
+from typing import Self, cast
+
+from litestar import Controller, Router
+
+from litestar_getpaid.context import GetpaidContext
+from litestar_getpaid.exceptions import ConfigurationError
+
+
+class GetpaidController(Controller):
+    """Controller reading its components from a bound ``GetpaidContext``.
+
+    The context is bound once, when the router is built, instead of
+    being resolved by dependency injection on every request. Mount
+    ``bind(context)`` subclasses; ``create_payment_router()`` does this
+    for you.
+    """
+
+    context: GetpaidContext
+
+    def __init__(self, owner: Router) -> None:
+        if getattr(self, "context", None) is None:
+            raise ConfigurationError(
+                f"{type(self).__name__} has no GetpaidContext; mount "
+                f"{type(self).__name__}.bind(context) instead"
+            )
+        super().__init__(owner)
+
+    @classmethod
+    def bind(cls, context: GetpaidContext) -> type[Self]:
+        """Return a subclass of this controller using ``context``."""
+        return cast(
+            "type[Self]",
+            type(
+                cls.__name__,
+                (cls,),
+                {"__module__": cls.__module__, "context": context},
+            ),
+        )
@@ -1,23 +1,55 @@
 """Gateway callback handling routes."""
 
 import logging
-from typing import Annotated
 
 from getpaid_core.exceptions import CommunicationError, InvalidCallbackError
 from getpaid_core.flow import PaymentFlow
-from getpaid_core.protocols import PaymentRepository
-from getpaid_core.registry import PluginRegistry
-from litestar import Controller, Request, Response, post
-from litestar.params import Dependency
+from getpaid_core.protocols import Payment
+from getpaid_core.validators import run_validators
+from litestar import Request, Response, post
 
-from litestar_getpaid.config import GetpaidConfig
-from litestar_getpaid.exceptions import PaymentNotFoundError
-from litestar_getpaid.protocols import CallbackRetryStore
+from litestar_getpaid.clients import backend_settings
+from litestar_getpaid.locks import payment_lock_scope
+from litestar_getpaid.lookups import load_payment
+from litestar_getpaid.payloads import (
+    callback_fingerprint,
+    filter_headers,
+    parse_body,
+)
+from litestar_getpaid.routes.base import GetpaidController
 
 logger = logging.getLogger(__name__)
 
 
-class CallbackController(Controller):
+async def _verify_callback(
+    flow: PaymentFlow,
+    payment: Payment,
+    data: dict,
+    headers: dict,
+    raw_body: bytes,
+) -> None:
+    """Verify a callback the way ``PaymentFlow.handle_callback()`` does.
+
+    The flow's operation validators run first, so the processor checks
+    the same data and headers it would check when handling the callback.
+    """
+    context = run_validators(
+        {
+            "operation": "callback",
+            "payment": payment,
+            "data": dict(data),
+            "headers": dict(headers),
+            "kwargs": {"raw_body": raw_body},
+        },
+        validators=flow.validators,
+    )
+    processor = flow.get_processor(payment)
+    await processor.verify_callback(
+        context["data"], context["headers"], **context["kwargs"]
+    )
+
+
+class CallbackController(GetpaidController):
     """Gateway callback endpoints."""
 
     tags = ["callbacks"]
@@ -27,60 +59,169 @@ class CallbackController(Controller):
         self,
         request: Request,
         payment_id: str,
-        data: dict,
-        config: Annotated[GetpaidConfig, Dependency(skip_validation=True)],
-        repository: Annotated[
-            PaymentRepository, Dependency(skip_validation=True)
-        ],
-        registry: Annotated[PluginRegistry, Dependency(skip_validation=True)],
-        retry_store: Annotated[
-            CallbackRetryStore | None, Dependency(skip_validation=True)
-        ] = None,
     ) -> Response:
-        """Handle a PUSH callback from a payment gateway."""
-        try:
-            payment = await repository.get_by_id(payment_id)
-        except KeyError as exc:
-            raise PaymentNotFoundError(payment_id) from exc
-
-        flow = PaymentFlow(
-            repository=repository,
-            config=config.backends,
-            registry=registry,
-        )
-
-        raw_body = await request.body()
-        callback_headers = dict(request.headers)
-
-        try:
-            await flow.handle_callback(
-                payment=payment,
-                data=data,
-                headers=callback_headers,
-                raw_body=raw_body,
-            )
-        except InvalidCallbackError:
-            raise
-        except CommunicationError as exc:
-            if retry_store is not None:
-                retry_payload = dict(data)
-                retry_payload["_raw_body"] = raw_body.decode("utf-8")
-                await retry_store.store_failed_callback(
-                    payment_id=payment_id,
-                    payload=retry_payload,
-                    headers=callback_headers,
-                )
-                logger.warning(
-                    "Callback for payment %s failed, queued for retry: %s",
-                    payment_id,
-                    exc,
+        """Handle a PUSH callback from a payment gateway.
+
+        With a callback inbox configured, the callback is only verified
+        and persisted here; processing happens in the background.
+        Repeated deliveries of an already accepted callback are answered
+        without processing when a deduplicator is configured. With a
+        payment lock, callbacks for one payment are processed one at a
+        time.
+
+        The body is read once as raw bytes and parsed (JSON or form
+        encoded) only after the cheap checks pass.
+        """
+        config = self.context.config
+        repository = self.context.repository
+        registry = self.context.registry
+        retry_store = self.context.retry_store
+        callback_inbox = self.context.callback_inbox
+        callback_deduplicator = self.context.callback_deduplicator
+        payment_lock = self.context.payment_lock
+        payment_lookup_guard = self.context.payment_lookup_guard
+        http_clients = self.context.http_clients
+        tracer = self.context.tracer
+        with tracer.span("getpaid.callback", payment_id=payment_id) as span:
+            raw_body = await request.body()
+            fingerprint = None
+            if callback_deduplicator is not None:
+                fingerprint = callback_fingerprint(raw_body)
+                if await callback_deduplicator.is_duplicate(
+                    payment_id, fingerprint
+                ):
+                    logger.debug(
+                        "Duplicate callback for payment %s ignored",
+                        payment_id,
+                    )
+                    span.set_attribute("outcome", "duplicate")
+                    return Response(content={"status": "ok"}, status_code=200)
+
+            # Inbox mode only verifies and stores, so it needs no lock.
+            if callback_inbox is not None:
+                payment_lock = None
+            async with payment_lock_scope(payment_lock, payment_id):
+                # A concurrent delivery may have been processed while
+                # this one waited for the lock.
+                if (
+                    payment_lock is not None
+                    and callback_deduplicator is not None
+                    and fingerprint is not None
+                    and await callback_deduplicator.is_duplicate(
+                        payment_id, fingerprint
+                    )
+                ):
+                    logger.debug(
+                        "Duplicate callback for payment %s ignored",
+                        payment_id,
+                    )
+                    span.set_attribute("outcome", "duplicate")
+                    return Response(content={"status": "ok"}, status_code=200)
+
+                with tracer.span(
+                    "getpaid.repository.get", payment_id=payment_id
+                ):
+                    # A payment created elsewhere may be missing from the
+                    # guard's filter; a 404 here would lose its callback.
+                    payment = await load_payment(
+                        repository,
+                        payment_id,
+                        payment_lookup_guard,
+                        use_filter=False,
+                    )
+                span.set_attribute("backend", payment.backend)
+
+                flow = PaymentFlow(
+                    repository=repository,
+                    config=backend_settings(config, http_clients),
+                    registry=registry,
                 )
-            return Response(
-                content={
-                    "detail": "Callback processing failed",
-                    "code": "callback_failed",
-                },
-                status_code=502,
-            )
-
-        return Response(content={"status": "ok"}, status_code=200)
+
+                callback_headers = dict(request.headers)
+                try:
+                    data = parse_body(
+                        raw_body, callback_headers.get("content-type")
+                    )
+                except ValueError as exc:
+                    raise InvalidCallbackError(
+                        "Malformed callback body"
+                    ) from exc
+
+                if callback_inbox is not None:
+                    with tracer.span(
+                        "getpaid.callback.verify", backend=payment.backend
+                    ):
+                        await _verify_callback(
+                            flow, payment, data, callback_headers, raw_body
+                        )
+                    with tracer.span("getpaid.inbox.submit"):
+                        await callback_inbox.submit(
+                            payment, callback_headers, raw_body
+                        )
+                    if (
+                        callback_deduplicator is not None
+                        and fingerprint is not None
+                    ):
+                        await callback_deduplicator.remember(
+                            payment_id, fingerprint
+                        )
+                    span.set_attribute("outcome", "accepted")
+                    return Response(
+                        content={"status": "accepted"}, status_code=200
+                    )
+
+                try:
+                    with tracer.span(
+                        "getpaid.flow.handle_callback", backend=payment.backend
+                    ):
+                        await flow.handle_callback(
+                            payment=payment,
+                            data=data,
+                            headers=callback_headers,
+                            raw_body=raw_body,
+                        )
+                except InvalidCallbackError:
+                    raise
+                except CommunicationError as exc:
+                    if retry_store is not None:
+                        backend_config = config.backends.get(
+                            payment.backend, {}
+                        )
+                        with tracer.span("getpaid.retry_store.store"):
+                            await retry_store.store_failed_callback(
+                                payment_id=payment_id,
+                                payload=None,
+                                headers=filter_headers(
+                                    callback_headers,
+                                    backend_config.get("callback_headers"),
+                                ),
+                                backend=payment.backend,
+                                raw_body=raw_body,
+                            )
+                        logger.warning(
+                            "Callback for payment %s failed, queued for "
+                            "retry: %s",
+                            payment_id,
+                            exc,
+                        )
+                        span.set_attribute("outcome", "queued")
+                    else:
+                        span.set_attribute("outcome", "failed")
+                    return Response(
+                        content={
+                            "detail": "Callback processing failed",
+                            "code": "callback_failed",
+                        },
+                        status_code=502,
+                    )
+
+                if (
+                    callback_deduplicator is not None
+                    and fingerprint is not None
+                ):
+                    await callback_deduplicator.remember(
+                        payment_id, fingerprint
+                    )
+                span.set_attribute("outcome", "ok")
+                span.set_attribute("status", payment.status)
+                return Response(content={"status": "ok"}, status_code=200)
@@ -1,27 +1,117 @@
 """Payment CRUD routes."""
 
+import asyncio
 import logging
-from typing import Annotated, Any
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Annotated, Any
 
+import msgspec
+from getpaid_core.enums import PaymentStatus
 from getpaid_core.flow import PaymentFlow
 from getpaid_core.protocols import PaymentRepository
-from getpaid_core.registry import PluginRegistry
 from getpaid_core.types import TransactionResult
-from litestar import Controller, get, post
-from litestar.params import Dependency
+from litestar import Response, get, post
+from litestar.openapi.datastructures import ResponseSpec
+from litestar.params import Parameter
+from litestar.response import ServerSentEvent, ServerSentEventMessage
 
-from litestar_getpaid.config import GetpaidConfig
-from litestar_getpaid.exceptions import ConfigurationError, PaymentNotFoundError
-from litestar_getpaid.protocols import OrderResolver
+from litestar_getpaid.clients import backend_settings
+from litestar_getpaid.events import FINAL_STATUSES, payment_status_event
+from litestar_getpaid.exceptions import (
+    ConfigurationError,
+    InvalidFieldsError,
+    PaymentNotFoundError,
+)
+from litestar_getpaid.idempotency import request_fingerprint
+from litestar_getpaid.lookups import load_payment
+from litestar_getpaid.protocols import (
+    PaymentEventBroadcaster,
+    PaymentProjectionSource,
+    PaymentStatusEvent,
+    PaymentVersionSource,
+    ReusablePaymentRepository,
+)
+from litestar_getpaid.routes.base import GetpaidController
 from litestar_getpaid.schemas import (
     CreatePaymentRequest,
     CreatePaymentResponse,
     PaymentListResponse,
     PaymentResponse,
 )
+from litestar_getpaid.serialization import (
+    encode_json,
+    encode_payment,
+    encode_payment_list,
+    payment_fields,
+)
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
 
 logger = logging.getLogger(__name__)
 
+# Seconds between keepalive comments on idle event streams, so proxies
+# do not time the connection out.
+_KEEPALIVE_INTERVAL = 15.0
+
+
+# Fields accepted by the ``fields`` query parameter, in output order.
+_RESPONSE_FIELDS = tuple(PaymentResponse.model_fields)
+
+# Columns a projection loads in addition to the requested fields, for
+# the ETag and Cache-Control headers.
+_VERSION_FIELDS = ("updated_at", "status")
+
+# Statuses whose GET response may carry a max-age. Every other status
+# can still change, including paid (refunds) and failed or cancelled
+# (a late capture), so those responses always revalidate.
+_CACHEABLE_STATUSES = frozenset({PaymentStatus.REFUNDED})
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """Parse a comma-separated sparse fieldset.
+
+    Returns None for the full response.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        return None
+    unknown = sorted(requested.difference(_RESPONSE_FIELDS))
+    if unknown:
+        raise InvalidFieldsError(unknown)
+    return tuple(name for name in _RESPONSE_FIELDS if name in requested)
+
+
+def _etag(updated_at: datetime) -> str:
+    """Return a weak ETag for a payment last modified at ``updated_at``."""
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=UTC)
+    return f'W/"{int(updated_at.timestamp() * 1_000_000):x}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header."""
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def _cache_headers(
+    config: "GetpaidConfig", etag: str, status: str
+) -> dict[str, str]:
+    if status in _CACHEABLE_STATUSES and config.payment_cache_max_age:
+        cache_control = f"private, max-age={config.payment_cache_max_age}"
+    else:
+        cache_control = "private, no-cache"
+    return {"ETag": etag, "Cache-Control": cache_control}
+
 
 def _payment_to_response(payment: Any) -> PaymentResponse:
     """Convert a Payment protocol object to PaymentResponse."""
@@ -47,72 +137,395 @@ def _payment_to_response(payment: Any) -> PaymentResponse:
     )
 
 
-class PaymentController(Controller):
+async def _find_reusable_response(
+    config: "GetpaidConfig",
+    repository: PaymentRepository,
+    order: Any,
+    backend: str,
+) -> dict | None:
+    """Return the stored response of a payment open for reuse, if any."""
+    if not config.payment_reuse_seconds or not isinstance(
+        repository, ReusablePaymentRepository
+    ):
+        return None
+    payment = await repository.find_reusable_payment(
+        str(order.id),
+        backend,
+        created_after=datetime.now(tz=UTC)
+        - timedelta(seconds=config.payment_reuse_seconds),
+    )
+    if payment is None:
+        return None
+    # A changed cart must not reuse a payment for the old amount.
+    if (
+        payment.amount_required != order.get_total_amount()
+        or payment.currency != order.get_currency()
+    ):
+        return None
+    return getattr(payment, "transaction_result", None)
+
+
+def _status_message(event: PaymentStatusEvent) -> ServerSentEventMessage:
+    return ServerSentEventMessage(
+        data=msgspec.json.encode(
+            {
+                "payment_id": event.payment_id,
+                "order_id": event.order_id,
+                "status": event.status,
+            }
+        ),
+        event="status",
+    )
+
+
+async def _stream_statuses(
+    subscription: AbstractAsyncContextManager,
+    load_current: Callable[[], Awaitable[list[PaymentStatusEvent]]],
+    is_done: Callable[[PaymentStatusEvent], bool],
+) -> AsyncGenerator[ServerSentEventMessage, None]:
+    """Yield current statuses, then changes until ``is_done``.
+
+    Subscribes before loading the current state, so no change in
+    between is missed. Repeated events with an unchanged status are
+    skipped.
+    """
+    async with subscription as events:
+        last_status: dict[str, str] = {}
+        current = await load_current()
+        for event in current:
+            last_status[event.payment_id] = event.status
+            yield _status_message(event)
+        if any(is_done(event) for event in current):
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    anext(events), _KEEPALIVE_INTERVAL
+                )
+            except TimeoutError:
+                yield ServerSentEventMessage(data=None, comment="keepalive")
+                continue
+            if last_status.get(event.payment_id) == event.status:
+                continue
+            last_status[event.payment_id] = event.status
+            yield _status_message(event)
+            if is_done(event):
+                return
+
+
+def _require_broadcaster(
+    payment_events: PaymentEventBroadcaster | None,
+) -> PaymentEventBroadcaster:
+    if payment_events is None:
+        raise ConfigurationError("No payment event broadcaster configured")
+    return payment_events
+
+
+class PaymentController(GetpaidController):
     """Payment CRUD endpoints."""
 
     path = "/payments"
     tags = ["payments"]
 
-    @get("/{payment_id:str}")
+    # The handlers below return pre-encoded JSON bytes on the msgspec and
+    # sparse-fieldset paths, so the OpenAPI schema is given explicitly.
+    @get(
+        "/{payment_id:str}",
+        responses={
+            200: ResponseSpec(
+                PaymentResponse,
+                description="The payment, or the requested fields of it",
+            ),
+            304: ResponseSpec(None, description="Not modified"),
+        },
+    )
     async def get_payment(
         self,
         payment_id: str,
-        repository: Annotated[
-            PaymentRepository, Dependency(skip_validation=True)
-        ],
-    ) -> PaymentResponse:
-        """Get a single payment by ID."""
-        try:
-            payment = await repository.get_by_id(payment_id)
-        except KeyError as exc:
-            raise PaymentNotFoundError(payment_id) from exc
-        return _payment_to_response(payment)
-
-    @get("/")
+        if_none_match: Annotated[
+            str | None, Parameter(header="If-None-Match")
+        ] = None,
+        fields: str | None = None,
+    ) -> Response[PaymentResponse | bytes | None]:
+        """Get a single payment by ID.
+
+        ``fields`` (comma-separated ``PaymentResponse`` field names)
+        limits the response to those fields and, on repositories
+        implementing ``PaymentProjectionSource``, the columns loaded.
+
+        Responses carry a weak ETag derived from the payment's
+        ``updated_at``. A matching ``If-None-Match`` gets a 304, checked
+        with a projection query on repositories implementing
+        ``PaymentVersionSource``.
+        """
+        config = self.context.config
+        repository = self.context.repository
+        payment_lookup_guard = self.context.payment_lookup_guard
+        tracer = self.context.tracer
+        field_names = _parse_fields(fields)
+        content = None
+        with tracer.span("getpaid.payments.get", payment_id=payment_id) as span:
+            if payment_lookup_guard is not None and (
+                payment_lookup_guard.is_known_missing(payment_id)
+            ):
+                raise PaymentNotFoundError(payment_id)
+            try:
+                if if_none_match and isinstance(
+                    repository, PaymentVersionSource
+                ):
+                    with tracer.span(
+                        "getpaid.repository.get_version", payment_id=payment_id
+                    ):
+                        version = await repository.get_payment_version(
+                            payment_id
+                        )
+                    etag = _etag(version.updated_at)
+                    if _etag_matches(if_none_match, etag):
+                        span.set_attribute("status", version.status)
+                        span.set_attribute("outcome", "not_modified")
+                        return Response(
+                            content=None,
+                            status_code=304,
+                            headers=_cache_headers(
+                                config, etag, version.status
+                            ),
+                        )
+                if field_names is not None and isinstance(
+                    repository, PaymentProjectionSource
+                ):
+                    with tracer.span(
+                        "getpaid.repository.get_fields", payment_id=payment_id
+                    ):
+                        row = await repository.get_payment_fields(
+                            payment_id, {*field_names, *_VERSION_FIELDS}
+                        )
+                    updated_at, status = row["updated_at"], row["status"]
+                    content = encode_json(
+                        {name: row[name] for name in field_names}
+                    )
+                else:
+                    with tracer.span(
+                        "getpaid.repository.get", payment_id=payment_id
+                    ):
+                        payment = await repository.get_by_id(payment_id)
+                    updated_at = getattr(payment, "updated_at", None)
+                    status = payment.status
+            except KeyError as exc:
+                if payment_lookup_guard is not None:
+                    payment_lookup_guard.remember_missing(payment_id)
+                raise PaymentNotFoundError(payment_id) from exc
+            if payment_lookup_guard is not None:
+                payment_lookup_guard.record_created(payment_id)
+            span.set_attribute("status", status)
+            headers = None
+            if isinstance(updated_at, datetime):
+                etag = _etag(updated_at)
+                headers = _cache_headers(config, etag, status)
+                if if_none_match and _etag_matches(if_none_match, etag):
+                    span.set_attribute("outcome", "not_modified")
+                    return Response(
+                        content=None, status_code=304, headers=headers
+                    )
+            if content is None:
+                if field_names is not None:
+                    content = encode_json(payment_fields(payment, field_names))
+                elif config.msgspec_responses:
+                    content = encode_payment(payment)
+                else:
+                    content = _payment_to_response(payment)
+            span.set_attribute("outcome", "ok")
+            return Response(content=content, headers=headers)
+
+    @get(
+        "/",
+        responses={
+            200: ResponseSpec(
+                PaymentListResponse,
+                description="The payments of the order",
+            )
+        },
+    )
     async def list_payments(
         self,
         order_id: str,
-        repository: Annotated[
-            PaymentRepository, Dependency(skip_validation=True)
-        ],
-    ) -> PaymentListResponse:
-        """List payments for an order."""
-        payments = await repository.list_by_order(order_id)
-        items = [_payment_to_response(p) for p in payments]
-        return PaymentListResponse(items=items, total=len(items))
+        fields: str | None = None,
+    ) -> Response[PaymentListResponse | bytes]:
+        """List payments for an order.
+
+        ``fields`` limits each item as for ``get_payment``.
+        """
+        config = self.context.config
+        repository = self.context.repository
+        tracer = self.context.tracer
+        field_names = _parse_fields(fields)
+        with tracer.span("getpaid.payments.list", order_id=order_id) as span:
+            with tracer.span("getpaid.repository.list", order_id=order_id):
+                if field_names is None:
+                    payments = await repository.list_by_order(order_id)
+                elif isinstance(repository, PaymentProjectionSource):
+                    items = await repository.list_payment_fields(
+                        order_id, field_names
+                    )
+                else:
+                    payments = await repository.list_by_order(order_id)
+                    items = [payment_fields(p, field_names) for p in payments]
+            if field_names is not None:
+                span.set_attribute("count", len(items))
+                return Response(
+                    content=encode_json({"items": items, "total": len(items)})
+                )
+            span.set_attribute("count", len(payments))
+            if config.msgspec_responses:
+                return Response(content=encode_payment_list(payments))
+            items = [_payment_to_response(p) for p in payments]
+            return Response(
+                content=PaymentListResponse(items=items, total=len(items))
+            )
+
+    @get("/events")
+    async def stream_order_events(
+        self,
+        order_id: str,
+    ) -> ServerSentEvent:
+        """Stream status changes of all payments of an order.
+
+        Sends the current status of each payment first. The stream ends
+        once a payment of the order is paid.
+        """
+        repository = self.context.repository
+        payment_events = self.context.payment_events
+        tracer = self.context.tracer
+        broadcaster = _require_broadcaster(payment_events)
+
+        async def load_current() -> list[PaymentStatusEvent]:
+            with tracer.span("getpaid.repository.list", order_id=order_id):
+                payments = await repository.list_by_order(order_id)
+            return [payment_status_event(p) for p in payments]
+
+        return ServerSentEvent(
+            _stream_statuses(
+                broadcaster.subscribe(order_id=order_id),
+                load_current,
+                lambda event: event.status == PaymentStatus.PAID,
+            )
+        )
+
+    @get("/{payment_id:str}/events")
+    async def stream_payment_events(
+        self,
+        payment_id: str,
+    ) -> ServerSentEvent:
+        """Stream status changes of one payment.
+
+        Sends the current status first. The stream ends once the payment
+        reaches a final status.
+        """
+        repository = self.context.repository
+        payment_events = self.context.payment_events
+        payment_lookup_guard = self.context.payment_lookup_guard
+        tracer = self.context.tracer
+        broadcaster = _require_broadcaster(payment_events)
+        with tracer.span("getpaid.repository.get", payment_id=payment_id):
+            await load_payment(repository, payment_id, payment_lookup_guard)
+
+        async def load_current() -> list[PaymentStatusEvent]:
+            with tracer.span("getpaid.repository.get", payment_id=payment_id):
+                payment = await repository.get_by_id(payment_id)
+            return [payment_status_event(payment)]
+
+        return ServerSentEvent(
+            _stream_statuses(
+                broadcaster.subscribe(payment_id=payment_id),
+                load_current,
+                lambda event: event.status in FINAL_STATUSES,
+            )
+        )
 
     @post("/", status_code=201)
     async def create_payment(
         self,
         data: CreatePaymentRequest,
-        config: Annotated[GetpaidConfig, Dependency(skip_validation=True)],
-        repository: Annotated[
-            PaymentRepository, Dependency(skip_validation=True)
-        ],
-        registry: Annotated[PluginRegistry, Dependency(skip_validation=True)],
-        order_resolver: Annotated[
-            OrderResolver | None, Dependency(skip_validation=True)
+        idempotency_key: Annotated[
+            str | None,
+            Parameter(header="Idempotency-Key", max_length=255),
         ] = None,
     ) -> CreatePaymentResponse:
-        """Create a new payment and prepare it for processing."""
+        """Create a new payment and prepare it for processing.
+
+        With an ``Idempotency-Key`` header and an idempotency guard
+        configured, a repeated request returns the first response
+        without creating another payment. With ``payment_reuse_seconds``
+        set, a recent prepared payment for the same order, backend and
+        amount is returned instead of preparing a new one.
+        """
+        config = self.context.config
+        repository = self.context.repository
+        registry = self.context.registry
+        order_resolver = self.context.order_resolver
+        idempotency_guard = self.context.idempotency_guard
+        payment_lookup_guard = self.context.payment_lookup_guard
+        http_clients = self.context.http_clients
+        tracer = self.context.tracer
         if order_resolver is None:
             raise ConfigurationError("No order resolver configured")
-        order = await order_resolver.resolve(data.order_id)
-        flow = PaymentFlow(
-            repository=repository,
-            config=config.backends,
-            registry=registry,
-        )
-        payment = await flow.create_payment(order, data.backend)
-        result = await flow.prepare(payment)
-        if not isinstance(result, TransactionResult):
-            raise TypeError(
-                "PaymentFlow.prepare() must return TransactionResult"
+
+        async def create() -> dict:
+            with tracer.span("getpaid.order.resolve", order_id=data.order_id):
+                order = await order_resolver.resolve(data.order_id)
+            with tracer.span(
+                "getpaid.repository.find_reusable", backend=data.backend
+            ):
+                reused = await _find_reusable_response(
+                    config, repository, order, data.backend
+                )
+            if reused is not None:
+                span.set_attribute("outcome", "reused")
+                return reused
+            flow = PaymentFlow(
+                repository=repository,
+                config=backend_settings(config, http_clients),
+                registry=registry,
             )
-        return CreatePaymentResponse(
-            payment_id=str(payment.id),
-            redirect_url=result.redirect_url,
-            method=result.method.value,
-            form_data=result.form_data,
-            provider_data=result.provider_data,
-        )
+            with tracer.span(
+                "getpaid.flow.create_payment", backend=data.backend
+            ):
+                payment = await flow.create_payment(order, data.backend)
+            span.set_attribute("payment_id", str(payment.id))
+            if payment_lookup_guard is not None:
+                payment_lookup_guard.record_created(str(payment.id))
+            with tracer.span("getpaid.flow.prepare", backend=data.backend):
+                result = await flow.prepare(payment)
+            if not isinstance(result, TransactionResult):
+                raise TypeError(
+                    "PaymentFlow.prepare() must return TransactionResult"
+                )
+            response = CreatePaymentResponse(
+                payment_id=str(payment.id),
+                redirect_url=result.redirect_url,
+                method=result.method.value,
+                form_data=result.form_data,
+                provider_data=result.provider_data,
+            ).model_dump(mode="json")
+            if config.payment_reuse_seconds and isinstance(
+                repository, ReusablePaymentRepository
+            ):
+                with tracer.span("getpaid.repository.save_transaction_result"):
+                    await repository.save_transaction_result(
+                        str(payment.id), response
+                    )
+            span.set_attribute("status", payment.status)
+            span.set_attribute("outcome", "created")
+            return response
+
+        with tracer.span(
+            "getpaid.payments.create",
+            order_id=data.order_id,
+            backend=data.backend,
+        ) as span:
+            if idempotency_guard is None or idempotency_key is None:
+                return CreatePaymentResponse(**await create())
+            fingerprint = request_fingerprint(data.model_dump_json().encode())
+            response = await idempotency_guard.run(
+                idempotency_key, fingerprint, create
+            )
+            return CreatePaymentResponse(**response)
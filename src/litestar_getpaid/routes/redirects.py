@@ -1,17 +1,50 @@
 """Success/failure redirect routes."""
 
-from typing import Annotated
+from typing import TYPE_CHECKING
 
 from getpaid_core.protocols import PaymentRepository
-from litestar import Controller, get
-from litestar.params import Dependency
+from litestar import get
 from litestar.response import Redirect
 
-from litestar_getpaid.config import GetpaidConfig
 from litestar_getpaid.exceptions import PaymentNotFoundError
+from litestar_getpaid.lookups import PaymentLookupGuard
+from litestar_getpaid.protocols import Tracer
+from litestar_getpaid.routes.base import GetpaidController
+from litestar_getpaid.signing import verify_redirect_token
 
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
 
-class RedirectController(Controller):
+
+async def _check_payment(
+    config: "GetpaidConfig",
+    repository: PaymentRepository,
+    payment_id: str,
+    token: str | None,
+    guard: PaymentLookupGuard | None,
+    tracer: Tracer,
+) -> None:
+    """Ensure the payment exists.
+
+    A valid signed token proves it without a database lookup; a guard
+    checks it with a cheap existence query.
+    """
+    if token is not None and verify_redirect_token(config, payment_id, token):
+        return
+    if guard is not None:
+        with tracer.span("getpaid.repository.exists", payment_id=payment_id):
+            exists = await guard.exists(repository, payment_id)
+        if not exists:
+            raise PaymentNotFoundError(payment_id)
+        return
+    try:
+        with tracer.span("getpaid.repository.get", payment_id=payment_id):
+            await repository.get_by_id(payment_id)
+    except KeyError as exc:
+        raise PaymentNotFoundError(payment_id) from exc
+
+
+class RedirectController(GetpaidController):
     """Success/failure redirect endpoints."""
 
     tags = ["redirects"]
@@ -20,16 +53,25 @@ class RedirectController(Controller):
     async def success_redirect(
         self,
         payment_id: str,
-        config: Annotated[GetpaidConfig, Dependency(skip_validation=True)],
-        repository: Annotated[
-            PaymentRepository, Dependency(skip_validation=True)
-        ],
+        token: str | None = None,
     ) -> Redirect:
-        """Redirect user to success URL after payment."""
-        try:
-            await repository.get_by_id(payment_id)
-        except KeyError as exc:
-            raise PaymentNotFoundError(payment_id) from exc
+        """Redirect user to success URL after payment.
+
+        A valid signed ``token`` skips the payment lookup.
+        """
+        config = self.context.config
+        repository = self.context.repository
+        payment_lookup_guard = self.context.payment_lookup_guard
+        tracer = self.context.tracer
+        with tracer.span("getpaid.redirect.success", payment_id=payment_id):
+            await _check_payment(
+                config,
+                repository,
+                payment_id,
+                token,
+                payment_lookup_guard,
+                tracer,
+            )
         sep = "&" if "?" in config.success_url else "?"
         url = f"{config.success_url}{sep}payment_id={payment_id}"
         return Redirect(path=url)
@@ -38,16 +80,25 @@ class RedirectController(Controller):
     async def failure_redirect(
         self,
         payment_id: str,
-        config: Annotated[GetpaidConfig, Dependency(skip_validation=True)],
-        repository: Annotated[
-            PaymentRepository, Dependency(skip_validation=True)
-        ],
+        token: str | None = None,
     ) -> Redirect:
-        """Redirect user to failure URL after payment."""
-        try:
-            await repository.get_by_id(payment_id)
-        except KeyError as exc:
-            raise PaymentNotFoundError(payment_id) from exc
+        """Redirect user to failure URL after payment.
+
+        A valid signed ``token`` skips the payment lookup.
+        """
+        config = self.context.config
+        repository = self.context.repository
+        payment_lookup_guard = self.context.payment_lookup_guard
+        tracer = self.context.tracer
+        with tracer.span("getpaid.redirect.failure", payment_id=payment_id):
+            await _check_payment(
+                config,
+                repository,
+                payment_id,
+                token,
+                payment_lookup_guard,
+                tracer,
+            )
         sep = "&" if "?" in config.failure_url else "?"
         url = f"{config.failure_url}{sep}payment_id={payment_id}"
         return Redirect(path=url)
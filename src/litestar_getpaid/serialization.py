@@ -0,0 +1,102 @@
+"""msgspec-based JSON encoding of payment responses.
+
+Produces the same JSON as the pydantic schemas in
+``litestar_getpaid.schemas``, which remain the documented OpenAPI
+models, without building and validating a pydantic model per payment.
+Decimal amounts are encoded as strings.
+"""
+
+from collections.abc import Sequence
+from decimal import Decimal
+from typing import Any
+
+import msgspec
+
+
+class PaymentStruct(msgspec.Struct):
+    """msgspec counterpart of ``PaymentResponse``."""
+
+    id: str
+    order_id: str
+    amount_required: Decimal
+    currency: str
+    status: str
+    backend: str
+    external_id: str | None
+    description: str | None
+    amount_paid: Decimal
+    amount_locked: Decimal
+    amount_refunded: Decimal
+    fraud_status: str | None
+    fraud_message: str | None
+    provider_data: dict = {}
+
+
+class PaymentListStruct(msgspec.Struct):
+    """msgspec counterpart of ``PaymentListResponse``."""
+
+    items: list[PaymentStruct]
+    total: int
+
+
+_encoder = msgspec.json.Encoder(decimal_format="string")
+
+
+def payment_to_struct(payment: Any) -> PaymentStruct:
+    """Map a Payment protocol object to a ``PaymentStruct``.
+
+    The instance ``__dict__``, where SQLAlchemy keeps the loaded
+    columns, is converted in a single msgspec call instead of a
+    descriptor lookup per field. Objects whose dict misses a field or
+    holds another type (expired rows, an ``order`` instead of an
+    ``order_id``, non-string IDs) are read attribute by attribute.
+    """
+    try:
+        return msgspec.convert(vars(payment), PaymentStruct)
+    except (TypeError, msgspec.ValidationError):
+        return _payment_attributes_to_struct(payment)
+
+
+def _payment_attributes_to_struct(payment: Any) -> PaymentStruct:
+    order_id = getattr(payment, "order_id", None)
+    if order_id is None:
+        order = getattr(payment, "order", None)
+        order_id = getattr(order, "id", "") if order is not None else ""
+    return PaymentStruct(
+        id=str(payment.id),
+        order_id=str(order_id),
+        amount_required=payment.amount_required,
+        currency=payment.currency,
+        status=payment.status,
+        backend=payment.backend,
+        external_id=payment.external_id,
+        description=payment.description,
+        amount_paid=payment.amount_paid,
+        amount_locked=payment.amount_locked,
+        amount_refunded=payment.amount_refunded,
+        fraud_status=payment.fraud_status,
+        fraud_message=payment.fraud_message,
+        provider_data=getattr(payment, "provider_data", {}),
+    )
+
+
+def encode_payment(payment: Any) -> bytes:
+    """Encode one payment as ``PaymentResponse`` JSON."""
+    return _encoder.encode(payment_to_struct(payment))
+
+
+def encode_payment_list(payments: list[Any]) -> bytes:
+    """Encode payments as ``PaymentListResponse`` JSON."""
+    items = [payment_to_struct(payment) for payment in payments]
+    return _encoder.encode(PaymentListStruct(items=items, total=len(items)))
+
+
+def payment_fields(payment: Any, fields: Sequence[str]) -> dict[str, Any]:
+    """Return the named ``PaymentResponse`` fields of a payment."""
+    struct = payment_to_struct(payment)
+    return {name: getattr(struct, name) for name in fields}
+
+
+def encode_json(value: Any) -> bytes:
+    """Encode ``value`` as JSON, with Decimal amounts as strings."""
+    return _encoder.encode(value)
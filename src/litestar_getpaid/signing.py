@@ -0,0 +1,69 @@
+"""HMAC-signed redirect tokens.
+
+A token binds a payment ID and an expiry time. Append it as ``token`` to
+the success and failure URLs handed to the gateway, and the redirect
+routes can trust the payment ID without loading the payment.
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+from typing import TYPE_CHECKING
+
+from litestar_getpaid.exceptions import ConfigurationError
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
+
+
+def _signature(secret: str, payment_id: str, expires: int) -> str:
+    digest = hmac.new(
+        secret.encode(),
+        f"{payment_id}:{expires}".encode(),
+        hashlib.sha256,
+    ).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def create_redirect_token(
+    config: "GetpaidConfig",
+    payment_id: str,
+    *,
+    now: float | None = None,
+) -> str:
+    """Return a token for ``payment_id`` valid for
+    ``config.redirect_token_ttl`` seconds.
+
+    Raises ConfigurationError when no ``redirect_secret`` is set.
+    """
+    if config.redirect_secret is None:
+        raise ConfigurationError("No redirect_secret configured")
+    issued = time.time() if now is None else now
+    expires = int(issued) + config.redirect_token_ttl
+    secret = config.redirect_secret.get_secret_value()
+    return f"{expires:x}.{_signature(secret, payment_id, expires)}"
+
+
+def verify_redirect_token(
+    config: "GetpaidConfig",
+    payment_id: str,
+    token: str,
+    *,
+    now: float | None = None,
+) -> bool:
+    """Check that ``token`` was issued for ``payment_id`` and has not
+    expired. Always False without a ``redirect_secret``."""
+    if config.redirect_secret is None:
+        return False
+    expires_hex, _, signature = token.partition(".")
+    try:
+        expires = int(expires_hex, 16)
+    except ValueError:
+        return False
+    if expires < (time.time() if now is None else now):
+        return False
+    secret = config.redirect_secret.get_secret_value()
+    return hmac.compare_digest(
+        signature, _signature(secret, payment_id, expires)
+    )
@@ -0,0 +1,179 @@
+"""Tracing spans around payment operations.
+
+The routes, the retry loop and the callback inbox open a span per
+operation and one per stage inside it: order resolution, repository
+reads, ``flow.prepare``, ``flow.handle_callback`` and retry-store
+writes. Spans carry the backend, payment status and outcome as
+attributes, so a slow callback can be attributed to the database or
+the gateway.
+
+``NOOP_TRACER`` is the default and records nothing. ``InMemoryTracer``
+keeps finished spans for tests. ``OpenTelemetryTracer`` forwards spans
+to OpenTelemetry (``litestar-getpaid[opentelemetry]``).
+"""
+
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from litestar_getpaid.exceptions import ConfigurationError
+
+# Prefix of attribute keys on OpenTelemetry spans.
+ATTRIBUTE_PREFIX = "getpaid."
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class NoopTracer:
+    """Tracer recording nothing.
+
+    Every span is one shared object, so disabled tracing costs a method
+    call per span.
+    """
+
+    def span(self, name: str, **attributes: Any) -> _NoopSpan:
+        return NOOP_SPAN
+
+
+NOOP_TRACER = NoopTracer()
+
+
+@dataclass(slots=True)
+class FinishedSpan:
+    """A span recorded by ``InMemoryTracer``."""
+
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    duration: float = 0.0
+    parent: str | None = None
+    error: str | None = None
+
+
+_current_span: ContextVar["_InMemorySpan | None"] = ContextVar(
+    "getpaid_current_span", default=None
+)
+
+
+class _InMemorySpan:
+    __slots__ = (
+        "_parent",
+        "_started",
+        "_token",
+        "_tracer",
+        "attributes",
+        "name",
+    )
+
+    def __init__(
+        self, tracer: "InMemoryTracer", name: str, attributes: dict
+    ) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "_InMemorySpan":
+        self._parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: type | None, *exc_info: object) -> None:
+        duration = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        self._tracer.spans.append(
+            FinishedSpan(
+                name=self.name,
+                attributes=self.attributes,
+                duration=duration,
+                parent=self._parent.name if self._parent else None,
+                error=exc_type.__name__ if exc_type else None,
+            )
+        )
+
+
+class InMemoryTracer:
+    """Tracer keeping finished spans in ``spans``, for tests.
+
+    Spans are appended when they end, so a parent comes after its
+    children.
+    """
+
+    def __init__(self) -> None:
+        self.spans: list[FinishedSpan] = []
+
+    def span(self, name: str, **attributes: Any) -> _InMemorySpan:
+        return _InMemorySpan(self, name, attributes)
+
+    def find(self, name: str) -> list[FinishedSpan]:
+        """Return the finished spans called ``name``."""
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class _OpenTelemetrySpan:
+    __slots__ = ("_span",)
+
+    def __init__(self, span: Any) -> None:
+        self._span = span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self._span.set_attribute(ATTRIBUTE_PREFIX + key, value)
+
+
+class OpenTelemetryTracer:
+    """Tracer forwarding spans to an OpenTelemetry tracer.
+
+    Uses the ``litestar_getpaid`` tracer of the global tracer provider
+    unless ``tracer`` is given. Attribute keys are prefixed with
+    ``getpaid.``; exceptions are recorded on the span and set its
+    status to error. Requires ``opentelemetry-api``.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:  # pragma: no cover - optional dependency
+                raise ConfigurationError(
+                    "OpenTelemetryTracer requires the 'opentelemetry-api' "
+                    "package"
+                ) from None
+            tracer = trace.get_tracer("litestar_getpaid")
+        self._tracer = tracer
+
+    @contextmanager
+    def span(
+        self, name: str, **attributes: Any
+    ) -> Generator[_OpenTelemetrySpan]:
+        with self._tracer.start_as_current_span(
+            name,
+            attributes={
+                ATTRIBUTE_PREFIX + key: value
+                for key, value in attributes.items()
+                if value is not None
+            },
+        ) as span:
+            yield _OpenTelemetrySpan(span)
@@ -0,0 +1,149 @@
+"""Startup warm-up of configured payment backends.
+
+The first request using a backend otherwise pays for importing it and
+for whatever the processor sets up on first use (HTTP pools, OAuth
+tokens). Run ``warm_up_backends()`` at app startup to move that cost out
+of the request path.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from getpaid_core.registry import PluginRegistry
+
+from litestar_getpaid.clients import BackendHTTPClients, backend_settings
+from litestar_getpaid.exceptions import ConfigurationError
+from litestar_getpaid.protocols import WarmableBackend
+from litestar_getpaid.registry import LitestarPluginRegistry
+
+if TYPE_CHECKING:
+    from litestar_getpaid.config import GetpaidConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class BackendWarmup:
+    """Outcome of warming up one backend."""
+
+    slug: str
+    seconds: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(slots=True)
+class WarmupReport:
+    """Outcome of a ``warm_up_backends()`` run."""
+
+    backends: dict[str, BackendWarmup] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(backend.ok for backend in self.backends.values())
+
+    @property
+    def failed(self) -> list[str]:
+        return [
+            slug for slug, backend in self.backends.items() if not backend.ok
+        ]
+
+
+async def _warm_up(
+    registry: PluginRegistry,
+    slug: str,
+    backend_config: dict,
+    *,
+    prefetch: bool,
+) -> None:
+    # Imports block, so resolve the class off the event loop.
+    processor_class = await asyncio.to_thread(registry.get_by_slug, slug)
+    if prefetch and isinstance(processor_class, WarmableBackend):
+        await processor_class.warm_up(backend_config)
+
+
+async def _timed(
+    registry: PluginRegistry,
+    slug: str,
+    backend_config: dict,
+    *,
+    prefetch: bool,
+    timeout: float,
+) -> BackendWarmup:
+    started = time.perf_counter()
+    error = None
+    try:
+        await asyncio.wait_for(
+            _warm_up(registry, slug, backend_config, prefetch=prefetch),
+            timeout,
+        )
+    except TimeoutError:
+        error = f"timed out after {timeout}s"
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    result = BackendWarmup(
+        slug=slug, seconds=time.perf_counter() - started, error=error
+    )
+    if error is None:
+        logger.info("Warmed up backend %r in %.3fs", slug, result.seconds)
+    else:
+        logger.warning("Warm-up of backend %r failed: %s", slug, error)
+    return result
+
+
+async def warm_up_backends(
+    config: "GetpaidConfig",
+    registry: PluginRegistry | None = None,
+    *,
+    timeout: float = 10.0,
+    prefetch: bool = True,
+    strict: bool = False,
+    http_clients: BackendHTTPClients | None = None,
+) -> WarmupReport:
+    """Resolve every backend in ``config.backends`` concurrently.
+
+    Each backend class is imported, and with ``prefetch`` its
+    ``warm_up()`` hook (see ``WarmableBackend``) is awaited with the
+    backend settings. Every backend gets ``timeout`` seconds. Failures
+    are logged and reported; with ``strict`` they raise
+    ``ConfigurationError`` instead, so a misconfigured app fails to
+    start.
+
+    Open ``http_clients`` first to have their pools passed to the
+    hooks as the ``http_client`` setting.
+    """
+    registry = registry or LitestarPluginRegistry()
+    settings = backend_settings(config, http_clients)
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            _timed(
+                registry,
+                slug,
+                backend_config,
+                prefetch=prefetch,
+                timeout=timeout,
+            )
+            for slug, backend_config in settings.items()
+        )
+    )
+    report = WarmupReport(
+        backends={result.slug: result for result in results},
+        elapsed=time.perf_counter() - started,
+    )
+    if strict and not report.ok:
+        raise ConfigurationError(
+            "Payment backend warm-up failed: "
+            + "; ".join(
+                f"{slug}: {report.backends[slug].error}"
+                for slug in report.failed
+            )
+        )
+    return report
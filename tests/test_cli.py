@@ -0,0 +1,141 @@
+"""Tests for the Litestar CLI plugin."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from litestar_getpaid.cli import GetpaidCLIPlugin
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.contrib.memory.retry_store import InMemoryRetryStore
+
+
+@pytest.fixture
+def config():
+    return GetpaidConfig(
+        default_backend="dummy",
+        success_url="/ok",
+        failure_url="/fail",
+        backends={"dummy": {}, "other": {}},
+    )
+
+
+@pytest.fixture
+def retry_store():
+    return InMemoryRetryStore(backoff_seconds=0)
+
+
+@pytest.fixture
+def mock_repo():
+    async def get_by_id(payment_id):
+        payment = AsyncMock()
+        payment.id = payment_id
+        payment.backend = "dummy"
+        return payment
+
+    repo = AsyncMock()
+    repo.get_by_id = AsyncMock(side_effect=get_by_id)
+    return repo
+
+
+@pytest.fixture
+def cli(config, mock_repo, retry_store):
+    group = click.Group()
+    GetpaidCLIPlugin(
+        config=config,
+        repository=mock_repo,
+        retry_store=retry_store,
+    ).on_cli_init(group)
+    return group
+
+
+def enqueue(retry_store, count, backend="dummy"):
+    async def store_all():
+        for i in range(count):
+            await retry_store.store_failed_callback(
+                payment_id=f"pay-{backend}-{i}",
+                payload={"status": "paid"},
+                headers={},
+                backend=backend,
+            )
+
+    asyncio.run(store_all())
+
+
+def test_drain_replays_all_due_retries(cli, retry_store):
+    enqueue(retry_store, 5)
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        mock_flow_cls.return_value.handle_callback = AsyncMock()
+        result = CliRunner().invoke(
+            cli,
+            [
+                "getpaid",
+                "retries",
+                "drain",
+                "--concurrency",
+                "2",
+                "--batch-size",
+                "2",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "batch 3: 5 processed (succeeded=5)" in result.output
+    assert "Drained 5 retries" in result.output
+    assert len(retry_store) == 0
+
+
+def test_drain_backend_filter(cli, retry_store):
+    enqueue(retry_store, 2, backend="dummy")
+    enqueue(retry_store, 3, backend="other")
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        mock_flow_cls.return_value.handle_callback = AsyncMock()
+        result = CliRunner().invoke(
+            cli, ["getpaid", "retries", "drain", "--backend", "other"]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "Drained 3 retries" in result.output
+    assert len(retry_store) == 2
+
+
+def test_drain_dry_run_reports_queue(cli, retry_store):
+    enqueue(retry_store, 2)
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        result = CliRunner().invoke(
+            cli, ["getpaid", "retries", "drain", "--dry-run"]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "dummy: 2 pending" in result.output
+    assert "2 due now" in result.output
+    mock_flow_cls.assert_not_called()
+    assert len(retry_store) == 2
+
+
+def test_drain_runs_inside_store_lifecycle(config, mock_repo, tmp_path):
+    """The store is started and stopped, so its final snapshot is
+    written."""
+    path = tmp_path / "retries.json"
+    seeded = InMemoryRetryStore(backoff_seconds=0, snapshot_path=path)
+    enqueue(seeded, 2)
+    asyncio.run(seeded.snapshot())
+    group = click.Group()
+    GetpaidCLIPlugin(
+        config=config,
+        repository=mock_repo,
+        retry_store=InMemoryRetryStore(backoff_seconds=0, snapshot_path=path),
+    ).on_cli_init(group)
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        mock_flow_cls.return_value.handle_callback = AsyncMock()
+        result = CliRunner().invoke(group, ["getpaid", "retries", "drain"])
+
+    assert result.exit_code == 0, result.output
+    assert "Drained 2 retries" in result.output
+    assert len(InMemoryRetryStore(snapshot_path=path)) == 0
@@ -0,0 +1,67 @@
+"""Tests for the per-backend HTTP connection pools."""
+
+import httpx
+
+from litestar_getpaid.clients import BackendHTTPClients, backend_settings
+from litestar_getpaid.config import GetpaidConfig
+
+
+def _config() -> GetpaidConfig:
+    return GetpaidConfig(
+        default_backend="payu",
+        success_url="/ok",
+        failure_url="/fail",
+        backends={
+            "payu": {
+                "pos_id": "1",
+                "http": {
+                    "max_connections": 5,
+                    "max_keepalive_connections": 2,
+                    "keepalive_expiry": 30,
+                    "timeout": 3,
+                    "connect_timeout": 1,
+                },
+            },
+            "dummy": {},
+        },
+    )
+
+
+async def test_clients_follow_backend_http_settings():
+    async with BackendHTTPClients(_config()) as clients:
+        payu = clients.get("payu")
+        assert isinstance(payu, httpx.AsyncClient)
+        assert payu.timeout == httpx.Timeout(3, connect=1)
+        pool = payu._transport._pool  # ty: ignore[unresolved-attribute]
+        assert pool._max_connections == 5
+        assert pool._max_keepalive_connections == 2
+        assert pool._keepalive_expiry == 30
+        dummy = clients.get("dummy")
+        assert dummy is not None
+        assert dummy.timeout == httpx.Timeout(10.0)
+
+
+async def test_backend_settings_carry_open_clients():
+    config = _config()
+    clients = BackendHTTPClients(config)
+    assert backend_settings(config, clients) is config.backends
+    assert backend_settings(config, None) is config.backends
+
+    await clients.start()
+    settings = backend_settings(config, clients)
+    assert settings["payu"]["http_client"] is clients.get("payu")
+    assert settings["payu"]["pos_id"] == "1"
+    assert "http_client" not in config.backends["payu"]
+    await clients.stop()
+
+
+async def test_stop_closes_clients():
+    clients = BackendHTTPClients(_config())
+    await clients.start()
+    payu = clients.get("payu")
+    assert payu is not None
+    await clients.stop()
+
+    assert payu.is_closed
+    assert clients.get("payu") is None
+    assert clients.backend_settings() is clients._config.backends
@@ -0,0 +1,52 @@
+"""Tests for the in-memory callback deduplicator."""
+
+from litestar_getpaid.contrib.memory.dedup import InMemoryCallbackDeduplicator
+from litestar_getpaid.protocols import CallbackDeduplicator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_implements_protocol():
+    assert isinstance(InMemoryCallbackDeduplicator(), CallbackDeduplicator)
+
+
+async def test_remembered_callback_is_duplicate():
+    dedup = InMemoryCallbackDeduplicator()
+    assert not await dedup.is_duplicate("pay-1", "abc")
+
+    await dedup.remember("pay-1", "abc")
+
+    assert await dedup.is_duplicate("pay-1", "abc")
+    assert not await dedup.is_duplicate("pay-1", "def")
+    assert not await dedup.is_duplicate("pay-2", "abc")
+
+
+async def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    dedup = InMemoryCallbackDeduplicator(ttl=10, clock=clock)
+    await dedup.remember("pay-1", "abc")
+
+    clock.now = 9
+    assert await dedup.is_duplicate("pay-1", "abc")
+    clock.now = 10
+    assert not await dedup.is_duplicate("pay-1", "abc")
+    assert len(dedup) == 0
+
+
+async def test_least_recently_used_entry_is_evicted():
+    dedup = InMemoryCallbackDeduplicator(max_entries=2)
+    await dedup.remember("pay-1", "a")
+    await dedup.remember("pay-2", "b")
+    assert await dedup.is_duplicate("pay-1", "a")
+
+    await dedup.remember("pay-3", "c")
+
+    assert len(dedup) == 2
+    assert await dedup.is_duplicate("pay-1", "a")
+    assert not await dedup.is_duplicate("pay-2", "b")
@@ -0,0 +1,75 @@
+"""Tests for the in-memory Idempotency-Key store."""
+
+from litestar_getpaid.contrib.memory.idempotency import (
+    InMemoryIdempotencyStore,
+)
+from litestar_getpaid.protocols import IdempotencyStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_implements_protocol():
+    assert isinstance(InMemoryIdempotencyStore(), IdempotencyStore)
+
+
+async def test_reserve_complete_get():
+    store = InMemoryIdempotencyStore()
+    assert await store.reserve("key-1", "fp")
+    assert not await store.reserve("key-1", "fp")
+    record = await store.get("key-1")
+    assert record is not None
+    assert record.response is None
+
+    await store.complete("key-1", {"payment_id": "pay-1"})
+
+    record = await store.get("key-1")
+    assert record is not None
+    assert record.fingerprint == "fp"
+    assert record.response == {"payment_id": "pay-1"}
+
+
+async def test_release_frees_key():
+    store = InMemoryIdempotencyStore()
+    await store.reserve("key-1", "fp")
+    await store.release("key-1")
+    assert await store.get("key-1") is None
+    assert await store.reserve("key-1", "fp")
+
+
+async def test_records_expire():
+    clock = FakeClock()
+    store = InMemoryIdempotencyStore(ttl=100, in_flight_ttl=10, clock=clock)
+    await store.reserve("stale", "fp")
+    await store.reserve("done", "fp")
+    await store.complete("done", {})
+
+    clock.now = 50
+    assert await store.get("stale") is None
+    assert await store.get("done") is not None
+
+    clock.now = 200
+    assert store.purge_expired() == 1
+    assert len(store) == 0
+
+
+async def test_refresh_extends_in_flight_reservation():
+    clock = FakeClock()
+    store = InMemoryIdempotencyStore(ttl=100, in_flight_ttl=10, clock=clock)
+    await store.reserve("key-1", "fp")
+
+    clock.now = 8
+    await store.refresh("key-1")
+    clock.now = 15
+    assert await store.get("key-1") is not None
+
+    await store.complete("key-1", {})
+    clock.now = 100
+    await store.refresh("key-1")
+    clock.now = 116
+    assert await store.get("key-1") is None
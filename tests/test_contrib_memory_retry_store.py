@@ -0,0 +1,211 @@
+"""Tests for the in-memory retry store implementation."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from litestar_getpaid.contrib.memory.retry_store import InMemoryRetryStore
+from litestar_getpaid.protocols import CallbackRetryStore
+
+
+@pytest.fixture
+def store():
+    return InMemoryRetryStore(backoff_seconds=10)
+
+
+@pytest.fixture
+def due_store():
+    """Store whose new retries are due immediately."""
+    return InMemoryRetryStore(backoff_seconds=0)
+
+
+def test_implements_protocol(store):
+    assert isinstance(store, CallbackRetryStore)
+
+
+async def test_store_failed_callback(store):
+    """Stores a failed callback and returns an ID."""
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1",
+        payload={"status": "paid"},
+        headers={"content-type": "application/json"},
+    )
+    assert isinstance(retry_id, str)
+    assert store.get(retry_id)["status"] == "pending"
+    assert len(store) == 1
+
+
+async def test_get_due_retries_skips_future(store):
+    """Freshly stored retries are scheduled after the backoff."""
+    await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    assert await store.get_due_retries() == []
+
+
+async def test_get_due_retries_orders_by_due_time(due_store):
+    """Due retries are returned earliest first and respect the limit."""
+    first = await due_store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    second = await due_store.store_failed_callback(
+        payment_id="pay-2", payload={}, headers={}
+    )
+
+    retries = await due_store.get_due_retries(limit=1)
+    assert [r["id"] for r in retries] == [first]
+    retries = await due_store.get_due_retries(limit=1)
+    assert [r["id"] for r in retries] == [second]
+
+
+async def test_get_due_retries_leases_entries(due_store):
+    """A claimed retry is not handed out twice."""
+    await due_store.store_failed_callback(
+        payment_id="pay-1", payload={"status": "paid"}, headers={}
+    )
+
+    retries = await due_store.get_due_retries()
+    assert retries[0]["payload"] == {"status": "paid"}
+    assert retries[0]["attempts"] == 0
+    assert await due_store.get_due_retries() == []
+
+
+async def test_expired_lease_is_handed_out_again():
+    store = InMemoryRetryStore(backoff_seconds=0, visibility_timeout=0)
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+
+    assert [r["id"] for r in await store.get_due_retries()] == [retry_id]
+    assert [r["id"] for r in await store.get_due_retries()] == [retry_id]
+
+
+async def test_mark_succeeded_discards_entry(store):
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    await store.mark_succeeded(retry_id)
+    assert store.get(retry_id) is None
+    assert len(store) == 0
+
+
+async def test_mark_failed(store):
+    """Marks a retry as failed with error and increments attempts."""
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    await store.mark_failed(retry_id, error="Connection timeout")
+
+    entry = store.get(retry_id)
+    assert entry["attempts"] == 1
+    assert entry["last_error"] == "Connection timeout"
+    assert entry["next_retry_at"] > datetime.now(tz=UTC)
+
+
+async def test_mark_deferred_keeps_attempts(due_store):
+    """Deferred retries are rescheduled without counting an attempt."""
+    retry_id = await due_store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    until = datetime.now(tz=UTC) + timedelta(seconds=30)
+    await due_store.mark_deferred(retry_id, until=until)
+
+    assert await due_store.get_due_retries() == []
+    assert due_store.get(retry_id)["attempts"] == 0
+    assert due_store.next_due_at() == until
+
+
+async def test_mark_exhausted(store):
+    """Exhausted retries are kept as dead letters."""
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    await store.mark_exhausted(retry_id)
+
+    assert store.get(retry_id)["status"] == "exhausted"
+    assert [d["id"] for d in store.dead_letters()] == [retry_id]
+    assert store.next_due_at() is None
+
+
+async def test_wait_for_due_times_out_when_empty(store):
+    assert await store.wait_for_due(timeout=0.01) is False
+
+
+async def test_wait_for_due_wakes_on_enqueue(due_store):
+    """Enqueueing a retry wakes up a sleeping worker."""
+    waiter = asyncio.create_task(due_store.wait_for_due(timeout=5))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await due_store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+
+    assert await asyncio.wait_for(waiter, 1) is True
+
+
+async def test_wait_for_due_ignores_other_backends(due_store):
+    """A filtered waiter sleeps while only other backends' retries are due."""
+    await due_store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}, backend="payu"
+    )
+
+    assert await due_store.wait_for_due(timeout=0.05, backend="stripe") is False
+    assert await due_store.wait_for_due(timeout=0.05, backend="payu") is True
+
+
+async def test_snapshot_round_trip(tmp_path):
+    """Pending and dead entries survive a restart via the snapshot."""
+    path = tmp_path / "retries.json"
+    store = InMemoryRetryStore(snapshot_path=path)
+    pending = await store.store_failed_callback(
+        payment_id="pay-1",
+        payload={"status": "paid"},
+        headers={"a": "b"},
+        raw_body=b'{"status":"paid"}',
+    )
+    dead = await store.store_failed_callback(
+        payment_id="pay-2", payload={}, headers={}
+    )
+    await store.mark_exhausted(dead)
+    await store.snapshot()
+
+    restored = InMemoryRetryStore(snapshot_path=path)
+    entry = restored.get(pending)
+    assert entry is not None
+    assert entry["payload"] == {"status": "paid"}
+    assert entry["headers"] == {"a": "b"}
+    assert entry["raw_body"] == b'{"status":"paid"}'
+    entry = restored.get(dead)
+    assert entry is not None
+    assert entry["status"] == "exhausted"
+    assert restored.next_due_at() == store.next_due_at()
+
+
+async def test_stop_writes_final_snapshot(tmp_path):
+    path = tmp_path / "retries.json"
+    async with InMemoryRetryStore(snapshot_path=path) as store:
+        await store.store_failed_callback(
+            payment_id="pay-1", payload={}, headers={}
+        )
+    assert len(InMemoryRetryStore(snapshot_path=path)) == 1
+
+
+async def test_failed_snapshot_is_retried(tmp_path):
+    """A failed periodic write leaves the store dirty for the next one."""
+    path = tmp_path / "missing" / "retries.json"
+    async with InMemoryRetryStore(
+        snapshot_path=path, snapshot_interval=0.01
+    ) as store:
+        await store.store_failed_callback(
+            payment_id="pay-1", payload={}, headers={}
+        )
+        await asyncio.sleep(0.05)
+        assert not path.exists()
+        path.parent.mkdir()
+        for _ in range(100):
+            if path.exists():
+                break
+            await asyncio.sleep(0.01)
+        assert path.exists()
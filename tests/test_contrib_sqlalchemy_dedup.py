@@ -0,0 +1,84 @@
+"""Tests for the SQLAlchemy callback deduplicator."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from litestar_getpaid.contrib.sqlalchemy.dedup import (
+    SQLAlchemyCallbackDeduplicator,
+)
+from litestar_getpaid.contrib.sqlalchemy.models import (
+    Base,
+    CallbackDedupModel,
+)
+
+from tests.database import get_test_database_url
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(get_test_database_url())
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session_factory(engine):
+    return async_sessionmaker(engine, class_=AsyncSession)
+
+
+@pytest.fixture
+def dedup(session_factory):
+    return SQLAlchemyCallbackDeduplicator(session_factory, ttl=60)
+
+
+async def _age_rows(session_factory, seconds: int) -> None:
+    async with session_factory() as session:
+        await session.execute(
+            update(CallbackDedupModel).values(
+                created_at=datetime.now(tz=UTC) - timedelta(seconds=seconds)
+            )
+        )
+        await session.commit()
+
+
+async def test_remembered_callback_is_duplicate(dedup):
+    assert not await dedup.is_duplicate("pay-1", "abc")
+
+    await dedup.remember("pay-1", "abc")
+
+    assert await dedup.is_duplicate("pay-1", "abc")
+    assert not await dedup.is_duplicate("pay-1", "def")
+
+
+async def test_remember_twice_keeps_one_row(dedup, session_factory):
+    await dedup.remember("pay-1", "abc")
+    await _age_rows(session_factory, 120)
+    assert not await dedup.is_duplicate("pay-1", "abc")
+
+    await dedup.remember("pay-1", "abc")
+
+    assert await dedup.is_duplicate("pay-1", "abc")
+    async with session_factory() as session:
+        count = await session.scalar(
+            select(func.count()).select_from(CallbackDedupModel)
+        )
+    assert count == 1
+
+
+async def test_purge_expired(dedup, session_factory):
+    await dedup.remember("pay-1", "old")
+    await _age_rows(session_factory, 120)
+    await dedup.remember("pay-1", "new")
+
+    assert await dedup.purge_expired() == 1
+    assert await dedup.is_duplicate("pay-1", "new")
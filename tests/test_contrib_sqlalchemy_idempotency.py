@@ -0,0 +1,109 @@
+"""Tests for the SQLAlchemy Idempotency-Key store."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from litestar_getpaid.contrib.sqlalchemy.idempotency import (
+    SQLAlchemyIdempotencyStore,
+)
+from litestar_getpaid.contrib.sqlalchemy.models import (
+    Base,
+    IdempotencyKeyModel,
+)
+from litestar_getpaid.protocols import IdempotencyStore
+from tests.database import get_test_database_url
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(get_test_database_url())
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def session_factory(engine):
+    return async_sessionmaker(engine, class_=AsyncSession)
+
+
+@pytest.fixture
+def store(session_factory):
+    return SQLAlchemyIdempotencyStore(session_factory)
+
+
+def test_implements_protocol(store):
+    assert isinstance(store, IdempotencyStore)
+
+
+async def test_reserve_complete_get(store):
+    assert await store.reserve("key-1", "fp")
+    assert not await store.reserve("key-1", "fp")
+    assert (await store.get("key-1")).response is None
+
+    await store.complete("key-1", {"payment_id": "pay-1"})
+
+    record = await store.get("key-1")
+    assert record.fingerprint == "fp"
+    assert record.response == {"payment_id": "pay-1"}
+
+
+async def test_release_frees_key(store):
+    await store.reserve("key-1", "fp")
+    await store.release("key-1")
+    assert await store.reserve("key-1", "fp")
+
+
+async def test_expired_key_can_be_reserved_again(store, session_factory):
+    await store.reserve("key-1", "fp")
+    await store.complete("key-1", {})
+    async with session_factory() as session:
+        await session.execute(
+            update(IdempotencyKeyModel).values(
+                expires_at=datetime.now(tz=UTC) - timedelta(seconds=1)
+            )
+        )
+        await session.commit()
+
+    assert await store.get("key-1") is None
+    assert await store.reserve("key-1", "fp-2")
+    assert (await store.get("key-1")).fingerprint == "fp-2"
+
+
+async def test_purge_expired(store, session_factory):
+    await store.reserve("key-1", "fp")
+    await store.reserve("key-2", "fp")
+    async with session_factory() as session:
+        await session.execute(
+            update(IdempotencyKeyModel)
+            .where(IdempotencyKeyModel.key == "key-1")
+            .values(expires_at=datetime.now(tz=UTC) - timedelta(seconds=1))
+        )
+        await session.commit()
+
+    assert await store.purge_expired() == 1
+
+
+async def test_refresh_extends_in_flight_reservation(store, session_factory):
+    await store.reserve("key-1", "fp")
+    soon = datetime.now(tz=UTC) + timedelta(seconds=1)
+    async with session_factory() as session:
+        await session.execute(
+            update(IdempotencyKeyModel).values(expires_at=soon)
+        )
+        await session.commit()
+
+    await store.refresh("key-1")
+
+    async with session_factory() as session:
+        row = await session.get(IdempotencyKeyModel, "key-1")
+        assert row.expires_at.replace(tzinfo=UTC) > soon + timedelta(seconds=30)
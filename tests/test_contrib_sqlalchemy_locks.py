@@ -0,0 +1,57 @@
+"""Tests for PostgreSQL advisory payment locks."""
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from litestar_getpaid.contrib.sqlalchemy.locks import (
+    PostgresAdvisoryPaymentLock,
+    advisory_lock_key,
+)
+
+from tests.database import get_test_database_url
+
+
+def test_advisory_lock_key_is_stable_signed_64_bit():
+    key = advisory_lock_key("pay-1")
+    assert key == advisory_lock_key("pay-1")
+    assert key != advisory_lock_key("pay-2")
+    assert -(2**63) <= key < 2**63
+
+
+async def test_requires_postgresql():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    with pytest.raises(ValueError):
+        PostgresAdvisoryPaymentLock(engine)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def pg_engine():
+    url = get_test_database_url()
+    if not url.startswith("postgresql"):
+        pytest.skip("requires a PostgreSQL test database")
+    engine = create_async_engine(url)
+    yield engine
+    await engine.dispose()
+
+
+async def test_lock_is_exclusive_across_instances(pg_engine):
+    """Two lock instances (as on two nodes) serialize one payment."""
+    first = PostgresAdvisoryPaymentLock(pg_engine)
+    second = PostgresAdvisoryPaymentLock(pg_engine)
+    events: list[str] = []
+
+    async def work(lock, name: str, delay: float) -> None:
+        async with lock.lock("pay-1"):
+            events.append(f"{name}-start")
+            await asyncio.sleep(delay)
+            events.append(f"{name}-end")
+
+    task = asyncio.create_task(work(first, "a", 0.1))
+    await asyncio.sleep(0.02)
+    await work(second, "b", 0)
+    await task
+
+    assert events == ["a-start", "a-end", "b-start", "b-end"]
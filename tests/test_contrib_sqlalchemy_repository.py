@@ -1,5 +1,6 @@
 """Tests for SQLAlchemy PaymentRepository implementation."""
 
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
 
 import pytest
@@ -13,6 +14,7 @@ from litestar_getpaid.contrib.sqlalchemy.models import Base
 from litestar_getpaid.contrib.sqlalchemy.repository import (
     SQLAlchemyPaymentRepository,
 )
+from litestar_getpaid.protocols import ReusablePaymentRepository
 
 from tests.database import get_test_database_url
 
@@ -206,3 +208,108 @@ async def test_list_by_order_empty(repo):
     """Empty list when no payments for order."""
     payments = await repo.list_by_order("nonexistent")
     assert payments == []
+
+
+async def test_find_reusable_payment(repo):
+    """Only prepared payments with a stored result are reusable."""
+    assert isinstance(repo, ReusablePaymentRepository)
+    since = datetime.now(tz=UTC) - timedelta(minutes=5)
+    prepared = await repo.create(
+        order_id="order-1",
+        amount_required=Decimal("100"),
+        currency="PLN",
+        backend="dummy",
+    )
+    await repo.update_status(prepared.id, "prepared")
+    other_backend = await repo.create(
+        order_id="order-1",
+        amount_required=Decimal("100"),
+        currency="PLN",
+        backend="paynow",
+    )
+    await repo.update_status(other_backend.id, "prepared")
+    await repo.save_transaction_result(other_backend.id, {"x": 1})
+
+    assert (
+        await repo.find_reusable_payment(
+            "order-1", "dummy", created_after=since
+        )
+        is None
+    )
+
+    result = {"payment_id": prepared.id, "redirect_url": "https://pay"}
+    await repo.save_transaction_result(prepared.id, result)
+    found = await repo.find_reusable_payment(
+        "order-1", "dummy", created_after=since
+    )
+    assert found.id == prepared.id
+    assert found.transaction_result == result
+    assert found.order.id == "order-1"
+
+    assert (
+        await repo.find_reusable_payment(
+            "order-1", "dummy", created_after=datetime.now(tz=UTC)
+        )
+        is None
+    )
+    await repo.update_status(prepared.id, "paid")
+    assert (
+        await repo.find_reusable_payment(
+            "order-1", "dummy", created_after=since
+        )
+        is None
+    )
+
+
+async def test_get_payment_version(repo):
+    payment = await repo.create(
+        order_id="order-1",
+        amount_required=Decimal("100"),
+        currency="PLN",
+        backend="dummy",
+    )
+    version = await repo.get_payment_version(payment.id)
+    assert version.status == "new"
+    assert version.updated_at == payment.updated_at
+
+    updated = await repo.update_status(payment.id, "paid")
+    version = await repo.get_payment_version(payment.id)
+    assert version.status == "paid"
+    assert version.updated_at == updated.updated_at
+
+
+async def test_get_payment_version_not_found(repo):
+    with pytest.raises(KeyError):
+        await repo.get_payment_version("nonexistent")
+
+
+async def test_payment_field_projections(repo):
+    payment = await repo.create(
+        order_id="order-1",
+        amount_required=Decimal("100"),
+        currency="PLN",
+        backend="dummy",
+        provider_data={"large": "x" * 100},
+    )
+
+    row = await repo.get_payment_fields(payment.id, ["status", "amount_paid"])
+    assert row == {"status": "new", "amount_paid": Decimal("0")}
+    rows = await repo.list_payment_fields("order-1", ["id"])
+    assert rows == [{"id": payment.id}]
+
+    with pytest.raises(KeyError):
+        await repo.get_payment_fields("nonexistent", ["status"])
+    with pytest.raises(ValueError):
+        await repo.get_payment_fields(payment.id, ["secret"])
+
+
+async def test_exists_and_iter_payment_ids(repo):
+    payment = await repo.create(
+        order_id="order-1",
+        amount_required=Decimal("100"),
+        currency="PLN",
+        backend="dummy",
+    )
+    assert await repo.exists(payment.id)
+    assert not await repo.exists("nonexistent")
+    assert [pid async for pid in repo.iter_payment_ids()] == [payment.id]
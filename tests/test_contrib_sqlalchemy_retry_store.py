@@ -1,5 +1,6 @@
 """Tests for SQLAlchemy retry store implementation."""
 
+import asyncio
 from datetime import UTC, datetime, timedelta
 
 import pytest
@@ -79,6 +80,27 @@ async def test_get_due_retries_finds_due(store, session_factory):
     assert retries[0]["payment_id"] == "pay-1"
 
 
+async def test_get_due_retries_backend_filter(store, session_factory):
+    """The backend filter only returns that backend's retries."""
+    async with session_factory() as session:
+        for backend in ("payu", "paynow"):
+            session.add(
+                CallbackRetryModel(
+                    payment_id=f"pay-{backend}",
+                    backend=backend,
+                    payload={},
+                    headers={},
+                    attempts=1,
+                    next_retry_at=datetime.now(tz=UTC) - timedelta(minutes=1),
+                    status="pending",
+                )
+            )
+        await session.commit()
+
+    retries = await store.get_due_retries(backend="paynow")
+    assert [r["payment_id"] for r in retries] == ["pay-paynow"]
+
+
 async def test_get_due_retries_skips_future(store, session_factory):
     """Skips retries that aren't due yet."""
     async with session_factory() as session:
@@ -97,6 +119,42 @@ async def test_get_due_retries_skips_future(store, session_factory):
     assert retries == []
 
 
+async def _add_due_retry(session_factory, payment_id: str) -> None:
+    async with session_factory() as session:
+        session.add(
+            CallbackRetryModel(
+                payment_id=payment_id,
+                payload={"status": "paid"},
+                headers={},
+                attempts=1,
+                next_retry_at=datetime.now(tz=UTC) - timedelta(minutes=1),
+                status="pending",
+            )
+        )
+        await session.commit()
+
+
+async def test_get_due_retries_claims_rows(store, session_factory):
+    """A claimed retry is not handed to a second worker."""
+    await _add_due_retry(session_factory, "pay-1")
+
+    first, second = await asyncio.gather(
+        store.get_due_retries(), store.get_due_retries()
+    )
+    assert len(first) + len(second) == 1
+    assert await store.get_due_retries() == []
+
+
+async def test_expired_claim_is_handed_out_again(session_factory):
+    """A claim not settled within the visibility timeout expires."""
+    store = SQLAlchemyRetryStore(session_factory, visibility_timeout=0)
+    await _add_due_retry(session_factory, "pay-1")
+
+    (claimed,) = await store.get_due_retries()
+    (reclaimed,) = await store.get_due_retries()
+    assert reclaimed["id"] == claimed["id"]
+
+
 async def test_mark_succeeded(store, session_factory):
     """Marks a retry as succeeded."""
     retry_id = await store.store_failed_callback(
@@ -130,6 +188,24 @@ async def test_mark_failed(store, session_factory):
         assert retry.next_retry_at is not None
 
 
+async def test_mark_deferred(store, session_factory):
+    """Deferral moves the due time without counting an attempt."""
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1",
+        payload={},
+        headers={},
+    )
+    until = datetime.now(tz=UTC) + timedelta(hours=1)
+    await store.mark_deferred(retry_id, until=until)
+
+    async with session_factory() as session:
+        retry = await session.get(CallbackRetryModel, retry_id)
+        assert retry is not None
+        assert retry.status == "pending"
+        assert retry.attempts == 0
+        assert retry.next_retry_at.replace(tzinfo=UTC) == until
+
+
 async def test_mark_exhausted(store, session_factory):
     """Marks a retry as exhausted (dead letter)."""
     retry_id = await store.store_failed_callback(
@@ -143,3 +219,93 @@ async def test_mark_exhausted(store, session_factory):
         retry = await session.get(CallbackRetryModel, retry_id)
         assert retry is not None
         assert retry.status == "exhausted"
+
+
+async def test_store_failed_callback_records_backend(store):
+    """The backend is stored and returned with due retries."""
+    due_store = SQLAlchemyRetryStore(
+        session_factory=store._session_factory,
+        backoff_seconds=0,
+    )
+    await due_store.store_failed_callback(
+        payment_id="pay-1",
+        payload={},
+        headers={},
+        backend="payu",
+    )
+
+    retries = await due_store.get_due_retries()
+    assert retries[0]["backend"] == "payu"
+
+
+async def test_get_queue_stats(store, session_factory):
+    """Reports pending counts by backend and the oldest due retry."""
+    oldest = datetime.now(tz=UTC) - timedelta(minutes=5)
+    async with session_factory() as session:
+        session.add_all(
+            [
+                CallbackRetryModel(
+                    payment_id="pay-1",
+                    backend="payu",
+                    payload={},
+                    headers={},
+                    next_retry_at=oldest,
+                    status="pending",
+                ),
+                CallbackRetryModel(
+                    payment_id="pay-2",
+                    backend="payu",
+                    payload={},
+                    headers={},
+                    next_retry_at=datetime.now(tz=UTC) + timedelta(hours=1),
+                    status="pending",
+                ),
+                CallbackRetryModel(
+                    payment_id="pay-3",
+                    payload={},
+                    headers={},
+                    next_retry_at=oldest,
+                    status="pending",
+                ),
+                CallbackRetryModel(
+                    payment_id="pay-4",
+                    backend="payu",
+                    payload={},
+                    headers={},
+                    next_retry_at=oldest,
+                    status="succeeded",
+                ),
+            ]
+        )
+        await session.commit()
+
+    stats = await store.get_queue_stats()
+
+    assert stats.pending_by_backend == {"payu": 2, "unknown": 1}
+    assert stats.due == 2
+    assert abs((stats.oldest_due_at - oldest).total_seconds()) < 1
+
+
+async def test_raw_body_stored_compressed(store, session_factory):
+    """Raw bodies are compressed at rest and returned decompressed."""
+    due_store = SQLAlchemyRetryStore(
+        session_factory=session_factory,
+        backoff_seconds=0,
+    )
+    raw_body = b'{"items": [' + b'{"name": "item"},' * 100 + b"{}]}"
+    retry_id = await due_store.store_failed_callback(
+        payment_id="pay-1",
+        payload=None,
+        headers={},
+        raw_body=raw_body,
+    )
+
+    async with session_factory() as session:
+        row = await session.get(CallbackRetryModel, retry_id)
+        assert row is not None
+        assert row.payload is None
+        assert len(row.raw_body) < len(raw_body)
+
+    retries = await due_store.get_due_retries()
+    assert retries[0]["raw_body"] == raw_body
+    assert retries[0]["payload"] is None
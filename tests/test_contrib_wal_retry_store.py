@@ -0,0 +1,316 @@
+"""Tests for the append-only log retry store implementation."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from litestar_getpaid.contrib.wal.retry_store import WALRetryStore
+from litestar_getpaid.exceptions import ConfigurationError
+from litestar_getpaid.protocols import CallbackRetryStore
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = WALRetryStore(tmp_path, backoff_seconds=0)
+    yield store
+    await store.close()
+
+
+def test_implements_protocol(store):
+    assert isinstance(store, CallbackRetryStore)
+
+
+async def test_store_and_claim(store):
+    """Stored callbacks are claimed with their payload and headers."""
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1",
+        payload={"status": "paid", "amount": "10.00"},
+        headers={"content-type": "application/json"},
+    )
+
+    retries = await store.get_due_retries()
+    assert retries == [
+        {
+            "id": retry_id,
+            "payment_id": "pay-1",
+            "backend": None,
+            "payload": {"status": "paid", "amount": "10.00"},
+            "raw_body": None,
+            "headers": {"content-type": "application/json"},
+            "attempts": 0,
+        }
+    ]
+    assert await store.get_due_retries() == []
+
+
+async def test_get_due_retries_skips_future(tmp_path):
+    store = WALRetryStore(tmp_path, backoff_seconds=60)
+    await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    assert await store.get_due_retries() == []
+    await store.close()
+
+
+async def test_concurrent_writes_share_fsync(store):
+    """Concurrent enqueues all complete and land in the index."""
+    ids = await asyncio.gather(
+        *(
+            store.store_failed_callback(
+                payment_id=f"pay-{i}", payload={"i": i}, headers={}
+            )
+            for i in range(20)
+        )
+    )
+    assert len(set(ids)) == 20
+    assert len(store) == 20
+
+
+async def test_failed_fsync_is_not_indexed(store):
+    """A callback whose write was not made durable is not claimable."""
+
+    def fail(files):
+        raise OSError("disk full")
+
+    with (
+        patch("litestar_getpaid.contrib.wal.retry_store._fsync_all", fail),
+        pytest.raises(OSError, match="disk full"),
+    ):
+        await store.store_failed_callback(
+            payment_id="pay-1", payload={}, headers={}
+        )
+
+    assert len(store) == 0
+    assert await store.get_due_retries() == []
+
+
+async def test_failed_fsync_is_not_replayed(tmp_path):
+    """A write reported as failed does not come back after a restart."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0)
+
+    def fail(files):
+        raise OSError("disk full")
+
+    with (
+        patch("litestar_getpaid.contrib.wal.retry_store._fsync_all", fail),
+        pytest.raises(OSError),
+    ):
+        await store.store_failed_callback(
+            payment_id="pay-1", payload={}, headers={}
+        )
+    await store.close()
+
+    restored = WALRetryStore(tmp_path, backoff_seconds=0)
+    assert len(restored) == 0
+    await restored.close()
+
+
+async def test_unexpected_flush_error_reaches_writers(store):
+    """Errors other than OSError fail the waiting writers too."""
+
+    def fail(files):
+        raise ValueError("I/O operation on closed file")
+
+    with (
+        patch("litestar_getpaid.contrib.wal.retry_store._fsync_all", fail),
+        pytest.raises(ValueError, match="closed file"),
+    ):
+        await asyncio.wait_for(
+            store.store_failed_callback(
+                payment_id="pay-1", payload={}, headers={}
+            ),
+            timeout=5,
+        )
+
+
+async def test_close_waits_for_scheduled_flush(tmp_path):
+    store = WALRetryStore(tmp_path, backoff_seconds=0, fsync_interval=0.01)
+    write = asyncio.ensure_future(
+        store.store_failed_callback(payment_id="pay-1", payload={}, headers={})
+    )
+    await asyncio.sleep(0)
+
+    await store.close()
+
+    assert write.done()
+    restored = WALRetryStore(tmp_path)
+    assert restored.get(write.result()) is not None
+    await restored.close()
+
+
+async def test_index_rebuilt_on_restart(tmp_path):
+    """Pending retries and their attempt state survive a restart."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0)
+    failed = await store.store_failed_callback(
+        payment_id="pay-1", payload={"status": "paid"}, headers={"a": "b"}
+    )
+    done = await store.store_failed_callback(
+        payment_id="pay-2", payload={}, headers={}
+    )
+    await store.mark_failed(failed, error="timeout")
+    await store.mark_succeeded(done)
+    await store.close()
+
+    restored = WALRetryStore(tmp_path, backoff_seconds=0)
+    entry = restored.get(failed)
+    assert entry is not None
+    assert entry["payload"] == {"status": "paid"}
+    assert entry["headers"] == {"a": "b"}
+    assert entry["attempts"] == 1
+    assert entry["last_error"] == "timeout"
+    assert restored.get(done) is None
+    assert len(restored) == 1
+    await restored.close()
+
+
+async def test_torn_tail_is_truncated(tmp_path):
+    """A partially written record at the end of the log is discarded."""
+    store = WALRetryStore(tmp_path)
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    await store.close()
+    segment = next(tmp_path.glob("*.wal"))
+    with segment.open("ab") as fh:
+        fh.write(b"\x00\x01\x02")
+
+    restored = WALRetryStore(tmp_path)
+    assert restored.get(retry_id) is not None
+    await restored.close()
+
+
+async def test_terminal_segments_are_deleted(tmp_path):
+    """Segments holding only terminal retries are removed."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0, segment_size=1)
+    first = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    second = await store.store_failed_callback(
+        payment_id="pay-2", payload={}, headers={}
+    )
+    assert len(store.segments()) == 2
+
+    await store.mark_succeeded(first)
+    await store.mark_exhausted(second)
+
+    assert len(store.segments()) == 1
+    assert len(list(tmp_path.glob("*.wal"))) == 1
+    await store.close()
+
+
+async def test_mostly_terminal_segments_are_compacted(tmp_path):
+    """A long-lived retry does not keep later segments on disk."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0, segment_size=1)
+    pinned = await store.store_failed_callback(
+        payment_id="pay-0", payload={}, headers={}
+    )
+    for i in range(1, 21):
+        retry_id = await store.store_failed_callback(
+            payment_id=f"pay-{i}", payload={}, headers={}
+        )
+        await store.mark_succeeded(retry_id)
+
+    # One record per segment: 41 segments without compaction.
+    assert len(store.segments()) < 10
+    assert store.get(pinned) is not None
+    await store.close()
+
+    restored = WALRetryStore(tmp_path)
+    assert restored.get(pinned) is not None
+    assert len(restored) == 1
+    await restored.close()
+
+
+async def test_compact_moves_pending_retries(tmp_path):
+    """compact() rewrites live retries into the active segment."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0, segment_size=1)
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={"status": "paid"}, headers={}
+    )
+    await store.store_failed_callback(
+        payment_id="pay-2", payload={}, headers={}
+    )
+    first_segment = store.segments()[0]
+
+    await store.compact()
+
+    assert first_segment not in store.segments()
+    entry = store.get(retry_id)
+    assert entry is not None
+    assert entry["payload"] == {"status": "paid"}
+    await store.close()
+
+    restored = WALRetryStore(tmp_path)
+    assert len(restored) == 2
+    entry = restored.get(retry_id)
+    assert entry is not None
+    assert entry["payload"] == {"status": "paid"}
+    await restored.close()
+
+
+async def test_raw_body_round_trip(tmp_path):
+    """Raw bodies are stored verbatim and survive a restart."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0)
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1",
+        payload=None,
+        headers={},
+        raw_body=b"status=paid",
+    )
+    await store.close()
+
+    restored = WALRetryStore(tmp_path, backoff_seconds=0)
+    retries = await restored.get_due_retries()
+    assert retries[0]["id"] == retry_id
+    assert retries[0]["payload"] is None
+    assert retries[0]["raw_body"] == b"status=paid"
+    await restored.close()
+
+
+async def test_raw_body_drops_parsed_payload(tmp_path):
+    """A raw body is the only copy of the callback kept in the log."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0)
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1",
+        payload={"status": "paid"},
+        headers={},
+        raw_body=b"status=paid",
+    )
+    entry = store.get(retry_id)
+    assert entry is not None
+    assert entry["payload"] is None
+    await store.close()
+
+    log = b"".join(path.read_bytes() for path in tmp_path.iterdir())
+    assert log.count(b"paid") == 1
+
+
+async def test_mark_deferred_survives_restart(tmp_path):
+    """Deferral moves the due time without counting an attempt."""
+    store = WALRetryStore(tmp_path, backoff_seconds=0)
+    retry_id = await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}
+    )
+    await store.mark_deferred(
+        retry_id, until=datetime.now(tz=UTC) + timedelta(days=1)
+    )
+    assert await store.get_due_retries() == []
+    await store.close()
+
+    restored = WALRetryStore(tmp_path, backoff_seconds=0)
+    assert await restored.get_due_retries() == []
+    entry = restored.get(retry_id)
+    assert entry is not None
+    assert entry["attempts"] == 0
+    await restored.close()
+
+
+async def test_directory_is_locked_while_open(tmp_path):
+    """A second store, e.g. a CLI drain, cannot open a log in use."""
+    store = WALRetryStore(tmp_path)
+    with pytest.raises(ConfigurationError):
+        WALRetryStore(tmp_path)
+    await store.close()
+    await WALRetryStore(tmp_path).close()
@@ -0,0 +1,86 @@
+"""Tests for payment status events."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from litestar_getpaid.events import (
+    InProcessBroadcaster,
+    PublishingPaymentRepository,
+)
+from litestar_getpaid.protocols import (
+    PaymentEventBroadcaster,
+    PaymentStatusEvent,
+)
+
+
+def _event(status: str, payment_id: str = "pay-1") -> PaymentStatusEvent:
+    return PaymentStatusEvent(
+        payment_id=payment_id, order_id="order-1", status=status
+    )
+
+
+def test_implements_protocol():
+    assert isinstance(InProcessBroadcaster(), PaymentEventBroadcaster)
+
+
+async def test_subscribers_receive_matching_events():
+    broadcaster = InProcessBroadcaster()
+    async with (
+        broadcaster.subscribe(payment_id="pay-1") as by_payment,
+        broadcaster.subscribe(order_id="order-1") as by_order,
+    ):
+        await broadcaster.publish(_event("prepared", payment_id="pay-2"))
+        await broadcaster.publish(_event("paid"))
+
+        assert (await anext(by_order)).payment_id == "pay-2"
+        assert (await anext(by_order)).status == "paid"
+        assert (await anext(by_payment)).status == "paid"
+    assert broadcaster.subscriber_count() == 0
+
+
+async def test_slow_subscriber_drops_oldest_event():
+    broadcaster = InProcessBroadcaster(max_queue=2)
+    async with broadcaster.subscribe(payment_id="pay-1") as events:
+        for status in ("new", "prepared", "paid"):
+            await broadcaster.publish(_event(status))
+        assert (await anext(events)).status == "prepared"
+        assert (await anext(events)).status == "paid"
+
+
+async def test_cancelled_wait_keeps_subscription():
+    """A timed-out wait does not end the subscription."""
+    broadcaster = InProcessBroadcaster()
+    async with broadcaster.subscribe(payment_id="pay-1") as events:
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(anext(events), 0.01)
+        await broadcaster.publish(_event("paid"))
+        assert (await anext(events)).status == "paid"
+
+
+async def test_subscribe_requires_one_topic():
+    broadcaster = InProcessBroadcaster()
+    with pytest.raises(ValueError):
+        async with broadcaster.subscribe():
+            pass
+
+
+async def test_publishing_repository_publishes_updates():
+    payment = SimpleNamespace(id="pay-1", order_id="order-1", status="paid")
+    inner = AsyncMock()
+    inner.update_status = AsyncMock(return_value=payment)
+    inner.save = AsyncMock(return_value=payment)
+    inner.get_payment_version = AsyncMock(return_value="v1")
+    broadcaster = InProcessBroadcaster()
+    repo = PublishingPaymentRepository(inner, broadcaster)
+
+    async with broadcaster.subscribe(order_id="order-1") as events:
+        await repo.update_status("pay-1", "paid")
+        await repo.save(payment)
+        assert await anext(events) == _event("paid")
+        assert await anext(events) == _event("paid")
+
+    # Optional capabilities of the wrapped repository pass through.
+    assert await repo.get_payment_version("pay-1") == "v1"
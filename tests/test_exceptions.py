@@ -139,3 +139,39 @@ def test_payment_not_found_returns_404():
         resp = client.get("/test")
         assert resp.status_code == 404
         assert resp.json()["code"] == "not_found"
+
+
+def test_idempotency_key_mismatch_returns_422():
+    """IdempotencyKeyMismatchError maps to 422."""
+    from litestar_getpaid.exceptions import IdempotencyKeyMismatchError
+
+    @get("/test")
+    async def handler() -> None:
+        raise IdempotencyKeyMismatchError("key-1")
+
+    app = Litestar(
+        route_handlers=[handler],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    with TestClient(app) as client:
+        resp = client.get("/test")
+        assert resp.status_code == 422
+        assert resp.json()["code"] == "idempotency_key_mismatch"
+
+
+def test_idempotency_key_in_progress_returns_409():
+    """IdempotencyKeyInProgressError maps to 409."""
+    from litestar_getpaid.exceptions import IdempotencyKeyInProgressError
+
+    @get("/test")
+    async def handler() -> None:
+        raise IdempotencyKeyInProgressError("key-1")
+
+    app = Litestar(
+        route_handlers=[handler],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    with TestClient(app) as client:
+        resp = client.get("/test")
+        assert resp.status_code == 409
+        assert resp.json()["code"] == "idempotency_key_in_progress"
@@ -0,0 +1,110 @@
+"""Tests for Idempotency-Key handling."""
+
+import asyncio
+
+import pytest
+
+from litestar_getpaid.contrib.memory.idempotency import (
+    InMemoryIdempotencyStore,
+)
+from litestar_getpaid.exceptions import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+)
+from litestar_getpaid.idempotency import IdempotencyGuard, request_fingerprint
+
+
+@pytest.fixture
+def guard():
+    return IdempotencyGuard(InMemoryIdempotencyStore(), wait_timeout=1.0)
+
+
+def test_request_fingerprint_is_stable():
+    assert request_fingerprint(b"a") == request_fingerprint(b"a")
+    assert request_fingerprint(b"a") != request_fingerprint(b"b")
+
+
+async def test_repeated_key_returns_cached_response(guard):
+    calls = 0
+
+    async def func() -> dict:
+        nonlocal calls
+        calls += 1
+        return {"n": calls}
+
+    assert await guard.run("key-1", "fp", func) == {"n": 1}
+    assert await guard.run("key-1", "fp", func) == {"n": 1}
+    assert calls == 1
+
+
+async def test_key_reused_with_other_request_raises(guard):
+    async def func() -> dict:
+        return {}
+
+    await guard.run("key-1", "fp-1", func)
+    with pytest.raises(IdempotencyKeyMismatchError):
+        await guard.run("key-1", "fp-2", func)
+
+
+async def test_concurrent_duplicates_wait_for_first(guard):
+    """A duplicate arriving mid-flight gets the first response."""
+    calls = 0
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def func() -> dict:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await release.wait()
+        return {"n": calls}
+
+    first = asyncio.create_task(guard.run("key-1", "fp", func))
+    await started.wait()
+    second = asyncio.create_task(guard.run("key-1", "fp", func))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == {"n": 1}
+    assert await second == {"n": 1}
+    assert calls == 1
+
+
+async def test_failed_request_releases_key(guard):
+    async def failing() -> dict:
+        raise RuntimeError("gateway down")
+
+    async def func() -> dict:
+        return {"ok": True}
+
+    with pytest.raises(RuntimeError):
+        await guard.run("key-1", "fp", failing)
+    assert await guard.run("key-1", "fp", func) == {"ok": True}
+
+
+async def test_wait_timeout_raises_in_progress():
+    store = InMemoryIdempotencyStore()
+    await store.reserve("key-1", "fp")
+    guard = IdempotencyGuard(store, wait_timeout=0.1)
+
+    async def func() -> dict:
+        return {}
+
+    with pytest.raises(IdempotencyKeyInProgressError):
+        await guard.run("key-1", "fp", func)
+
+
+async def test_long_request_keeps_its_reservation():
+    """The reservation is renewed while the first request runs."""
+    store = InMemoryIdempotencyStore(in_flight_ttl=0.1)
+    guard = IdempotencyGuard(store, wait_timeout=1.0, refresh_interval=0.02)
+
+    async def func() -> dict:
+        await asyncio.sleep(0.3)
+        assert await store.get("key-1") is not None
+        return {"payment_id": "pay-1"}
+
+    assert await guard.run("key-1", "fp", func) == {"payment_id": "pay-1"}
+    record = await store.get("key-1")
+    assert record is not None
+    assert record.response == {"payment_id": "pay-1"}
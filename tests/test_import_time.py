@@ -0,0 +1,113 @@
+"""Import-time budget of the package modules.
+
+Each module is imported in a fresh interpreter with ``-X importtime``.
+Worker-side modules must not load the web stack, and no module may load
+SQLAlchemy or payment backends before they are used. The wall-clock
+budgets depend on the machine and only run with
+``GETPAID_IMPORT_BUDGET=1`` (``make bench``); scale them on slow
+machines with ``GETPAID_IMPORT_BUDGET_SCALE``.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from importlib.metadata import entry_points
+
+import pytest
+from getpaid_core.registry import ENTRY_POINT_GROUP
+
+_SCRIPT = (
+    "import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+)
+
+# Libraries only needed once their feature is used.
+_HEAVY = {"litestar", "httpx", "pydantic_settings", "sqlalchemy"}
+
+_WORKER_MODULES = [
+    "litestar_getpaid.registry",
+    "litestar_getpaid.retry",
+    "litestar_getpaid.inbox",
+    "litestar_getpaid.warmup",
+    "litestar_getpaid.contrib.memory.retry_store",
+    "litestar_getpaid.contrib.wal.retry_store",
+]
+
+# Seconds, best of several runs.
+_BUDGETS = {
+    "litestar_getpaid": 0.15,
+    "litestar_getpaid.retry": 0.6,
+    "litestar_getpaid.contrib.wal.retry_store": 0.6,
+    "litestar_getpaid.plugin": 1.5,
+}
+
+
+def _import(module: str) -> tuple[set[str], float]:
+    """Return the modules loaded by importing ``module`` and its time."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _SCRIPT.format(module=module),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    return set(json.loads(result.stdout)), cumulative[module] / 1_000_000
+
+
+def _backend_modules() -> set[str]:
+    return {
+        entry_point.module
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP)
+    }
+
+
+def test_package_import_loads_no_heavy_libraries():
+    modules, _ = _import("litestar_getpaid")
+    assert not _HEAVY & modules
+    assert not {"getpaid_core", "pydantic"} & modules
+
+
+@pytest.mark.parametrize("module", _WORKER_MODULES)
+def test_worker_modules_do_not_load_web_stack(module):
+    modules, _ = _import(module)
+    assert not _HEAVY & modules
+
+
+@pytest.mark.parametrize(
+    "module", ["litestar_getpaid.plugin", "litestar_getpaid.cli"]
+)
+def test_plugin_defers_optional_libraries(module):
+    modules, _ = _import(module)
+    assert "httpx" not in modules
+    assert "sqlalchemy" not in modules
+    assert not _backend_modules() & modules
+
+
+def test_contrib_package_does_not_load_sqlalchemy():
+    modules, _ = _import("litestar_getpaid.contrib")
+    assert "sqlalchemy" not in modules
+
+
+@pytest.mark.skipif(
+    not os.environ.get("GETPAID_IMPORT_BUDGET"),
+    reason="timing check; set GETPAID_IMPORT_BUDGET=1 to run",
+)
+@pytest.mark.parametrize(("module", "budget"), sorted(_BUDGETS.items()))
+def test_import_time_budget(module, budget):
+    scale = float(os.environ.get("GETPAID_IMPORT_BUDGET_SCALE", "1"))
+    seconds = min(_import(module)[1] for _ in range(3))
+    assert seconds < budget * scale, (
+        f"importing {module} took {seconds:.3f}s, budget {budget * scale}s"
+    )
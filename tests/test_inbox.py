@@ -0,0 +1,203 @@
+"""Tests for the transactional callback inbox."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, cast
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from getpaid_core.exceptions import CommunicationError, InvalidCallbackError
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.contrib.memory.retry_store import InMemoryRetryStore
+from litestar_getpaid.inbox import CallbackInbox
+
+if TYPE_CHECKING:
+    from getpaid_core.protocols import Payment
+
+
+class FakePayment:
+    def __init__(self, payment_id: str) -> None:
+        self.id = payment_id
+        self.backend = "dummy"
+
+
+def make_payment(payment_id: str) -> "Payment":
+    return cast("Payment", FakePayment(payment_id))
+
+
+@pytest.fixture
+def config():
+    return GetpaidConfig(
+        default_backend="dummy",
+        success_url="/ok",
+        failure_url="/fail",
+        backends={"dummy": {}},
+        retry_max_attempts=3,
+    )
+
+
+@pytest.fixture
+def mock_repo():
+    async def get_by_id(payment_id):
+        return FakePayment(payment_id)
+
+    repo = AsyncMock()
+    repo.get_by_id = AsyncMock(side_effect=get_by_id)
+    return repo
+
+
+@pytest.fixture
+def store():
+    return InMemoryRetryStore(backoff_seconds=0)
+
+
+@pytest.fixture
+def inbox(store, mock_repo, config):
+    return CallbackInbox(
+        store, repository=mock_repo, config=config, consumers=4
+    )
+
+
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+@pytest.fixture
+def mock_flow():
+    with patch("litestar_getpaid.inbox.PaymentFlow") as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.handle_callback = AsyncMock()
+        yield instance
+
+
+async def test_submit_and_process(inbox, store, mock_flow):
+    await inbox.submit(
+        make_payment("pay-1"), JSON_HEADERS, b'{"status":"paid"}'
+    )
+
+    assert await inbox.process_pending() == 1
+
+    kwargs = mock_flow.handle_callback.await_args.kwargs
+    assert kwargs["data"] == {"status": "paid"}
+    assert kwargs["raw_body"] == b'{"status":"paid"}'
+    assert len(store) == 0
+
+
+async def test_callbacks_for_one_payment_keep_order(inbox, mock_flow):
+    seen: list[tuple[str, int]] = []
+
+    async def handle_callback(*, payment, data, headers, raw_body):
+        await asyncio.sleep(0.001 * (3 - data["seq"]))
+        seen.append((payment.id, data["seq"]))
+
+    mock_flow.handle_callback = AsyncMock(side_effect=handle_callback)
+    for seq in range(3):
+        for payment_id in ("pay-1", "pay-2"):
+            await inbox.submit(
+                make_payment(payment_id),
+                JSON_HEADERS,
+                f'{{"seq": {seq}}}'.encode(),
+            )
+
+    assert await inbox.process_pending() == 6
+    for payment_id in ("pay-1", "pay-2"):
+        assert [s for p, s in seen if p == payment_id] == [0, 1, 2]
+
+
+async def test_communication_error_moves_to_retry_store(
+    store, mock_repo, config, mock_flow
+):
+    retry_store = InMemoryRetryStore()
+    inbox = CallbackInbox(
+        store,
+        repository=mock_repo,
+        config=config,
+        retry_store=retry_store,
+    )
+    mock_flow.handle_callback = AsyncMock(
+        side_effect=CommunicationError("gateway down")
+    )
+    await inbox.submit(make_payment("pay-1"), JSON_HEADERS, b"{}")
+
+    await inbox.process_pending()
+
+    assert len(store) == 0
+    assert len(retry_store) == 1
+
+
+async def test_invalid_callback_is_exhausted(inbox, store, mock_flow):
+    mock_flow.handle_callback = AsyncMock(
+        side_effect=InvalidCallbackError("bad signature")
+    )
+    entry_id = await inbox.submit(make_payment("pay-1"), JSON_HEADERS, b"{}")
+
+    await inbox.process_pending()
+
+    assert store.get(entry_id)["status"] == "exhausted"
+
+
+async def test_dispatcher_processes_in_background(inbox, store, mock_flow):
+    async with inbox:
+        await inbox.submit(make_payment("pay-1"), JSON_HEADERS, b"{}")
+        for _ in range(100):
+            if mock_flow.handle_callback.await_count:
+                break
+            await asyncio.sleep(0.01)
+
+    mock_flow.handle_callback.assert_awaited_once()
+    assert len(store) == 0
+
+
+async def test_failed_entry_backs_off(store, mock_repo, config, mock_flow):
+    inbox = CallbackInbox(
+        store, repository=mock_repo, config=config, backoff_seconds=30
+    )
+    mock_flow.handle_callback = AsyncMock(side_effect=RuntimeError("db down"))
+    entry_id = await inbox.submit(make_payment("pay-1"), JSON_HEADERS, b"{}")
+
+    assert await inbox.process_pending() == 1
+    assert await inbox.process_pending() == 0
+
+    entry = store.get(entry_id)
+    assert entry["attempts"] == 1
+    delay = entry["next_retry_at"] - datetime.now(tz=UTC)
+    assert timedelta(seconds=25) < delay <= timedelta(seconds=30)
+
+
+async def test_later_entries_wait_for_failed_head(
+    store, mock_repo, config, mock_flow
+):
+    inbox = CallbackInbox(store, repository=mock_repo, config=config)
+    seen: list[int] = []
+    failures = [RuntimeError("db down")]
+
+    async def handle_callback(*, payment, data, headers, raw_body):
+        if payment.id == "pay-1" and failures:
+            raise failures.pop()
+        seen.append(data["seq"])
+
+    mock_flow.handle_callback = AsyncMock(side_effect=handle_callback)
+    head_id = await inbox.submit(
+        make_payment("pay-1"), JSON_HEADERS, b'{"seq": 0}'
+    )
+    held = [
+        await inbox.submit(make_payment("pay-1"), JSON_HEADERS, b'{"seq": 1}')
+    ]
+    await inbox.submit(make_payment("pay-2"), JSON_HEADERS, b'{"seq": 9}')
+
+    assert await inbox.process_pending() == 3
+    assert seen == [9]
+    held.append(
+        await inbox.submit(make_payment("pay-1"), JSON_HEADERS, b'{"seq": 2}')
+    )
+    assert await inbox.process_pending() == 1
+    assert seen == [9]
+
+    await store.mark_deferred(head_id, until=datetime.now(tz=UTC))
+    assert await inbox.process_pending() == 1
+    assert seen == [9, 0]
+    for entry_id in held:
+        await store.mark_deferred(entry_id, until=datetime.now(tz=UTC))
+    assert await inbox.process_pending() == 2
+    assert seen == [9, 0, 1, 2]
+    assert len(store) == 0
@@ -0,0 +1,56 @@
+"""Tests for per-payment locks."""
+
+import asyncio
+
+import pytest
+
+from litestar_getpaid.locks import StripedPaymentLock, payment_lock_scope
+from litestar_getpaid.protocols import PaymentLock
+
+
+def test_implements_protocol():
+    assert isinstance(StripedPaymentLock(), PaymentLock)
+
+
+def test_rejects_empty_table():
+    with pytest.raises(ValueError):
+        StripedPaymentLock(stripes=0)
+
+
+async def test_same_payment_runs_in_order():
+    lock = StripedPaymentLock()
+    events: list[str] = []
+
+    async def work(name: str, delay: float) -> None:
+        async with lock.lock("pay-1"):
+            events.append(f"{name}-start")
+            await asyncio.sleep(delay)
+            events.append(f"{name}-end")
+
+    await asyncio.gather(work("a", 0.02), work("b", 0))
+
+    assert events == ["a-start", "a-end", "b-start", "b-end"]
+
+
+async def test_different_payments_run_in_parallel():
+    lock = StripedPaymentLock(stripes=4096)
+    inside = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with lock.lock("pay-1"):
+            inside.set()
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await inside.wait()
+    async with asyncio.timeout(1):
+        async with lock.lock("pay-2"):
+            pass
+    release.set()
+    await holder
+
+
+async def test_scope_without_lock_is_noop():
+    async with payment_lock_scope(None, "pay-1"):
+        pass
@@ -0,0 +1,144 @@
+"""Tests for cheap payment ID rejection."""
+
+from typing import TYPE_CHECKING, cast
+from unittest.mock import AsyncMock
+
+import pytest
+
+from litestar_getpaid.exceptions import PaymentNotFoundError
+from litestar_getpaid.lookups import (
+    BloomFilter,
+    PaymentLookupGuard,
+    build_id_filter,
+    load_payment,
+)
+
+if TYPE_CHECKING:
+    from getpaid_core.protocols import PaymentRepository
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ExistsRepo:
+    def __init__(self, known: set[str]) -> None:
+        self.known = known
+        self.exists_calls = 0
+
+    async def exists(self, payment_id: str) -> bool:
+        self.exists_calls += 1
+        return payment_id in self.known
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    ids = [f"pay-{i}" for i in range(1000)]
+    for payment_id in ids:
+        bloom.add(payment_id)
+    assert all(payment_id in bloom for payment_id in ids)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_bloom_filter_validates_arguments():
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+    with pytest.raises(ValueError):
+        BloomFilter(10, error_rate=1.5)
+
+
+async def test_build_id_filter():
+    async def ids():
+        for i in range(10):
+            yield f"pay-{i}"
+
+    bloom = await build_id_filter(ids(), capacity=10)
+    assert "pay-3" in bloom
+
+
+async def test_missing_ids_are_cached_for_ttl():
+    clock = FakeClock()
+    repo = ExistsRepo({"pay-1"})
+    repository = cast("PaymentRepository", repo)
+    guard = PaymentLookupGuard(negative_ttl=30, clock=clock)
+
+    assert await guard.exists(repository, "pay-1")
+    assert not await guard.exists(repository, "bogus")
+    assert not await guard.exists(repository, "bogus")
+    assert repo.exists_calls == 2
+
+    clock.now = 31
+    assert not await guard.exists(repository, "bogus")
+    assert repo.exists_calls == 3
+
+
+def test_negative_cache_is_bounded():
+    guard = PaymentLookupGuard(max_entries=2)
+    for payment_id in ("a", "b", "c"):
+        guard.remember_missing(payment_id)
+    assert not guard.is_known_missing("a")
+    assert guard.is_known_missing("c")
+
+
+async def test_id_filter_miss_is_confirmed_with_repository():
+    """A payment created elsewhere is found despite the filter."""
+    repo = ExistsRepo({"pay-1"})
+    repository = cast("PaymentRepository", repo)
+    guard = PaymentLookupGuard(id_filter=BloomFilter(100))
+
+    assert await guard.exists(repository, "pay-1")
+    assert repo.exists_calls == 1
+    assert guard.id_filter is not None
+    assert "pay-1" in guard.id_filter
+    assert not await guard.exists(repository, "bogus")
+    assert not await guard.exists(repository, "bogus")
+    assert repo.exists_calls == 2
+
+
+async def test_trusted_id_filter_rejects_without_query():
+    bloom = BloomFilter(100)
+    bloom.add("pay-1")
+    repo = ExistsRepo({"pay-1", "pay-2"})
+    repository = cast("PaymentRepository", repo)
+    guard = PaymentLookupGuard(id_filter=bloom, trust_id_filter=True)
+
+    assert not await guard.exists(repository, "bogus")
+    assert repo.exists_calls == 0
+    guard.record_created("pay-2")
+    assert await guard.exists(repository, "pay-2")
+
+
+async def test_record_created_clears_negative_cache():
+    guard = PaymentLookupGuard()
+    guard.remember_missing("pay-1")
+    guard.record_created("pay-1")
+    assert not guard.is_known_missing("pay-1")
+
+
+async def test_load_payment_remembers_missing():
+    repo = AsyncMock()
+    repo.get_by_id = AsyncMock(side_effect=KeyError("bogus"))
+    guard = PaymentLookupGuard()
+
+    for _ in range(2):
+        with pytest.raises(PaymentNotFoundError):
+            await load_payment(repo, "bogus", guard)
+    repo.get_by_id.assert_awaited_once_with("bogus")
+
+
+async def test_load_payment_without_filter_adds_found_ids():
+    repo = AsyncMock()
+    guard = PaymentLookupGuard(id_filter=BloomFilter(100), trust_id_filter=True)
+
+    with pytest.raises(PaymentNotFoundError):
+        await load_payment(repo, "pay-1", guard)
+    repo.get_by_id.assert_not_awaited()
+
+    await load_payment(repo, "pay-1", guard, use_filter=False)
+    repo.get_by_id.assert_awaited_once_with("pay-1")
+    assert not guard.is_known_missing("pay-1")
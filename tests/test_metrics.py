@@ -0,0 +1,90 @@
+"""Tests for retry subsystem metrics."""
+
+from datetime import UTC, datetime, timedelta
+
+from litestar_getpaid.contrib.memory.retry_store import InMemoryRetryStore
+from litestar_getpaid.metrics import Histogram, RetryMetrics, RetryQueueStats
+
+
+class CountingStatsStore:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_queue_stats(self) -> RetryQueueStats:
+        self.calls += 1
+        return RetryQueueStats(
+            pending_by_backend={"payu": 3, "dummy": 1},
+            due=2,
+            oldest_due_at=datetime.now(tz=UTC) - timedelta(seconds=30),
+        )
+
+
+def test_histogram_is_cumulative():
+    histogram = Histogram([0.1, 1.0])
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == 6.05
+
+
+async def test_collect_reports_attempts_and_batches():
+    metrics = RetryMetrics()
+    metrics.record_batch(2)
+    metrics.record_attempt(backend="payu", outcome="succeeded", duration=0.02)
+    metrics.record_attempt(backend="payu", outcome="failed", duration=0.3)
+    metrics.record_attempt(backend=None, outcome="not_found", duration=0.001)
+
+    snapshot = await metrics.collect()
+
+    assert snapshot["attempts"] == {
+        "payu": {"failed": 1, "succeeded": 1},
+        "unknown": {"not_found": 1},
+    }
+    assert snapshot["latency_seconds"]["count"] == 3
+    assert snapshot["batch_size"]["count"] == 1
+    assert "queue" not in snapshot
+
+
+async def test_collect_reports_queue_depth_and_lag():
+    metrics = RetryMetrics()
+
+    snapshot = await metrics.collect(CountingStatsStore())
+
+    queue = snapshot["queue"]
+    assert queue["pending"] == 4
+    assert queue["pending_by_backend"] == {"payu": 3, "dummy": 1}
+    assert queue["due"] == 2
+    assert 29 < queue["oldest_due_age_seconds"] < 60
+
+
+async def test_queue_stats_are_cached():
+    store = CountingStatsStore()
+    metrics = RetryMetrics(cache_ttl=60)
+
+    await metrics.collect(store)
+    await metrics.collect(store)
+    assert store.calls == 1
+
+    expired = RetryMetrics(cache_ttl=0)
+    await expired.collect(store)
+    await expired.collect(store)
+    assert store.calls == 3
+
+
+async def test_in_memory_store_queue_stats():
+    store = InMemoryRetryStore(backoff_seconds=0)
+    await store.store_failed_callback(
+        payment_id="pay-1", payload={}, headers={}, backend="payu"
+    )
+    await store.store_failed_callback(
+        payment_id="pay-2", payload={}, headers={}
+    )
+
+    stats = await store.get_queue_stats()
+
+    assert stats.pending_by_backend == {"payu": 1, "unknown": 1}
+    assert stats.due == 2
+    assert stats.oldest_due_at is not None
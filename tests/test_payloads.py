@@ -0,0 +1,86 @@
+"""Tests for raw callback body helpers."""
+
+import json
+
+import pytest
+
+from litestar_getpaid.payloads import (
+    callback_fingerprint,
+    compress_body,
+    decompress_body,
+    filter_headers,
+    parse_body,
+)
+
+
+def test_small_body_stored_uncompressed():
+    body = b'{"status":"paid"}'
+    stored = compress_body(body)
+    assert stored[1:] == body
+    assert decompress_body(stored) == body
+
+
+def test_large_body_round_trip_is_smaller():
+    body = json.dumps({"items": [{"name": "item", "qty": 1}] * 200}).encode()
+    stored = compress_body(body)
+    assert len(stored) < len(body) / 4
+    assert decompress_body(stored) == body
+
+
+def test_decompress_rejects_unknown_tag():
+    with pytest.raises(ValueError):
+        decompress_body(b"\x7fdata")
+
+
+def test_parse_json_body():
+    assert parse_body(b'{"status": "paid"}', "application/json") == {
+        "status": "paid"
+    }
+
+
+def test_parse_form_body():
+    body = b"status=paid&amount=10.00&note="
+    content_type = "application/x-www-form-urlencoded; charset=utf-8"
+    assert parse_body(body, content_type) == {
+        "status": "paid",
+        "amount": "10.00",
+        "note": "",
+    }
+
+
+def test_parse_empty_body():
+    assert parse_body(b"") == {}
+
+
+def test_filter_headers_keeps_allow_list_and_content_type():
+    headers = {
+        "Content-Type": "application/json",
+        "OpenPayu-Signature": "sig",
+        "User-Agent": "gateway",
+        "Cookie": "session=1",
+    }
+    assert filter_headers(headers, ["openpayu-signature"]) == {
+        "Content-Type": "application/json",
+        "OpenPayu-Signature": "sig",
+    }
+
+
+def test_filter_headers_without_allow_list_keeps_all():
+    headers = {"a": "1", "b": "2"}
+    assert filter_headers(headers, None) == headers
+
+
+def test_callback_fingerprint_is_stable():
+    assert callback_fingerprint(b"abc") == callback_fingerprint(b"abc")
+    assert callback_fingerprint(b"abc") != callback_fingerprint(b"abd")
+    assert len(callback_fingerprint(b"")) == 64
+
+
+def test_parse_rejects_malformed_json():
+    with pytest.raises(ValueError):
+        parse_body(b"{not json", "application/json")
+
+
+def test_parse_rejects_non_object_json():
+    with pytest.raises(ValueError):
+        parse_body(b"[1, 2]")
@@ -1,13 +1,30 @@
 """Tests for the router factory function."""
 
+import threading
+from typing import TYPE_CHECKING, cast
 from unittest.mock import AsyncMock
 
-from litestar import Router
+import pytest
+from getpaid_core.registry import PluginRegistry
+from litestar import Litestar, Router
+from litestar.routes import HTTPRoute
+from litestar.testing import TestClient
 
+from litestar_getpaid.clients import BackendHTTPClients
 from litestar_getpaid.config import GetpaidConfig
-from litestar_getpaid.exceptions import EXCEPTION_HANDLERS
-from litestar_getpaid.plugin import create_payment_router
+from litestar_getpaid.context import GetpaidContext
+from litestar_getpaid.exceptions import EXCEPTION_HANDLERS, ConfigurationError
+from litestar_getpaid.idempotency import IdempotencyGuard
+from litestar_getpaid.plugin import GetpaidPlugin, create_payment_router
 from litestar_getpaid.registry import LitestarPluginRegistry
+from litestar_getpaid.routes.base import GetpaidController
+
+if TYPE_CHECKING:
+    from litestar_getpaid.protocols import (
+        CallbackDeduplicator,
+        CallbackRetryStore,
+        IdempotencyStore,
+    )
 
 
 class DummyRegistry(LitestarPluginRegistry):
@@ -15,6 +32,20 @@ class DummyRegistry(LitestarPluginRegistry):
         self._discovered = True
 
 
+def _context(router: Router) -> GetpaidContext:
+    """Return the context bound to the router's controllers."""
+    contexts = []
+    for route in router.routes:
+        assert isinstance(route, HTTPRoute)
+        for handler in route.route_handlers:
+            controller = getattr(handler.fn, "__self__", None)
+            # Skips the OPTIONS handlers Litestar adds to every path.
+            if isinstance(controller, GetpaidController):
+                contexts.append(controller.context)
+    assert all(context is contexts[0] for context in contexts)
+    return contexts[0]
+
+
 def _make_config() -> GetpaidConfig:
     return GetpaidConfig(
         default_backend="dummy",
@@ -62,9 +93,7 @@ def test_create_payment_router_with_custom_registry() -> None:
         registry=custom_registry,
     )
 
-    # The registry dependency provider should return our custom registry.
-    registry_provider = router.dependencies["registry"]
-    assert registry_provider.dependency() is custom_registry
+    assert _context(router).registry is custom_registry
 
 
 def test_create_payment_router_with_order_resolver() -> None:
@@ -77,12 +106,11 @@ def test_create_payment_router_with_order_resolver() -> None:
         order_resolver=resolver,
     )
 
-    order_resolver_provider = router.dependencies["order_resolver"]
-    assert order_resolver_provider.dependency() is resolver
+    assert _context(router).order_resolver is resolver
 
 
-def test_create_payment_router_dependencies() -> None:
-    """Router has all expected dependencies configured."""
+def test_create_payment_router_context() -> None:
+    """Components are bound as one context instead of dependencies."""
     config = _make_config()
     repo = AsyncMock()
     registry = DummyRegistry()
@@ -97,23 +125,14 @@ def test_create_payment_router_dependencies() -> None:
         retry_store=retry,
     )
 
-    expected_keys = {
-        "config",
-        "repository",
-        "registry",
-        "order_resolver",
-        "order_loader",
-        "retry_store",
-    }
-    assert set(router.dependencies.keys()) == expected_keys
-
-    # Verify each provider returns the correct object.
-    assert router.dependencies["config"].dependency() is config
-    assert router.dependencies["repository"].dependency() is repo
-    assert router.dependencies["registry"].dependency() is registry
-    assert router.dependencies["order_resolver"].dependency() is resolver
-    assert router.dependencies["order_loader"].dependency() is None
-    assert router.dependencies["retry_store"].dependency() is retry
+    assert _context(router) == GetpaidContext(
+        config=config,
+        repository=repo,
+        registry=registry,
+        order_resolver=resolver,
+        retry_store=retry,
+    )
+    assert not router.dependencies
 
 
 def test_create_payment_router_exception_handlers() -> None:
@@ -133,21 +152,31 @@ def test_create_payment_router_default_registry() -> None:
         repository=AsyncMock(),
     )
 
-    registry_provider = router.dependencies["registry"]
-    created_registry = registry_provider.dependency()
+    created_registry = _context(router).registry
     assert isinstance(created_registry, LitestarPluginRegistry)
 
 
 def test_create_payment_router_none_optional_deps() -> None:
-    """When optional deps are not passed, providers return None."""
+    """Optional components default to None."""
     router = create_payment_router(
         config=_make_config(),
         repository=AsyncMock(),
     )
 
-    assert router.dependencies["order_resolver"].dependency() is None
-    assert router.dependencies["order_loader"].dependency() is None
-    assert router.dependencies["retry_store"].dependency() is None
+    context = _context(router)
+    for name in (
+        "order_resolver",
+        "order_loader",
+        "retry_store",
+        "callback_inbox",
+        "callback_deduplicator",
+        "payment_lock",
+        "idempotency_guard",
+        "payment_events",
+        "payment_lookup_guard",
+        "http_clients",
+    ):
+        assert getattr(context, name) is None
 
 
 def test_create_payment_router_calls_discover() -> None:
@@ -162,3 +191,140 @@ def test_create_payment_router_calls_discover() -> None:
     )
 
     assert registry._discovered
+
+
+def test_create_payment_router_discovers_core_registry() -> None:
+    """A plain PluginRegistry is still fully discovered."""
+    registry = PluginRegistry()
+
+    create_payment_router(
+        config=_make_config(),
+        repository=AsyncMock(),
+        registry=registry,  # ty: ignore[invalid-argument-type]
+    )
+
+    assert registry._discovered
+
+
+def test_getpaid_plugin_requires_retry_store_for_worker() -> None:
+    with pytest.raises(ConfigurationError):
+        GetpaidPlugin(
+            config=_make_config(),
+            repository=AsyncMock(),
+            retry_worker=True,
+        )
+
+
+def test_getpaid_plugin_manages_lifespan() -> None:
+    """The plugin mounts the router, keeps its context in app.state and
+    starts and stops the components with the app."""
+    config = _make_config()
+    repository = AsyncMock()
+    repository.get_by_id.side_effect = KeyError("pay-1")
+    polled = threading.Event()
+
+    class RetryStore:
+        async def get_due_retries(self, limit: int = 10) -> list:
+            polled.set()
+            return []
+
+    retry_store = RetryStore()
+    inbox = AsyncMock()
+    http_clients = BackendHTTPClients(config)
+    plugin = GetpaidPlugin(
+        config=config,
+        repository=repository,
+        registry=DummyRegistry(),
+        retry_store=cast("CallbackRetryStore", retry_store),
+        callback_inbox=inbox,
+        http_clients=http_clients,
+        retry_worker=True,
+        retry_poll_interval=60,
+        warm_up=True,
+        warm_up_timeout=1,
+    )
+    app = Litestar(plugins=[plugin])
+
+    assert isinstance(app.state.getpaid, GetpaidContext)
+    assert app.state.getpaid.repository is repository
+    with TestClient(app) as client:
+        assert http_clients.get("dummy") is not None
+        inbox.start.assert_awaited_once()
+        assert polled.wait(timeout=5)
+        assert plugin.warmup_report is not None
+        assert set(plugin.warmup_report.backends) == {"dummy"}
+        assert client.get("/payments/pay-1").status_code == 404
+
+    inbox.stop.assert_awaited_once()
+    assert http_clients.get("dummy") is None
+
+
+def test_getpaid_plugin_starts_and_closes_stores() -> None:
+    """Stores with start/stop/close hooks follow the app lifespan and are
+    shut down in reverse order."""
+    calls: list[str] = []
+
+    class Store:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        async def start(self) -> None:
+            calls.append(f"start {self.name}")
+
+        async def stop(self) -> None:
+            calls.append(f"stop {self.name}")
+
+    class ClosingStore:
+        async def close(self) -> None:
+            calls.append("close retry")
+
+    inbox = AsyncMock()
+    inbox.store = Store("inbox")
+    plugin = GetpaidPlugin(
+        config=_make_config(),
+        repository=AsyncMock(),
+        registry=DummyRegistry(),
+        retry_store=cast("CallbackRetryStore", ClosingStore()),
+        callback_inbox=inbox,
+        callback_deduplicator=cast("CallbackDeduplicator", Store("dedup")),
+        idempotency_guard=IdempotencyGuard(
+            cast("IdempotencyStore", Store("idempotency"))
+        ),
+    )
+
+    with TestClient(Litestar(plugins=[plugin])):
+        assert calls == ["start inbox", "start dedup", "start idempotency"]
+
+    assert calls[3:] == [
+        "stop idempotency",
+        "stop dedup",
+        "stop inbox",
+        "close retry",
+    ]
+
+
+def test_getpaid_plugin_mounts_router_at_path() -> None:
+    repository = AsyncMock()
+    repository.get_by_id.side_effect = KeyError("pay-1")
+    app = Litestar(
+        plugins=[
+            GetpaidPlugin(
+                config=_make_config(),
+                repository=repository,
+                registry=DummyRegistry(),
+                path="/api",
+            )
+        ]
+    )
+
+    with TestClient(app) as client:
+        assert client.get("/api/payments/pay-1").status_code == 404
+        assert client.get("/payments/pay-1").status_code == 404
+        assert repository.get_by_id.await_count == 1
+
+
+def test_unbound_controller_is_rejected() -> None:
+    from litestar_getpaid.routes.payments import PaymentController
+
+    with pytest.raises(ConfigurationError, match="bind"):
+        Litestar(route_handlers=[PaymentController])
@@ -1,7 +1,7 @@
 """Tests for the public API surface."""
 
-from pathlib import Path
 import tomllib
+from pathlib import Path
 
 
 def test_version():
@@ -26,6 +26,13 @@ def test_create_payment_router_importable():
     assert callable(create_payment_router)
 
 
+def test_plugin_importable():
+    """Litestar plugin is importable from package root."""
+    from litestar_getpaid import GetpaidPlugin
+
+    assert callable(GetpaidPlugin)
+
+
 def test_config_importable():
     """Config class is importable from package root."""
     from litestar_getpaid import GetpaidConfig
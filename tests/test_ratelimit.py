@@ -0,0 +1,60 @@
+"""Tests for per-backend retry rate limiting."""
+
+import pytest
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.ratelimit import RetryRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bucket_allows_burst_then_throttles():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=1, clock=clock)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() > 0
+
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0.0
+
+
+def test_bucket_rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_limiter_from_config():
+    config = GetpaidConfig(
+        default_backend="payu",
+        success_url="/ok",
+        failure_url="/fail",
+        backends={
+            "payu": {"retry_rate_limit": {"rate": 1, "burst": 1}},
+            "dummy": {},
+        },
+    )
+    limiter = RetryRateLimiter.from_config(config)
+
+    assert limiter
+    assert limiter.acquire("payu") == 0.0
+    assert limiter.acquire("payu") > 0
+    assert limiter.acquire("dummy") == 0.0
+    assert limiter.acquire(None) == 0.0
+
+
+def test_limiter_without_limits_is_falsy():
+    assert not RetryRateLimiter()
@@ -75,3 +75,96 @@ def test_litestar_registry_unregister():
     reg.unregister("fake")
     with pytest.raises(KeyError):
         reg.get_by_slug("fake")
+
+
+class OtherProcessor(FakeProcessor):
+    slug = "other"
+    display_name = "Other Backend"
+
+
+class CountingEntryPoint:
+    """Stands in for an ``importlib.metadata.EntryPoint``."""
+
+    def __init__(self, name: str, processor: type) -> None:
+        self.name = name
+        self.value = f"tests.plugins.{name}:Processor"
+        self.processor = processor
+        self.loads = 0
+
+    def load(self) -> type:
+        self.loads += 1
+        return self.processor
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    """Install fake backend entry points with a clean discovery cache."""
+    from litestar_getpaid import registry as registry_module
+
+    points = {
+        "fake": CountingEntryPoint("fake", FakeProcessor),
+        "other": CountingEntryPoint("other", OtherProcessor),
+    }
+    scans = []
+
+    def fake_entry_points(*, group):
+        scans.append(group)
+        return list(points.values())
+
+    registry_module.clear_discovery_cache()
+    monkeypatch.setattr(registry_module, "entry_points", fake_entry_points)
+    yield points, scans
+    registry_module.clear_discovery_cache()
+
+
+def test_get_by_slug_imports_only_that_backend(installed):
+    """A backend is imported on first use; others stay unimported."""
+    from litestar_getpaid.registry import LitestarPluginRegistry
+
+    points, _ = installed
+    reg = LitestarPluginRegistry()
+    assert reg.get_by_slug("fake") is FakeProcessor
+    assert points["fake"].loads == 1
+    assert points["other"].loads == 0
+
+
+def test_discovery_is_cached_per_process(installed):
+    """Entry points are scanned and imported once across registries."""
+    from litestar_getpaid.registry import LitestarPluginRegistry
+
+    points, scans = installed
+    for _ in range(3):
+        reg = LitestarPluginRegistry()
+        reg.discover()
+        assert reg.get_by_slug("other") is OtherProcessor
+    assert scans == ["getpaid.backends"]
+    assert points["fake"].loads == 1
+    assert points["other"].loads == 1
+
+
+def test_load_backends_falls_back_to_discovery(installed):
+    """A slug without a matching entry point name triggers discovery."""
+    from litestar_getpaid.registry import LitestarPluginRegistry
+
+    points, _ = installed
+    reg = LitestarPluginRegistry()
+    reg.load_backends(["fake"])
+    assert not reg._discovered
+    assert points["other"].loads == 0
+
+    reg.load_backends(["renamed"])
+    assert reg._discovered
+    assert points["other"].loads == 1
+
+
+def test_discovery_timings(installed):
+    """Scan and per-backend import times are recorded."""
+    from litestar_getpaid.registry import (
+        LitestarPluginRegistry,
+        discovery_timings,
+    )
+
+    LitestarPluginRegistry().get_by_slug("fake")
+    timings = discovery_timings()
+    assert set(timings.import_seconds) == {"fake"}
+    assert timings.total_seconds >= timings.scan_seconds >= 0
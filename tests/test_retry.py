@@ -186,3 +186,212 @@ async def test_process_retries_exhausted(mock_retry_store, mock_repo, config):
 
     assert processed == 1
     mock_retry_store.mark_exhausted.assert_called_once_with("retry-1")
+
+
+async def test_run_retry_worker_waits_for_due(mock_repo, config):
+    """Worker sleeps on the store's wait_for_due instead of polling."""
+    import asyncio
+
+    from litestar_getpaid.retry import run_retry_worker
+
+    store = AsyncMock()
+    store.get_due_retries = AsyncMock(return_value=[])
+    waited = asyncio.Event()
+
+    async def wait_for_due(timeout=None):
+        waited.set()
+        await asyncio.sleep(3600)
+
+    store.wait_for_due = wait_for_due
+
+    worker = asyncio.create_task(
+        run_retry_worker(
+            retry_store=store,
+            repository=mock_repo,
+            config=config,
+        )
+    )
+    await asyncio.wait_for(waited.wait(), 1)
+    worker.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await worker
+    store.get_due_retries.assert_awaited_once_with(limit=10)
+
+
+async def test_process_retries_records_metrics(
+    mock_retry_store, mock_repo, config
+):
+    """Batch size and per-outcome attempts are recorded."""
+    from litestar_getpaid.metrics import RetryMetrics
+    from litestar_getpaid.retry import process_due_retries
+
+    payment = AsyncMock()
+    payment.id = "pay-1"
+    payment.backend = "dummy"
+    mock_repo.get_by_id = AsyncMock(side_effect=[payment, KeyError("pay-2")])
+    mock_retry_store.get_due_retries = AsyncMock(
+        return_value=[
+            {
+                "id": "retry-1",
+                "payment_id": "pay-1",
+                "payload": {},
+                "headers": {},
+                "attempts": 1,
+            },
+            {
+                "id": "retry-2",
+                "payment_id": "pay-2",
+                "backend": "dummy",
+                "payload": {},
+                "headers": {},
+                "attempts": 1,
+            },
+        ]
+    )
+    metrics = RetryMetrics()
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        instance = AsyncMock()
+        mock_flow_cls.return_value = instance
+        instance.handle_callback = AsyncMock()
+
+        await process_due_retries(
+            retry_store=mock_retry_store,
+            repository=mock_repo,
+            config=config,
+            metrics=metrics,
+        )
+
+    snapshot = await metrics.collect()
+    assert snapshot["attempts"] == {"dummy": {"not_found": 1, "succeeded": 1}}
+    assert snapshot["batch_size"]["sum"] == 2
+
+
+async def test_process_retries_parses_raw_body(
+    mock_retry_store, mock_repo, config
+):
+    """Retries queued with only a raw body are re-parsed lazily."""
+    from litestar_getpaid.retry import process_due_retries
+
+    payment = AsyncMock()
+    payment.id = "pay-1"
+    payment.backend = "dummy"
+    mock_repo.get_by_id = AsyncMock(return_value=payment)
+    mock_retry_store.get_due_retries = AsyncMock(
+        return_value=[
+            {
+                "id": "retry-1",
+                "payment_id": "pay-1",
+                "payload": None,
+                "raw_body": b"status=paid",
+                "headers": {
+                    "Content-Type": "application/x-www-form-urlencoded"
+                },
+                "attempts": 1,
+            }
+        ]
+    )
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        instance = AsyncMock()
+        mock_flow_cls.return_value = instance
+        instance.handle_callback = AsyncMock()
+
+        await process_due_retries(
+            retry_store=mock_retry_store,
+            repository=mock_repo,
+            config=config,
+        )
+
+    await_args = instance.handle_callback.await_args
+    assert await_args is not None
+    kwargs = await_args.kwargs
+    assert kwargs["data"] == {"status": "paid"}
+    assert kwargs["raw_body"] == b"status=paid"
+    mock_retry_store.mark_succeeded.assert_called_once_with("retry-1")
+
+
+async def test_process_retries_defers_rate_limited_backend(
+    mock_retry_store, mock_repo, config
+):
+    """Retries over the backend rate limit are deferred, not failed."""
+    from litestar_getpaid.ratelimit import RetryRateLimiter, TokenBucket
+    from litestar_getpaid.retry import process_due_retries
+
+    payment = AsyncMock()
+    payment.id = "pay-1"
+    payment.backend = "dummy"
+    mock_repo.get_by_id = AsyncMock(return_value=payment)
+    mock_retry_store.mark_deferred = AsyncMock()
+    mock_retry_store.get_due_retries = AsyncMock(
+        return_value=[
+            {
+                "id": f"retry-{i}",
+                "payment_id": "pay-1",
+                "backend": "dummy",
+                "payload": {"status": "paid"},
+                "headers": {},
+                "attempts": 1,
+            }
+            for i in range(3)
+        ]
+    )
+    limiter = RetryRateLimiter({"dummy": TokenBucket(rate=1, burst=1)})
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        instance = AsyncMock()
+        mock_flow_cls.return_value = instance
+        instance.handle_callback = AsyncMock()
+
+        processed = await process_due_retries(
+            retry_store=mock_retry_store,
+            repository=mock_repo,
+            config=config,
+            rate_limiter=limiter,
+        )
+
+    assert processed == 1
+    assert instance.handle_callback.await_count == 1
+    mock_retry_store.mark_succeeded.assert_called_once_with("retry-0")
+    deferred = [
+        c.args[0] for c in mock_retry_store.mark_deferred.call_args_list
+    ]
+    assert deferred == ["retry-1", "retry-2"]
+    until = mock_retry_store.mark_deferred.call_args.kwargs["until"]
+    assert until > datetime.now(tz=UTC)
+    mock_retry_store.mark_failed.assert_not_called()
+
+
+async def test_drain_retries_stops_at_time_budget(mock_repo, config):
+    """Draining stops fetching batches once the time budget is spent."""
+    from litestar_getpaid.retry import drain_retries
+
+    store = AsyncMock()
+    store.get_due_retries = AsyncMock(
+        return_value=[
+            {
+                "id": "retry-1",
+                "payment_id": "pay-1",
+                "payload": {},
+                "headers": {},
+                "attempts": 1,
+            }
+        ]
+    )
+    payment = AsyncMock()
+    payment.backend = "dummy"
+    mock_repo.get_by_id = AsyncMock(return_value=payment)
+
+    with patch("litestar_getpaid.retry.PaymentFlow") as mock_flow_cls:
+        mock_flow_cls.return_value.handle_callback = AsyncMock()
+        report = await drain_retries(
+            retry_store=store,
+            repository=mock_repo,
+            config=config,
+            time_budget=0.05,
+        )
+
+    assert report.budget_exhausted
+    assert report.batches >= 1
+    assert report.processed == report.outcomes["succeeded"]
+    assert report.throughput > 0
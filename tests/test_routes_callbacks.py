@@ -6,11 +6,13 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from getpaid_core.exceptions import CommunicationError, InvalidCallbackError
 from litestar import Litestar
-from litestar.di import Provide
 from litestar.testing import TestClient
 
 from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.context import GetpaidContext
 from litestar_getpaid.exceptions import EXCEPTION_HANDLERS
+from litestar_getpaid.locks import StripedPaymentLock
+from litestar_getpaid.lookups import BloomFilter, PaymentLookupGuard
 from litestar_getpaid.registry import LitestarPluginRegistry
 from litestar_getpaid.routes.callbacks import CallbackController
 
@@ -84,16 +86,16 @@ def mock_repo():
 @pytest.fixture
 def app(config, mock_repo):
     return Litestar(
-        route_handlers=[CallbackController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-            "registry": Provide(
-                lambda: DummyRegistry(),
-                sync_to_thread=False,
-            ),
-            "retry_store": Provide(lambda: None, sync_to_thread=False),
-        },
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    retry_store=None,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -143,13 +145,16 @@ def test_callback_returns_200_on_success(client, mock_repo):
 def test_callback_flow_uses_injected_registry(config, mock_repo):
     registry = LitestarPluginRegistry()
     app = Litestar(
-        route_handlers=[CallbackController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-            "registry": Provide(lambda: registry, sync_to_thread=False),
-            "retry_store": Provide(lambda: None, sync_to_thread=False),
-        },
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=registry,
+                    retry_store=None,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -184,16 +189,16 @@ def test_callback_stores_retry_on_failure(config, mock_repo):
     retry_store.store_failed_callback = AsyncMock(return_value="retry-1")
 
     app = Litestar(
-        route_handlers=[CallbackController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-            "registry": Provide(
-                lambda: DummyRegistry(),
-                sync_to_thread=False,
-            ),
-            "retry_store": Provide(lambda: retry_store, sync_to_thread=False),
-        },
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    retry_store=retry_store,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -214,6 +219,9 @@ def test_callback_stores_retry_on_failure(config, mock_repo):
     assert resp.status_code == 502
     assert resp.json()["detail"] == "Callback processing failed"
     retry_store.store_failed_callback.assert_called_once()
+    assert (
+        retry_store.store_failed_callback.call_args.kwargs["backend"] == "dummy"
+    )
 
 
 def test_invalid_callback_returns_400_and_skips_retry(config, mock_repo):
@@ -222,16 +230,16 @@ def test_invalid_callback_returns_400_and_skips_retry(config, mock_repo):
     retry_store.store_failed_callback = AsyncMock(return_value="retry-1")
 
     app = Litestar(
-        route_handlers=[CallbackController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-            "registry": Provide(
-                lambda: DummyRegistry(),
-                sync_to_thread=False,
-            ),
-            "retry_store": Provide(lambda: retry_store, sync_to_thread=False),
-        },
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    retry_store=retry_store,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -251,3 +259,435 @@ def test_invalid_callback_returns_400_and_skips_retry(config, mock_repo):
             )
     assert resp.status_code == 400
     retry_store.store_failed_callback.assert_not_called()
+
+
+def test_retry_stores_raw_body_and_allowed_headers(mock_repo):
+    """Only the raw body and allow-listed headers are queued."""
+    config = GetpaidConfig(
+        default_backend="dummy",
+        success_url="/ok",
+        failure_url="/fail",
+        backends={"dummy": {"callback_headers": ["X-Signature"]}},
+    )
+    retry_store = AsyncMock()
+    retry_store.store_failed_callback = AsyncMock(return_value="retry-1")
+
+    app = Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    retry_store=retry_store,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = AsyncMock()
+        mock_flow_cls.return_value = instance
+        instance.handle_callback = AsyncMock(
+            side_effect=CommunicationError("gateway error")
+        )
+
+        with TestClient(app) as test_client:
+            test_client.post(
+                "/callback/pay-1",
+                json={"status": "paid"},
+                headers={"X-Signature": "sig", "X-Other": "noise"},
+            )
+
+    kwargs = retry_store.store_failed_callback.call_args.kwargs
+    assert kwargs["payload"] is None
+    assert kwargs["raw_body"] == b'{"status":"paid"}'
+    assert {name.lower() for name in kwargs["headers"]} == {
+        "content-type",
+        "x-signature",
+    }
+
+
+def test_inbox_mode_acknowledges_without_processing(config, mock_repo):
+    """In inbox mode the callback is verified, stored and acknowledged."""
+    inbox = AsyncMock()
+    inbox.submit = AsyncMock(return_value="entry-1")
+
+    app = Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    retry_store=None,
+                    callback_inbox=inbox,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        processor = instance.get_processor.return_value
+        processor.verify_callback = AsyncMock()
+        instance.handle_callback = AsyncMock()
+
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "accepted"}
+    processor.verify_callback.assert_awaited_once()
+    instance.handle_callback.assert_not_called()
+    await_args = inbox.submit.await_args
+    assert await_args is not None
+    payment, _headers, raw_body = await_args.args
+    assert payment.id == "pay-1"
+    assert raw_body == b'{"status":"paid"}'
+
+
+def test_inbox_mode_verifies_through_flow_validators(config, mock_repo):
+    """Flow validators run before the processor verifies the callback."""
+    inbox = AsyncMock()
+
+    def validator(context):
+        context["data"] = {**context["data"], "validated": True}
+        return context
+
+    app = Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    callback_inbox=inbox,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.validators = [validator]
+        processor = instance.get_processor.return_value
+        processor.verify_callback = AsyncMock()
+
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 200
+    await_args = processor.verify_callback.await_args
+    assert await_args is not None
+    data, _headers = await_args.args
+    assert data == {"status": "paid", "validated": True}
+    assert await_args.kwargs == {"raw_body": b'{"status":"paid"}'}
+
+
+def test_inbox_mode_rejects_invalid_callback(config, mock_repo):
+    """Callbacks failing verification are not stored."""
+    inbox = AsyncMock()
+
+    app = Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    callback_inbox=inbox,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        processor = mock_flow_cls.return_value.get_processor.return_value
+        processor.verify_callback = AsyncMock(
+            side_effect=InvalidCallbackError("bad signature")
+        )
+
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 400
+    inbox.submit.assert_not_called()
+
+
+def _dedup_app(config, mock_repo, deduplicator, payment_lock=None):
+    return Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    callback_deduplicator=deduplicator,
+                    payment_lock=payment_lock,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+
+def test_duplicate_callback_is_acknowledged_without_processing(
+    config, mock_repo
+):
+    """A repeated delivery gets 200 without touching the repository."""
+    from litestar_getpaid.contrib.memory.dedup import (
+        InMemoryCallbackDeduplicator,
+    )
+
+    app = _dedup_app(config, mock_repo, InMemoryCallbackDeduplicator())
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.handle_callback = AsyncMock()
+
+        with TestClient(app) as test_client:
+            first = test_client.post("/callback/pay-1", json={"status": "paid"})
+            second = test_client.post(
+                "/callback/pay-1", json={"status": "paid"}
+            )
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json() == {"status": "ok"}
+    assert mock_repo.get_by_id.await_count == 1
+    assert instance.handle_callback.await_count == 1
+
+
+def test_duplicate_is_rechecked_under_the_lock(config, mock_repo):
+    """A delivery processed while this one waited for the lock is skipped."""
+    deduplicator = AsyncMock()
+    deduplicator.is_duplicate = AsyncMock(side_effect=[False, True])
+    app = _dedup_app(
+        config, mock_repo, deduplicator, payment_lock=StripedPaymentLock()
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.handle_callback = AsyncMock()
+
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 200
+    assert deduplicator.is_duplicate.await_count == 2
+    mock_repo.get_by_id.assert_not_called()
+    instance.handle_callback.assert_not_called()
+
+
+def test_callback_is_not_rejected_by_stale_id_filter(config, mock_repo):
+    """Payments missing from the Bloom filter are still looked up."""
+    guard = PaymentLookupGuard(id_filter=BloomFilter(100), trust_id_filter=True)
+    app = Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    payment_lookup_guard=guard,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        mock_flow_cls.return_value.handle_callback = AsyncMock()
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 200
+    mock_repo.get_by_id.assert_awaited_once_with("pay-1")
+    assert not guard.is_known_missing("pay-1")
+
+
+def test_failed_callback_is_not_remembered(config, mock_repo):
+    """Callbacks that were not processed are not treated as duplicates."""
+    deduplicator = AsyncMock()
+    deduplicator.is_duplicate = AsyncMock(return_value=False)
+    app = _dedup_app(config, mock_repo, deduplicator)
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        mock_flow_cls.return_value.handle_callback = AsyncMock(
+            side_effect=CommunicationError("gateway error")
+        )
+
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 502
+    deduplicator.remember.assert_not_called()
+
+
+def test_form_encoded_callback_is_parsed(client):
+    """Form-encoded callbacks are parsed from the raw body."""
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.handle_callback = AsyncMock()
+
+        resp = client.post(
+            "/callback/pay-1",
+            content=b"status=paid&amount=10.00",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+
+    assert resp.status_code == 200
+    await_args = instance.handle_callback.await_args
+    assert await_args is not None
+    kwargs = await_args.kwargs
+    assert kwargs["data"] == {"status": "paid", "amount": "10.00"}
+    assert kwargs["raw_body"] == b"status=paid&amount=10.00"
+
+
+def test_callback_gets_plain_dicts(client):
+    """The backend receives the body and headers as plain dicts."""
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.handle_callback = AsyncMock()
+
+        client.post(
+            "/callback/pay-1",
+            json={"status": "paid"},
+            headers={"X-Signature": "sig"},
+        )
+
+    await_args = instance.handle_callback.await_args
+    assert await_args is not None
+    kwargs = await_args.kwargs
+    assert type(kwargs["data"]) is dict
+    assert kwargs["data"] == {"status": "paid"}
+    assert type(kwargs["headers"]) is dict
+    assert kwargs["headers"]["x-signature"] == "sig"
+
+
+def test_malformed_callback_body_returns_400(client):
+    """A body that cannot be parsed is rejected before processing."""
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+        instance = mock_flow_cls.return_value
+        instance.handle_callback = AsyncMock()
+
+        resp = client.post(
+            "/callback/pay-1",
+            content=b"{not json",
+            headers={"Content-Type": "application/json"},
+        )
+
+    assert resp.status_code == 400
+    assert resp.json()["code"] == "invalid_callback"
+    instance.handle_callback.assert_not_called()
+
+
+def test_callback_runs_under_payment_lock(config, mock_repo):
+    """The payment is loaded and processed while its lock is held."""
+    from contextlib import asynccontextmanager
+
+    events: list[str] = []
+
+    class RecordingLock:
+        @asynccontextmanager
+        async def lock(self, payment_id):
+            events.append(f"acquire:{payment_id}")
+            yield
+            events.append(f"release:{payment_id}")
+
+    async def get_by_id(payment_id):
+        events.append("load")
+        return mock_repo.get_by_id.return_value
+
+    payment = mock_repo.get_by_id.return_value
+    mock_repo.get_by_id = AsyncMock(side_effect=get_by_id)
+    mock_repo.get_by_id.return_value = payment
+
+    app = Litestar(
+        route_handlers=[
+            CallbackController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    payment_lock=RecordingLock(),
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch(
+        "litestar_getpaid.routes.callbacks.PaymentFlow",
+    ) as mock_flow_cls:
+
+        async def handle_callback(**kwargs):
+            events.append("handle")
+
+        mock_flow_cls.return_value.handle_callback = AsyncMock(
+            side_effect=handle_callback
+        )
+
+        with TestClient(app) as test_client:
+            resp = test_client.post("/callback/pay-1", json={"status": "paid"})
+
+    assert resp.status_code == 200
+    assert events == ["acquire:pay-1", "load", "handle", "release:pay-1"]
+
+
+async def test_callback_passes_pooled_http_client(config, mock_repo):
+    """Open backend HTTP pools are handed to the processor settings."""
+    from litestar_getpaid.clients import BackendHTTPClients
+
+    async with BackendHTTPClients(config) as http_clients:
+        app = Litestar(
+            route_handlers=[
+                CallbackController.bind(
+                    GetpaidContext(
+                        config=config,
+                        repository=mock_repo,
+                        registry=DummyRegistry(),
+                        http_clients=http_clients,
+                    )
+                )
+            ],
+            exception_handlers=EXCEPTION_HANDLERS,
+        )
+        with patch(
+            "litestar_getpaid.routes.callbacks.PaymentFlow"
+        ) as mock_flow_cls:
+            mock_flow_cls.return_value = AsyncMock()
+            with TestClient(app) as client:
+                resp = client.post("/callback/pay-1", json={"status": "paid"})
+
+        assert resp.status_code == 200
+        backends = mock_flow_cls.call_args.kwargs["config"]
+        assert backends["dummy"]["http_client"] is http_clients.get("dummy")
+        assert backends["dummy"]["sandbox"] is True
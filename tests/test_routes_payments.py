@@ -1,19 +1,32 @@
 """Tests for payment CRUD routes (Litestar controllers)."""
 
+import asyncio
+from datetime import UTC, datetime
 from decimal import Decimal
+from typing import TYPE_CHECKING, cast
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from getpaid_core.types import TransactionResult
 from litestar import Litestar
-from litestar.di import Provide
 from litestar.testing import TestClient
 
 from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.context import GetpaidContext
+from litestar_getpaid.contrib.memory.idempotency import (
+    InMemoryIdempotencyStore,
+)
+from litestar_getpaid.events import InProcessBroadcaster
 from litestar_getpaid.exceptions import EXCEPTION_HANDLERS
+from litestar_getpaid.idempotency import IdempotencyGuard
+from litestar_getpaid.lookups import BloomFilter, PaymentLookupGuard
+from litestar_getpaid.protocols import PaymentStatusEvent, PaymentVersion
 from litestar_getpaid.registry import LitestarPluginRegistry
 from litestar_getpaid.routes.payments import PaymentController
 
+if TYPE_CHECKING:
+    from getpaid_core.protocols import PaymentRepository
+
 
 class DummyOrder:
     def __init__(self, order_id: str = "order-1") -> None:
@@ -92,16 +105,16 @@ def mock_repo(mock_payment):
 @pytest.fixture
 def app(config, mock_repo):
     return Litestar(
-        route_handlers=[PaymentController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-            "registry": Provide(
-                lambda: DummyRegistry(),
-                sync_to_thread=False,
-            ),
-            "order_resolver": Provide(lambda: None, sync_to_thread=False),
-        },
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    order_resolver=None,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -128,6 +141,31 @@ def test_get_payment_not_found(client, mock_repo):
     assert resp.status_code == 404
 
 
+def test_get_payment_missing_from_id_filter(config, mock_repo):
+    """Payments created by another process are confirmed with the
+    repository instead of answering 404."""
+    guard = PaymentLookupGuard(id_filter=BloomFilter(100))
+    app = Litestar(
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    payment_lookup_guard=guard,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    with TestClient(app) as client:
+        resp = client.get("/payments/pay-1")
+    assert resp.status_code == 200
+    mock_repo.get_by_id.assert_awaited_once_with("pay-1")
+    assert guard.id_filter is not None
+    assert "pay-1" in guard.id_filter
+
+
 def test_list_payments(client, mock_repo, mock_payment):
     """GET /payments/ returns list of payments."""
     mock_repo.list_by_order = AsyncMock(return_value=[mock_payment])
@@ -146,16 +184,16 @@ def test_create_payment(config, mock_repo, mock_payment):
     resolver.resolve = AsyncMock(return_value=mock_order)
 
     app = Litestar(
-        route_handlers=[PaymentController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-            "registry": Provide(
-                lambda: DummyRegistry(),
-                sync_to_thread=False,
-            ),
-            "order_resolver": Provide(lambda: resolver, sync_to_thread=False),
-        },
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    order_resolver=resolver,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -214,3 +252,354 @@ def test_list_payments_missing_order_id(client):
     """GET /payments/ without order_id query param returns 400."""
     resp = client.get("/payments/")
     assert resp.status_code == 400
+
+
+def test_create_payment_idempotency_key(config, mock_repo, mock_payment):
+    """A repeated Idempotency-Key returns the first response."""
+    resolver = AsyncMock()
+    resolver.resolve = AsyncMock(return_value=DummyOrder())
+    guard = IdempotencyGuard(InMemoryIdempotencyStore())
+
+    app = Litestar(
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    registry=DummyRegistry(),
+                    order_resolver=resolver,
+                    idempotency_guard=guard,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch("litestar_getpaid.routes.payments.PaymentFlow") as mock_flow_cls:
+        instance = AsyncMock()
+        mock_flow_cls.return_value = instance
+        instance.create_payment = AsyncMock(return_value=mock_payment)
+        instance.prepare = AsyncMock(
+            return_value=TransactionResult(
+                redirect_url="https://gateway.example.com/pay",
+                form_data=None,
+                method="GET",
+                external_id="ext-123",
+                provider_data={},
+            )
+        )
+
+        with TestClient(app) as test_client:
+            body = {"order_id": "order-1", "backend": "dummy"}
+            headers = {"Idempotency-Key": "key-1"}
+            first = test_client.post("/payments/", json=body, headers=headers)
+            second = test_client.post("/payments/", json=body, headers=headers)
+            mismatch = test_client.post(
+                "/payments/",
+                json={"order_id": "order-2", "backend": "dummy"},
+                headers=headers,
+            )
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert instance.prepare.await_count == 1
+    assert mismatch.status_code == 422
+
+
+class ReusableRepo:
+    """Minimal ReusablePaymentRepository for the reuse policy."""
+
+    def __init__(self, payment) -> None:
+        self.payment = payment
+        self.saved: dict[str, dict] = {}
+        self.lookups: list[tuple] = []
+
+    async def create(self, **kwargs):
+        return self.payment
+
+    async def save(self, payment):
+        return payment
+
+    async def find_reusable_payment(self, order_id, backend, *, created_after):
+        self.lookups.append((order_id, backend))
+        result = self.saved.get(str(self.payment.id))
+        if result is None:
+            return None
+        self.payment.transaction_result = result
+        return self.payment
+
+    async def save_transaction_result(self, payment_id, result):
+        self.saved[payment_id] = result
+
+
+def test_create_payment_reuses_prepared_payment(config, mock_payment):
+    """With payment_reuse_seconds set, repeats skip the gateway."""
+    config.payment_reuse_seconds = 900
+    repo = ReusableRepo(mock_payment)
+    resolver = AsyncMock()
+    resolver.resolve = AsyncMock(return_value=DummyOrder())
+
+    app = Litestar(
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=cast("PaymentRepository", repo),
+                    registry=DummyRegistry(),
+                    order_resolver=resolver,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+    with patch("litestar_getpaid.routes.payments.PaymentFlow") as mock_flow_cls:
+        instance = AsyncMock()
+        mock_flow_cls.return_value = instance
+        instance.create_payment = AsyncMock(return_value=mock_payment)
+        instance.prepare = AsyncMock(
+            return_value=TransactionResult(
+                redirect_url="https://gateway.example.com/pay",
+                form_data=None,
+                method="GET",
+                external_id="ext-123",
+                provider_data={},
+            )
+        )
+
+        with TestClient(app) as test_client:
+            body = {"order_id": "order-1", "backend": "dummy"}
+            first = test_client.post("/payments/", json=body)
+            second = test_client.post("/payments/", json=body)
+            mock_payment.amount_required = Decimal("120")
+            changed = test_client.post("/payments/", json=body)
+
+    assert first.status_code == 201
+    assert second.json() == first.json()
+    assert repo.lookups == [("order-1", "dummy")] * 3
+    # The third request saw a different order total and prepared anew.
+    assert instance.prepare.await_count == 2
+    assert changed.status_code == 201
+
+
+class VersionedRepo:
+    """Repository exposing the cheap version lookup."""
+
+    def __init__(self, payment) -> None:
+        self.payment = payment
+        self.full_loads = 0
+
+    async def get_by_id(self, payment_id):
+        self.full_loads += 1
+        return self.payment
+
+    async def get_payment_version(self, payment_id):
+        return PaymentVersion(
+            updated_at=self.payment.updated_at, status=self.payment.status
+        )
+
+
+@pytest.fixture
+def versioned_client(config, mock_payment):
+    mock_payment.updated_at = datetime(2026, 1, 1, tzinfo=UTC)
+    repo = cast("PaymentRepository", VersionedRepo(mock_payment))
+    app = Litestar(
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=repo,
+                    registry=DummyRegistry(),
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    with TestClient(app) as c:
+        yield c, repo
+
+
+def test_get_payment_conditional(versioned_client, mock_payment):
+    """A matching If-None-Match gets a 304 without a full load."""
+    client, repo = versioned_client
+    resp = client.get("/payments/pay-1")
+    etag = resp.headers["etag"]
+    assert etag.startswith('W/"')
+    assert resp.headers["cache-control"] == "private, no-cache"
+    assert repo.full_loads == 1
+
+    resp = client.get("/payments/pay-1", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+    assert repo.full_loads == 1
+
+    mock_payment.updated_at = datetime(2026, 1, 2, tzinfo=UTC)
+    resp = client.get("/payments/pay-1", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert repo.full_loads == 2
+
+
+def test_get_payment_paid_status_revalidates(versioned_client, mock_payment):
+    """A paid payment can still be refunded, so it is never cached."""
+    client, _repo = versioned_client
+    mock_payment.status = "paid"
+    resp = client.get("/payments/pay-1")
+    assert resp.headers["cache-control"] == "private, no-cache"
+
+
+def test_get_payment_refunded_is_cacheable(
+    versioned_client, mock_payment, config
+):
+    client, _repo = versioned_client
+    mock_payment.status = "refunded"
+    resp = client.get("/payments/pay-1")
+    assert resp.headers["cache-control"] == "private, no-cache"
+
+    config.payment_cache_max_age = 600
+    resp = client.get("/payments/pay-1")
+    assert resp.headers["cache-control"] == "private, max-age=600"
+
+
+def _events_app(config, repo, broadcaster):
+    return Litestar(
+        route_handlers=[
+            PaymentController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=repo,
+                    registry=DummyRegistry(),
+                    payment_events=broadcaster,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+
+
+def test_payment_events_end_on_final_status(config, mock_repo, mock_payment):
+    """A payment already in a final status gets one event."""
+    mock_payment.status = "paid"
+    app = _events_app(config, mock_repo, InProcessBroadcaster())
+    with TestClient(app) as client:
+        resp = client.get("/payments/pay-1/events")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text == (
+        "event: status\r\n"
+        'data: {"payment_id":"pay-1","order_id":"order-1","status":"paid"}'
+        "\r\n\r\n"
+    )
+
+
+def test_payment_events_unknown_payment(config, mock_repo):
+    mock_repo.get_by_id = AsyncMock(side_effect=KeyError("pay-999"))
+    app = _events_app(config, mock_repo, InProcessBroadcaster())
+    with TestClient(app) as client:
+        resp = client.get("/payments/pay-999/events")
+    assert resp.status_code == 404
+
+
+def test_payment_events_without_broadcaster(app):
+    with TestClient(app) as client:
+        resp = client.get("/payments/pay-1/events")
+    assert resp.status_code == 500
+    assert resp.json()["code"] == "configuration_error"
+
+
+def test_order_events_stream_changes(config, mock_repo, mock_payment):
+    """Order streams follow status changes until a payment is paid."""
+    broadcaster = InProcessBroadcaster()
+
+    async def publish_changes() -> None:
+        for status in ("prepared", "prepared", "paid"):
+            await broadcaster.publish(
+                PaymentStatusEvent(
+                    payment_id="pay-1", order_id="order-1", status=status
+                )
+            )
+
+    async def list_by_order(order_id):
+        # The stream has subscribed by now; publish on the app's loop.
+        background.add(asyncio.create_task(publish_changes()))
+        return [mock_payment]
+
+    background: set[asyncio.Task] = set()
+    mock_repo.list_by_order = list_by_order
+    app = _events_app(config, mock_repo, broadcaster)
+    with TestClient(app) as client:
+        resp = client.get("/payments/events?order_id=order-1")
+
+    statuses = [
+        line.rsplit('"status":"', 1)[1].rstrip('"}')
+        for line in resp.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert statuses == ["new", "prepared", "paid"]
+    assert broadcaster.subscriber_count() == 0
+
+
+def test_msgspec_responses_match_pydantic(config, client, app):
+    """msgspec_responses changes the encoder, not the JSON."""
+    single = client.get("/payments/pay-1").json()
+    listed = client.get("/payments/?order_id=order-1").json()
+
+    config.msgspec_responses = True
+    with TestClient(app) as fast_client:
+        assert fast_client.get("/payments/pay-1").json() == single
+        resp = fast_client.get("/payments/?order_id=order-1")
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json() == listed
+
+
+class ProjectingRepo:
+    """Repository serving sparse fieldsets from projections."""
+
+    def __init__(self, payment) -> None:
+        self.payment = payment
+        self.requested: list[set] = []
+
+    async def get_payment_fields(self, payment_id, fields):
+        self.requested.append(set(fields))
+        return {name: getattr(self.payment, name) for name in fields}
+
+    async def list_payment_fields(self, order_id, fields):
+        self.requested.append(set(fields))
+        return [{name: getattr(self.payment, name) for name in fields}]
+
+
+def test_get_payment_sparse_fieldset(config, mock_payment):
+    mock_payment.updated_at = datetime(2026, 1, 1, tzinfo=UTC)
+    repo = ProjectingRepo(mock_payment)
+    app = _events_app(config, repo, None)
+    with TestClient(app) as client:
+        resp = client.get("/payments/pay-1?fields=amount_paid,status")
+        listed = client.get("/payments/?order_id=order-1&fields=status")
+
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "new", "amount_paid": "0"}
+    assert resp.headers["etag"].startswith('W/"')
+    assert repo.requested[0] == {"amount_paid", "status", "updated_at"}
+    assert listed.json() == {"items": [{"status": "new"}], "total": 1}
+    assert repo.requested[1] == {"status"}
+
+
+def test_sparse_fieldset_without_projection(versioned_client):
+    """Repositories without projections still get narrowed output."""
+    client, _repo = versioned_client
+    resp = client.get("/payments/pay-1?fields=id,provider_data")
+    assert resp.json() == {
+        "id": "pay-1",
+        "provider_data": {"customer_ip": "127.0.0.1"},
+    }
+
+
+def test_sparse_fieldset_rejects_unknown_fields(client):
+    resp = client.get("/payments/pay-1?fields=status,secret")
+    assert resp.status_code == 400
+    assert resp.json() == {
+        "detail": "Unknown fields: secret",
+        "code": "invalid_fields",
+    }
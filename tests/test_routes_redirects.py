@@ -4,12 +4,15 @@ from unittest.mock import AsyncMock
 
 import pytest
 from litestar import Litestar
-from litestar.di import Provide
 from litestar.testing import TestClient
+from pydantic import SecretStr
 
 from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.context import GetpaidContext
 from litestar_getpaid.exceptions import EXCEPTION_HANDLERS
+from litestar_getpaid.lookups import BloomFilter, PaymentLookupGuard
 from litestar_getpaid.routes.redirects import RedirectController
+from litestar_getpaid.signing import create_redirect_token
 
 
 @pytest.fixture
@@ -41,11 +44,14 @@ def mock_repo(mock_payment):
 @pytest.fixture
 def app(config, mock_repo):
     return Litestar(
-        route_handlers=[RedirectController],
-        dependencies={
-            "config": Provide(lambda: config, sync_to_thread=False),
-            "repository": Provide(lambda: mock_repo, sync_to_thread=False),
-        },
+        route_handlers=[
+            RedirectController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                )
+            )
+        ],
         exception_handlers=EXCEPTION_HANDLERS,
     )
 
@@ -83,3 +89,68 @@ def test_failure_payment_not_found(client, mock_repo):
     mock_repo.get_by_id = AsyncMock(side_effect=KeyError("pay-999"))
     resp = client.get("/failure/pay-999")
     assert resp.status_code == 404
+
+
+def test_signed_redirect_skips_lookup(config, client, mock_repo):
+    """A valid token redirects without loading the payment."""
+    config.redirect_secret = SecretStr("s3cret")
+    token = create_redirect_token(config, "pay-1")
+    for path in ("/success/pay-1", "/failure/pay-1"):
+        resp = client.get(path, params={"token": token})
+        assert resp.status_code in (301, 302, 303, 307)
+    mock_repo.get_by_id.assert_not_awaited()
+
+
+def test_invalid_token_falls_back_to_lookup(config, client, mock_repo):
+    config.redirect_secret = SecretStr("s3cret")
+    token = create_redirect_token(config, "pay-1")
+    mock_repo.get_by_id = AsyncMock(side_effect=KeyError("pay-2"))
+    resp = client.get("/success/pay-2", params={"token": token})
+    assert resp.status_code == 404
+    mock_repo.get_by_id.assert_awaited_once_with("pay-2")
+
+
+def test_redirect_finds_payment_missing_from_id_filter(config, mock_repo):
+    """A payment created by another process is not rejected by the
+    guard's filter."""
+    mock_repo.exists = AsyncMock(return_value=True)
+    guard = PaymentLookupGuard(id_filter=BloomFilter(100))
+    app = Litestar(
+        route_handlers=[
+            RedirectController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    payment_lookup_guard=guard,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    with TestClient(app) as client:
+        resp = client.get("/success/pay-2", follow_redirects=False)
+    assert resp.status_code in (301, 302, 303, 307)
+    mock_repo.exists.assert_awaited_once_with("pay-2")
+
+
+def test_lookup_guard_uses_exists(config, mock_repo):
+    """With a lookup guard, redirects only check existence."""
+    mock_repo.exists = AsyncMock(return_value=False)
+    guard = PaymentLookupGuard()
+    app = Litestar(
+        route_handlers=[
+            RedirectController.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=mock_repo,
+                    payment_lookup_guard=guard,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    with TestClient(app) as client:
+        assert client.get("/success/bogus").status_code == 404
+        assert client.get("/failure/bogus").status_code == 404
+    mock_repo.exists.assert_awaited_once_with("bogus")
+    mock_repo.get_by_id.assert_not_awaited()
@@ -0,0 +1,79 @@
+"""Tests for msgspec payment response encoding."""
+
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+
+from litestar_getpaid.routes.payments import _payment_to_response
+from litestar_getpaid.schemas import PaymentListResponse
+from litestar_getpaid.serialization import (
+    encode_payment,
+    encode_payment_list,
+    payment_to_struct,
+)
+
+
+def _payment(payment_id: str = "pay-1", **overrides) -> SimpleNamespace:
+    fields = {
+        "id": payment_id,
+        "order_id": "order-1",
+        "amount_required": Decimal("100.50"),
+        "currency": "PLN",
+        "status": "paid",
+        "backend": "dummy",
+        "external_id": "ext-1",
+        "description": "Test payment",
+        "amount_paid": Decimal("100.50"),
+        "amount_locked": Decimal("0"),
+        "amount_refunded": Decimal("0.00"),
+        "fraud_status": None,
+        "fraud_message": None,
+        "provider_data": {"customer_ip": "127.0.0.1"},
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_encode_payment_matches_pydantic():
+    payment = _payment()
+    assert (
+        encode_payment(payment)
+        == _payment_to_response(payment).model_dump_json().encode()
+    )
+
+
+def test_decimals_are_encoded_as_strings():
+    data = json.loads(encode_payment(_payment()))
+    assert data["amount_required"] == "100.50"
+    assert data["amount_refunded"] == "0.00"
+
+
+def test_order_id_falls_back_to_order():
+    payment = _payment(order_id=None, order=SimpleNamespace(id=42))
+    assert payment_to_struct(payment).order_id == "42"
+
+
+def test_encode_payment_list_matches_pydantic():
+    payments = [_payment(f"pay-{i}") for i in range(3)]
+    expected = PaymentListResponse(
+        items=[_payment_to_response(p) for p in payments], total=3
+    )
+    assert encode_payment_list(payments) == (
+        expected.model_dump_json().encode()
+    )
+
+
+def test_objects_without_plain_attributes_are_read_one_by_one():
+    class SlottedPayment:
+        __slots__ = tuple(vars(_payment()))
+
+        def __init__(self, **fields):
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    payment = SlottedPayment(
+        **vars(_payment(payment_id=7))  # ty: ignore[invalid-argument-type]
+    )
+    struct = payment_to_struct(payment)
+    assert struct.id == "7"
+    assert struct.provider_data == {"customer_ip": "127.0.0.1"}
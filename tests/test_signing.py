@@ -0,0 +1,64 @@
+"""Tests for signed redirect tokens."""
+
+import pytest
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.exceptions import ConfigurationError
+from litestar_getpaid.signing import (
+    create_redirect_token,
+    verify_redirect_token,
+)
+
+
+def _config(**overrides) -> GetpaidConfig:
+    return GetpaidConfig(
+        default_backend="dummy",
+        success_url="/ok",
+        failure_url="/fail",
+        **overrides,
+    )
+
+
+@pytest.fixture
+def config():
+    return _config(redirect_secret="s3cret", redirect_token_ttl=60)
+
+
+def test_token_round_trip(config):
+    token = create_redirect_token(config, "pay-1", now=1000)
+    assert verify_redirect_token(config, "pay-1", token, now=1059)
+
+
+def test_token_is_bound_to_payment(config):
+    token = create_redirect_token(config, "pay-1", now=1000)
+    assert not verify_redirect_token(config, "pay-2", token, now=1000)
+
+
+def test_token_expires(config):
+    token = create_redirect_token(config, "pay-1", now=1000)
+    assert not verify_redirect_token(config, "pay-1", token, now=1061)
+
+
+def test_tampered_expiry_is_rejected(config):
+    token = create_redirect_token(config, "pay-1", now=1000)
+    _expires, _, signature = token.partition(".")
+    forged = f"{10**9:x}.{signature}"
+    assert not verify_redirect_token(config, "pay-1", forged, now=1000)
+
+
+@pytest.mark.parametrize("token", ["", "garbage", "zz.abc", "."])
+def test_malformed_tokens_are_rejected(config, token):
+    assert not verify_redirect_token(config, "pay-1", token)
+
+
+def test_other_secret_is_rejected(config):
+    token = create_redirect_token(config, "pay-1")
+    other = _config(redirect_secret="other")
+    assert not verify_redirect_token(other, "pay-1", token)
+
+
+def test_requires_secret():
+    config = _config()
+    with pytest.raises(ConfigurationError):
+        create_redirect_token(config, "pay-1")
+    assert not verify_redirect_token(config, "pay-1", "1.abc")
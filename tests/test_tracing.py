@@ -0,0 +1,256 @@
+"""Tests for tracing spans around payment operations."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from getpaid_core.exceptions import CommunicationError
+from getpaid_core.types import TransactionResult
+from litestar import Litestar
+from litestar.testing import TestClient
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.context import GetpaidContext
+from litestar_getpaid.exceptions import EXCEPTION_HANDLERS
+from litestar_getpaid.protocols import Tracer
+from litestar_getpaid.registry import LitestarPluginRegistry
+from litestar_getpaid.retry import process_due_retries
+from litestar_getpaid.routes.callbacks import CallbackController
+from litestar_getpaid.routes.payments import PaymentController
+from litestar_getpaid.tracing import (
+    NOOP_TRACER,
+    InMemoryTracer,
+    OpenTelemetryTracer,
+)
+
+
+class DummyRegistry(LitestarPluginRegistry):
+    _discovered = True
+
+    def discover(self) -> None:
+        self._discovered = True
+
+
+@pytest.fixture
+def config():
+    return GetpaidConfig(
+        default_backend="dummy",
+        success_url="/ok",
+        failure_url="/fail",
+        backends={"dummy": {}},
+        retry_max_attempts=3,
+    )
+
+
+@pytest.fixture
+def payment():
+    payment = AsyncMock()
+    payment.id = "pay-1"
+    payment.status = "paid"
+    payment.backend = "dummy"
+    return payment
+
+
+@pytest.fixture
+def mock_repo(payment):
+    repo = AsyncMock()
+    repo.get_by_id = AsyncMock(return_value=payment)
+    return repo
+
+
+@pytest.fixture
+def tracer():
+    return InMemoryTracer()
+
+
+def _client(controller, tracer, config, repository, **components):
+    app = Litestar(
+        route_handlers=[
+            controller.bind(
+                GetpaidContext(
+                    config=config,
+                    repository=repository,
+                    registry=DummyRegistry(),
+                    tracer=tracer,
+                    **components,
+                )
+            )
+        ],
+        exception_handlers=EXCEPTION_HANDLERS,
+    )
+    return TestClient(app)
+
+
+def test_tracers_implement_protocol():
+    assert isinstance(NOOP_TRACER, Tracer)
+    assert isinstance(InMemoryTracer(), Tracer)
+
+
+def test_noop_tracer_reuses_one_span():
+    with NOOP_TRACER.span("a", backend="x") as span:
+        span.set_attribute("outcome", "ok")
+    assert NOOP_TRACER.span("b") is span
+
+
+def test_in_memory_tracer_records_nesting_and_errors(tracer):
+    with pytest.raises(ValueError), tracer.span("outer", backend="payu") as s:
+        s.set_attribute("outcome", "ok")
+        with tracer.span("inner"):
+            raise ValueError("boom")
+    inner, outer = tracer.spans
+    assert inner.name == "inner"
+    assert inner.parent == "outer"
+    assert inner.error == "ValueError"
+    assert outer.parent is None
+    assert outer.attributes == {"backend": "payu", "outcome": "ok"}
+    assert outer.duration >= inner.duration
+
+
+def test_callback_route_traces_stages(tracer, config, mock_repo):
+    with patch("litestar_getpaid.routes.callbacks.PaymentFlow") as flow_cls:
+        flow_cls.return_value.handle_callback = AsyncMock()
+        with _client(CallbackController, tracer, config, mock_repo) as client:
+            resp = client.post("/callback/pay-1", json={"status": "paid"})
+    assert resp.status_code == 200
+    (callback,) = tracer.find("getpaid.callback")
+    assert callback.attributes == {
+        "payment_id": "pay-1",
+        "backend": "dummy",
+        "outcome": "ok",
+        "status": "paid",
+    }
+    (load,) = tracer.find("getpaid.repository.get")
+    (handle,) = tracer.find("getpaid.flow.handle_callback")
+    assert load.parent == handle.parent == "getpaid.callback"
+
+
+def test_callback_route_traces_queued_retry(tracer, config, mock_repo):
+    retry_store = AsyncMock()
+    with patch("litestar_getpaid.routes.callbacks.PaymentFlow") as flow_cls:
+        flow_cls.return_value.handle_callback = AsyncMock(
+            side_effect=CommunicationError("gateway down")
+        )
+        with _client(
+            CallbackController,
+            tracer,
+            config,
+            mock_repo,
+            retry_store=retry_store,
+        ) as client:
+            resp = client.post("/callback/pay-1", json={"status": "paid"})
+    assert resp.status_code == 502
+    (handle,) = tracer.find("getpaid.flow.handle_callback")
+    assert handle.error == "CommunicationError"
+    assert tracer.find("getpaid.retry_store.store")
+    (callback,) = tracer.find("getpaid.callback")
+    assert callback.attributes["outcome"] == "queued"
+
+
+def test_create_payment_traces_stages(tracer, config, mock_repo, payment):
+    payment.status = "prepared"
+    order = AsyncMock()
+    order.id = "order-1"
+    resolver = AsyncMock()
+    resolver.resolve = AsyncMock(return_value=order)
+    result = TransactionResult(
+        redirect_url="https://gateway.example.com/pay",
+        form_data=None,
+        method="GET",
+    )
+    with patch("litestar_getpaid.routes.payments.PaymentFlow") as flow_cls:
+        flow_cls.return_value.create_payment = AsyncMock(return_value=payment)
+        flow_cls.return_value.prepare = AsyncMock(return_value=result)
+        with _client(
+            PaymentController,
+            tracer,
+            config,
+            mock_repo,
+            order_resolver=resolver,
+        ) as client:
+            resp = client.post(
+                "/payments/",
+                json={"order_id": "order-1", "backend": "dummy"},
+            )
+    assert resp.status_code == 201
+    names = [span.name for span in tracer.spans]
+    assert names == [
+        "getpaid.order.resolve",
+        "getpaid.repository.find_reusable",
+        "getpaid.flow.create_payment",
+        "getpaid.flow.prepare",
+        "getpaid.payments.create",
+    ]
+    (create,) = tracer.find("getpaid.payments.create")
+    assert create.attributes["payment_id"] == "pay-1"
+    assert create.attributes["outcome"] == "created"
+    assert create.attributes["status"] == "prepared"
+
+
+async def test_retry_replay_traces_outcome(tracer, config, mock_repo):
+    retry_store = AsyncMock()
+    retry_store.get_due_retries = AsyncMock(
+        return_value=[
+            {
+                "id": "retry-1",
+                "payment_id": "pay-1",
+                "payload": {"status": "paid"},
+                "headers": {},
+                "attempts": 1,
+                "backend": "dummy",
+            }
+        ]
+    )
+    with patch("litestar_getpaid.retry.PaymentFlow") as flow_cls:
+        flow_cls.return_value.handle_callback = AsyncMock()
+        await process_due_retries(
+            retry_store=retry_store,
+            repository=mock_repo,
+            config=config,
+            tracer=tracer,
+        )
+    (fetch,) = tracer.find("getpaid.retry_store.fetch")
+    assert fetch.attributes == {"count": 1}
+    (replay,) = tracer.find("getpaid.retry.replay")
+    assert replay.attributes == {
+        "retry_id": "retry-1",
+        "payment_id": "pay-1",
+        "attempt": 1,
+        "backend": "dummy",
+        "status": "paid",
+        "outcome": "succeeded",
+    }
+    (mark,) = tracer.find("getpaid.retry_store.mark")
+    assert mark.parent == "getpaid.retry.replay"
+    assert mark.attributes == {"outcome": "succeeded"}
+
+
+def test_opentelemetry_tracer_exports_spans():
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+    from opentelemetry.trace import StatusCode
+
+    exporter = InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = OpenTelemetryTracer(provider.get_tracer("test"))
+
+    with tracer.span("getpaid.callback", payment_id="pay-1") as span:
+        span.set_attribute("backend", "payu")
+        span.set_attribute("status", None)
+    with (
+        pytest.raises(CommunicationError),
+        tracer.span("getpaid.flow.handle_callback"),
+    ):
+        raise CommunicationError("gateway down")
+
+    callback, handle = exporter.get_finished_spans()
+    assert callback.name == "getpaid.callback"
+    assert callback.attributes is not None
+    assert dict(callback.attributes) == {
+        "getpaid.payment_id": "pay-1",
+        "getpaid.backend": "payu",
+    }
+    assert handle.status.status_code is StatusCode.ERROR
+    assert handle.events[0].name == "exception"
@@ -0,0 +1,92 @@
+"""Tests for backend warm-up at startup."""
+
+import asyncio
+
+import pytest
+from getpaid_core.processor import BaseProcessor
+from getpaid_core.types import TransactionResult
+
+from litestar_getpaid.config import GetpaidConfig
+from litestar_getpaid.exceptions import ConfigurationError
+from litestar_getpaid.registry import LitestarPluginRegistry
+from litestar_getpaid.warmup import warm_up_backends
+
+
+class PlainProcessor(BaseProcessor):
+    slug = "plain"
+    display_name = "Plain"
+    accepted_currencies = ["PLN"]
+
+    async def prepare_transaction(self, **kwargs) -> TransactionResult:
+        raise NotImplementedError
+
+
+class TokenProcessor(PlainProcessor):
+    slug = "token"
+    warmed: list[dict] = []
+
+    @classmethod
+    async def warm_up(cls, config: dict) -> None:
+        cls.warmed.append(config)
+
+
+class SlowProcessor(PlainProcessor):
+    slug = "slow"
+
+    @classmethod
+    async def warm_up(cls, config: dict) -> None:
+        await asyncio.sleep(10)
+
+
+def _config(*slugs: str) -> GetpaidConfig:
+    return GetpaidConfig(
+        default_backend=slugs[0],
+        success_url="/ok",
+        failure_url="/fail",
+        backends={slug: {"client_id": slug} for slug in slugs},
+    )
+
+
+@pytest.fixture
+def registry():
+    registry = LitestarPluginRegistry()
+    for processor in (PlainProcessor, TokenProcessor, SlowProcessor):
+        registry.register(processor)
+    registry._discovered = True
+    TokenProcessor.warmed = []
+    return registry
+
+
+async def test_resolves_backends_and_runs_hooks(registry):
+    """Every configured backend is resolved; hooks get its settings."""
+    report = await warm_up_backends(_config("plain", "token"), registry)
+
+    assert report.ok
+    assert set(report.backends) == {"plain", "token"}
+    assert all(b.seconds >= 0 for b in report.backends.values())
+    assert TokenProcessor.warmed == [{"client_id": "token"}]
+
+
+async def test_prefetch_disabled_skips_hooks(registry):
+    await warm_up_backends(_config("token"), registry, prefetch=False)
+    assert TokenProcessor.warmed == []
+
+
+async def test_failures_and_timeouts_are_reported(registry):
+    """An unknown or slow backend does not hold up the others."""
+    report = await warm_up_backends(
+        _config("token", "missing", "slow"), registry, timeout=0.5
+    )
+
+    assert not report.ok
+    assert sorted(report.failed) == ["missing", "slow"]
+    error = report.backends["slow"].error
+    assert error is not None
+    assert "timed out" in error
+    assert report.backends["token"].ok
+    assert report.elapsed < 5
+
+
+async def test_strict_raises(registry):
+    with pytest.raises(ConfigurationError, match="missing"):
+        await warm_up_backends(_config("missing"), registry, strict=True)